@@ -1,9 +1,31 @@
+"""
+Requirement analysis: the heuristic analyzer, its executor and result cache, and the
+optional model-backed analyzer.
+
+Compare the keyword scan against a regex alternation, and the executor
+backends under steady load and under a burst that overflows the queue, with:
+
+    python -m app.ai_service benchmark keywords [texts]
+    python -m app.ai_service benchmark executor [requests] [max_workers]
+"""
 import os
-from typing import Dict, Tuple, List, Set
+from typing import Dict, Tuple, List, Set, Optional, Sequence, Mapping, Union
 import re
 import random
 import math
 import asyncio
+import functools
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dotenv import load_dotenv
+from .feedback_messages import feedback_code, encode_feedback, feedback_parts, render_feedback
+
+load_dotenv()
 
 # Common business terms and metrics
 BUSINESS_METRICS = {
@@ -27,23 +49,81 @@ ANALYSIS_METHODS = {
     'machine learning', 'algorithm', 'ai', 'artificial intelligence', 'deep learning', 'neural'
 }
 
+# Predefined expected output options
+STANDARD_OUTPUTS = {"Actionable Insights", "Data Visualization", "Statistical Analysis", "Predictive Model"}
+
+class KeywordMatcher:
+    """Counts which keywords of a fixed set occur in a text, built once per set
+    
+    A plain substring test per keyword: regex alternation and Aho-Corasick were both
+    slower for these sets of a few dozen short keywords, on short texts and ~10 KB
+    business goals alike (python -m app.ai_service benchmark keywords).
+    """
+    
+    def __init__(self, keywords: Set[str]):
+        self.keywords = tuple(sorted({k.lower() for k in keywords}))
+        self.size = len(self.keywords)
+    
+    def find(self, text: str) -> Set[str]:
+        """Return the keywords present in an already lowercased text"""
+        return {keyword for keyword in self.keywords if keyword in text}
+    
+    def count(self, text: str) -> int:
+        """Return the number of distinct keywords present in an already lowercased text"""
+        return sum(1 for keyword in self.keywords if keyword in text)
+
+BUSINESS_METRICS_MATCHER = KeywordMatcher(BUSINESS_METRICS)
+ANALYSIS_METHODS_MATCHER = KeywordMatcher(ANALYSIS_METHODS)
+
+def requirement_key(
+    title: str,
+    business_goal: str,
+    data_scope: str,
+    expected_output: Optional[str],
+    priority: str = "Medium"
+) -> str:
+    """Content hash identifying the inputs of one analysis"""
+    content = "\x1f".join(
+        value or "" for value in (title, business_goal, data_scope, expected_output, priority)
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def with_file_count(data_scope: str, file_count: int) -> str:
+    """The data scope as the analyzer reads it, noting how many files were attached
+    
+    Verify, create and re-scoring all build the analyzer input with this, so the same
+    requirement gets the same cache key and scores on every path.
+    """
+    if not file_count:
+        return data_scope
+    return f"{data_scope} - Files uploaded: {file_count} file(s)"
+
 class RequirementAnalyzer:
     """Class to simulate AI analysis of requirements"""
     
-    def __init__(self):
+    SECTIONS = ("title", "business_goal", "data_scope", "expected_output")
+    
+    def __init__(self, deterministic: bool = False, section_cache_size: int = 256):
         # Add some randomness to make each analysis slightly different
         self.randomness = 0.1
+        # In deterministic mode the variation is seeded from the content hash,
+        # so the same requirement always gets the same scores
+        self.deterministic = deterministic
+        # Per-section memo of (scores, feedback) keyed on the section's inputs, so a
+        # re-verify after editing one field only recomputes that field's section
+        self.section_cache_size = section_cache_size
+        self._sections = {name: OrderedDict() for name in self.SECTIONS}
+        self._sections_lock = threading.Lock()
+        self.section_hits = 0
+        self.section_misses = 0
     
-    def _check_keywords(self, text: str, keyword_set: Set[str]) -> float:
+    def _check_keywords(self, text: str, matcher: KeywordMatcher) -> float:
         """Check the proportion of keywords from a set that appear in the text"""
         if not text:
             return 0.0
         
         text = text.lower()
-        found = 0
-        for keyword in keyword_set:
-            if keyword in text:
-                found += 1
+        found = matcher.count(text)
         
         # If text is short but contains keywords, it should get a higher score
         text_length_factor = min(1.0, len(text) / 200.0)
@@ -51,7 +131,7 @@ class RequirementAnalyzer:
             text_length_factor = 0.3
             
         # Calculate score, maximum of 1.0
-        score = min(1.0, (found / min(10, len(keyword_set))) * text_length_factor)
+        score = min(1.0, (found / min(10, matcher.size)) * text_length_factor)
         return score
     
     def _analyze_title(self, title: str) -> Dict[str, float]:
@@ -98,7 +178,7 @@ class RequirementAnalyzer:
             results['length'] = 0.8  # Too long might be redundant
             
         # Business metrics term score
-        results['metrics'] = self._check_keywords(business_goal, BUSINESS_METRICS)
+        results['metrics'] = self._check_keywords(business_goal, BUSINESS_METRICS_MATCHER)
         
         # Paragraph structure score
         paragraphs = business_goal.count('\n') + 1
@@ -146,8 +226,7 @@ class RequirementAnalyzer:
             return results
             
         # Check if it's one of the predefined options
-        valid_outputs = {"Actionable Insights", "Data Visualization", "Statistical Analysis", "Predictive Model"}
-        if expected_output in valid_outputs:
+        if expected_output in STANDARD_OUTPUTS:
             results['validity'] = 1.0
             
             # Adjust expectations based on priority
@@ -163,41 +242,41 @@ class RequirementAnalyzer:
             results['custom'] = 0.7  # Encourage customization
             
             # Check if it contains analysis method terms
-            results['analysis_terms'] = self._check_keywords(expected_output, ANALYSIS_METHODS)
+            results['analysis_terms'] = self._check_keywords(expected_output, ANALYSIS_METHODS_MATCHER)
             
         return results
     
     def _generate_title_feedback(self, title_scores: Dict[str, float]) -> List[str]:
-        """Generate title feedback"""
+        """Generate title feedback as message codes"""
         feedback = []
         
         if title_scores.get('length', 1.0) < 0.5:
-            feedback.append("Title is too short. Consider providing a more descriptive title to help researchers better understand the requirement content.")
+            feedback.append(feedback_code("T1"))
         elif title_scores.get('length', 0.0) > 0.9:
-            feedback.append("Title is quite long. Consider making it more concise to highlight the key points.")
+            feedback.append(feedback_code("T2"))
             
         if title_scores.get('descriptive', 1.0) < 0.6:
-            feedback.append("Title is not specific enough. Try using more descriptive words to clearly express the core objective of the requirement.")
+            feedback.append(feedback_code("T3"))
             
         return feedback
     
     def _generate_business_goal_feedback(self, goal_scores: Dict[str, float]) -> List[str]:
-        """Generate business goal feedback"""
+        """Generate business goal feedback as message codes"""
         feedback = []
         
         if goal_scores.get('length', 1.0) < 0.5:
-            feedback.append("Business goal description is too brief. Consider elaborating on the business context, specific objectives, and expected business value.")
+            feedback.append(feedback_code("G1"))
         
         if goal_scores.get('metrics', 1.0) < 0.5:
-            feedback.append("Business goal lacks specific business metrics. Consider clearly defining the key performance indicators (KPIs) that need to be improved or tracked.")
+            feedback.append(feedback_code("G2"))
             
         if goal_scores.get('structure', 1.0) < 0.6:
-            feedback.append("Structure of the business goal could be improved. Consider breaking it down into sections describing business context, specific problems, and solution expectations.")
+            feedback.append(feedback_code("G3"))
             
         return feedback
     
     def _generate_data_scope_feedback(self, scope_scores: Dict[str, float]) -> List[str]:
-        """Generate data scope feedback"""
+        """Generate data scope feedback as message codes"""
         feedback = []
         
         # Since supporting files is optional and doesn't affect clarity score,
@@ -205,34 +284,64 @@ class RequirementAnalyzer:
         if scope_scores.get('file_noted', False):
             file_count = scope_scores.get('file_count', 0)
             if file_count > 0:
-                feedback.append(f"You've uploaded {file_count} supporting file(s). This will help researchers better understand your requirements.")
+                feedback.append(feedback_code("D1", file_count))
             else:
-                feedback.append("You've indicated file uploads, but no files were detected. This is optional and won't affect your clarity score.")
+                feedback.append(feedback_code("D2"))
         else:
-            feedback.append("No supporting files were uploaded. This is optional and won't affect your clarity score.")
+            feedback.append(feedback_code("D3"))
                 
         return feedback
     
     def _generate_expected_output_feedback(self, output_scores: Dict[str, float]) -> List[str]:
-        """Generate expected output feedback"""
+        """Generate expected output feedback as message codes"""
         feedback = []
         
         # If validity is 0.5 and there's no other scores, it means expected_output was empty
         if output_scores.get('validity', 0.0) == 0.5 and len(output_scores) <= 2:
-            feedback.append("No expected output has been specified. While this is optional for requirement verification, specifying an expected output could provide researchers with clearer guidance.")
+            feedback.append(feedback_code("E1"))
             return feedback
             
         if output_scores.get('validity', 0.0) < 1.0 and output_scores.get('validity', 0.0) > 0:
-            feedback.append("The selected expected output is not among standard options. Consider selecting one of the standard options for better clarity.")
+            feedback.append(feedback_code("E2"))
             
         if output_scores.get('priority_alignment', 1.0) < 0.6:
-            feedback.append("Note: The selected expected output and priority combination is uncommon. You may want to reconsider either, but this won't affect your requirement's clarity score.")
+            feedback.append(feedback_code("E3"))
             
         return feedback
     
-    def _add_randomness(self, score: float) -> float:
+    def _analyze_section(self, name: str, *args) -> Tuple[Dict[str, float], List[str]]:
+        """Return the scores and feedback of one section, reusing them when its inputs are unchanged"""
+        memo = self._sections[name]
+        with self._sections_lock:
+            entry = memo.get(args)
+            if entry is not None:
+                memo.move_to_end(args)
+                self.section_hits += 1
+                return entry
+        
+        scores = getattr(self, f"_analyze_{name}")(*args)
+        entry = (scores, getattr(self, f"_generate_{name}_feedback")(scores))
+        
+        with self._sections_lock:
+            self.section_misses += 1
+            if self.section_cache_size > 0:
+                memo[args] = entry
+                while len(memo) > self.section_cache_size:
+                    memo.popitem(last=False)
+        return entry
+    
+    def section_stats(self) -> Dict[str, int]:
+        return {"hits": self.section_hits, "misses": self.section_misses}
+    
+    def _random_source(self, *fields: Optional[str]):
+        """Return the random number source for one analysis"""
+        if self.deterministic:
+            return random.Random(requirement_key(*fields))
+        return random
+    
+    def _add_randomness(self, score: float, rng=random) -> float:
         """Add random variation to make results more natural"""
-        variation = (random.random() - 0.5) * self.randomness
+        variation = (rng.random() - 0.5) * self.randomness
         return max(0.0, min(1.0, score + variation))
     
     def analyze(
@@ -244,85 +353,767 @@ class RequirementAnalyzer:
         priority: str = "Medium"
     ) -> Tuple[float, float, float, str]:
         """Analyze requirements and generate scores and feedback"""
+        clarity_score, feasibility_score, completeness_score, feedback = self.analyze_coded(
+            title, business_goal, data_scope, expected_output, priority
+        )
+        return clarity_score, feasibility_score, completeness_score, render_feedback(feedback)
+    
+    def analyze_coded(
+        self,
+        title: str,
+        business_goal: str,
+        data_scope: str,
+        expected_output: str,
+        priority: str = "Medium"
+    ) -> Tuple[float, float, float, str]:
+        """Analyze requirements and generate scores and compact coded feedback for storage"""
         
         # Analyze each part of the content
-        title_scores = self._analyze_title(title)
-        goal_scores = self._analyze_business_goal(business_goal)
-        scope_scores = self._analyze_data_scope(data_scope)
-        output_scores = self._analyze_expected_output(expected_output, priority)
+        title_scores, title_feedback = self._analyze_section("title", title)
+        goal_scores, goal_feedback = self._analyze_section("business_goal", business_goal)
+        scope_scores, scope_feedback = self._analyze_section("data_scope", data_scope)
+        output_scores, output_feedback = self._analyze_section("expected_output", expected_output, priority)
+        rng = self._random_source(title, business_goal, data_scope, expected_output, priority)
         
         # Calculate overall scores
         clarity_score = self._add_randomness(
             (sum(title_scores.values()) / len(title_scores) * 0.4) +
-            (sum(goal_scores.values()) / len(goal_scores) * 0.6)
+            (sum(goal_scores.values()) / len(goal_scores) * 0.6),
             # Removed data_scope (now Supporting Files) from clarity calculation
+            rng
         )
         
         feasibility_score = self._add_randomness(
             (sum(scope_scores.values()) / len(scope_scores) * 0.4) +
             (sum(output_scores.values()) / len(output_scores) * 0.5) +
-            (0.8 if expected_output else 0.5) * 0.1  # Still consider expected_output for feasibility
+            (0.8 if expected_output else 0.5) * 0.1,  # Still consider expected_output for feasibility
+            rng
         )
         
         completeness_score = self._add_randomness(
             (0.8 if title else 0.0) * 0.15 +
             (min(1.0, len(business_goal) / 200) * 0.5) +
-            (0.9 if "Files" in data_scope else min(1.0, len(data_scope) / 150) * 0.35)
+            (0.9 if "Files" in data_scope else min(1.0, len(data_scope) / 150) * 0.35),
             # Removed expected_output from completeness calculation
+            rng
         )
         
-        # Generate feedback
-        feedback_parts = []
+        feedback = encode_feedback(self._feedback_codes(
+            title_feedback, goal_feedback, scope_feedback, output_feedback,
+            clarity_score, feasibility_score, completeness_score
+        ))
         
+        # Return the three scores and feedback
+        return clarity_score, feasibility_score, completeness_score, feedback
+    
+    def _feedback_codes(
+        self,
+        title_feedback: List[str],
+        goal_feedback: List[str],
+        scope_feedback: List[str],
+        output_feedback: List[str],
+        clarity_score: float,
+        feasibility_score: float,
+        completeness_score: float
+    ) -> List[str]:
+        """Return the feedback message codes in display order"""
         # Clearly state the scoring criteria used
-        feedback_parts.append("Requirement analysis results are based primarily on title descriptiveness and business goal clarity. Supporting Files, Expected Output, and Deadline are optional fields and do not affect the Clarity Score.")
+        codes = [feedback_code("C")]
         
         # Generate overall assessment
         avg_score = (clarity_score + feasibility_score + completeness_score) / 3
         if avg_score >= 0.8:
-            feedback_parts.append("\n\n📊 Overall assessment: Your requirement definition is very comprehensive, and researchers can start working immediately.")
+            codes.append(feedback_code("O1"))
         elif avg_score >= 0.6:
-            feedback_parts.append("\n\n📊 Overall assessment: Your requirement is generally reasonable, but there are some areas that could be further optimized.")
+            codes.append(feedback_code("O2"))
         else:
-            feedback_parts.append("\n\n📊 Overall assessment: Your requirement definition needs significant improvement before researchers can understand and begin working on it.")
+            codes.append(feedback_code("O3"))
         
         # Specific feedback for each part
-        all_feedback = []
+        codes.extend(title_feedback)
+        codes.extend(goal_feedback)
+        codes.extend(scope_feedback)
+        codes.extend(output_feedback)
         
-        title_feedback = self._generate_title_feedback(title_scores)
-        if title_feedback:
-            all_feedback.append("\n\n📝 Title feedback:\n• " + "\n• ".join(title_feedback))
+        # Provide some encouragement at the end
+        if avg_score >= 0.7:
+            codes.append(feedback_code("Z1"))
+        else:
+            codes.append(feedback_code("Z2"))
+        
+        return codes
+    
+    def analyze_many(
+        self,
+        requirements: Sequence[Mapping[str, Optional[str]]],
+        with_feedback: Union[bool, Sequence[bool]] = False
+    ) -> List[Tuple[float, float, float, Optional[str]]]:
+        """Score a batch of requirements with array operations
+        
+        Each requirement is a mapping with the same fields as analyze(). Scores
+        match analyze() row for row. Feedback is returned in the compact coded
+        form of analyze_coded(), and only for rows whose with_feedback flag is
+        set; other rows get None.
+        """
+        n = len(requirements)
+        if n == 0:
+            return []
+        # Imported here so that starting the app doesn't pay for NumPy until a batch runs
+        import numpy as np
+        if isinstance(with_feedback, bool):
+            with_feedback = [with_feedback] * n
+        
+        # Extract the per-row text features in one pass
+        title_len = np.empty(n)
+        title_words = np.empty(n)
+        goal_len = np.empty(n)
+        goal_lower_len = np.empty(n)
+        goal_paragraphs = np.empty(n)
+        goal_keywords = np.empty(n)
+        scope_len = np.empty(n)
+        scope_has_files_word = np.empty(n, dtype=bool)
+        file_noted = np.zeros(n, dtype=bool)
+        file_count = np.zeros(n)
+        output_kind = np.empty(n, dtype=np.int8)  # 0 empty, 1 standard, 2 custom
+        output_alignment = np.full(n, 0.7)
+        output_keywords = np.zeros(n)
+        output_lower_len = np.zeros(n)
+        
+        for i, req in enumerate(requirements):
+            title = req.get('title') or ""
+            business_goal = req.get('business_goal') or ""
+            data_scope = req.get('data_scope') or ""
+            expected_output = req.get('expected_output') or ""
+            priority = req.get('priority') or "Medium"
+            
+            title_len[i] = len(title)
+            title_words[i] = len(title.split())
             
-        goal_feedback = self._generate_business_goal_feedback(goal_scores)
-        if goal_feedback:
-            all_feedback.append("\n\n🎯 Business goal feedback:\n• " + "\n• ".join(goal_feedback))
+            goal_lower = business_goal.lower()
+            goal_len[i] = len(business_goal)
+            goal_lower_len[i] = len(goal_lower)
+            goal_paragraphs[i] = business_goal.count('\n') + 1
+            goal_keywords[i] = BUSINESS_METRICS_MATCHER.count(goal_lower)
             
-        scope_feedback = self._generate_data_scope_feedback(scope_scores)
-        if scope_feedback:
-            all_feedback.append("\n\n📁 Data scope feedback:\n• " + "\n• ".join(scope_feedback))
+            scope_len[i] = len(data_scope)
+            scope_has_files_word[i] = "Files" in data_scope
+            if "Files uploaded:" in data_scope or "Files:" in data_scope:
+                file_count_match = re.search(r'(\d+)\s+file', data_scope)
+                if file_count_match:
+                    file_noted[i] = True
+                    file_count[i] = int(file_count_match.group(1))
             
-        output_feedback = self._generate_expected_output_feedback(output_scores)
-        if output_feedback:
-            all_feedback.append("\n\n📈 Expected output feedback:\n• " + "\n• ".join(output_feedback))
+            if not expected_output:
+                output_kind[i] = 0
+            elif expected_output in STANDARD_OUTPUTS:
+                output_kind[i] = 1
+                if expected_output == "Predictive Model" and priority == "Low":
+                    output_alignment[i] = 0.4
+                elif expected_output == "Actionable Insights" and priority == "High":
+                    output_alignment[i] = 0.9
+            else:
+                output_kind[i] = 2
+                output_lower = expected_output.lower()
+                output_lower_len[i] = len(output_lower)
+                output_keywords[i] = ANALYSIS_METHODS_MATCHER.count(output_lower)
         
-        # Add all detailed feedback
-        if all_feedback:
-            feedback_parts.extend(all_feedback)
+        # Title section
+        title_length_score = np.select(
+            [title_len < 5, title_len < 10, title_len < 50], [0.2, 0.5, 0.9], 0.7
+        )
+        title_descriptive_score = np.select(
+            [title_words < 2, title_words < 4, title_words < 8], [0.3, 0.6, 0.9], 0.7
+        )
+        title_mean = (title_length_score + title_descriptive_score) / 2
         
-        # Provide some encouragement at the end
-        if avg_score >= 0.7:
-            feedback_parts.append("\n\n✅ Your requirement definition is already good. Only minor adjustments are needed to further improve clarity.")
+        # Business goal section
+        goal_length_score = np.select(
+            [goal_len < 30, goal_len < 100, goal_len < 500], [0.2, 0.5, 0.9], 0.8
+        )
+        goal_metrics_score = self._keyword_scores(goal_keywords, goal_lower_len, BUSINESS_METRICS_MATCHER)
+        goal_structure_score = np.select(
+            [(goal_paragraphs == 1) & (goal_len > 200), goal_paragraphs > 1], [0.4, 0.8], 0.6
+        )
+        goal_mean = (goal_length_score + goal_metrics_score + goal_structure_score) / 3
+        
+        # Data scope section: three fixed 0.8 scores, plus the file flag and count when noted
+        scope_base = 0.8 + 0.8 + 0.8
+        scope_mean = np.where(file_noted, (scope_base + 1.0 + file_count) / 5, scope_base / 3)
+        
+        # Expected output section
+        output_terms_score = self._keyword_scores(output_keywords, output_lower_len, ANALYSIS_METHODS_MATCHER)
+        output_mean = np.select(
+            [output_kind == 0, output_kind == 1],
+            [(0.7 + 0.7 + 1.0) / 3, (1.0 + output_alignment) / 2],
+            (0.5 + 0.7 + output_terms_score) / 3
+        )
+        
+        clarity = title_mean * 0.4 + goal_mean * 0.6
+        feasibility = (
+            scope_mean * 0.4 +
+            output_mean * 0.5 +
+            np.where(output_kind == 0, 0.5, 0.8) * 0.1
+        )
+        completeness = (
+            np.where(title_len > 0, 0.8, 0.0) * 0.15 +
+            np.minimum(1.0, goal_len / 200) * 0.5 +
+            np.where(scope_has_files_word, 0.9, np.minimum(1.0, scope_len / 150) * 0.35)
+        )
+        
+        # Same jitter as _add_randomness, drawn for the whole batch at once
+        if self.deterministic:
+            draws = np.empty((3, n))
+            for i, req in enumerate(requirements):
+                rng = self._random_source(
+                    req.get('title') or "", req.get('business_goal') or "", req.get('data_scope') or "",
+                    req.get('expected_output') or "", req.get('priority') or "Medium"
+                )
+                draws[:, i] = (rng.random(), rng.random(), rng.random())
         else:
-            feedback_parts.append("\n\n⚠️ Adjusting your requirement based on the above feedback can significantly improve researchers' understanding and implementation efficiency.")
+            draws = np.random.random((3, n))
+        jitter = (draws - 0.5) * self.randomness
+        clarity = np.clip(clarity + jitter[0], 0.0, 1.0)
+        feasibility = np.clip(feasibility + jitter[1], 0.0, 1.0)
+        completeness = np.clip(completeness + jitter[2], 0.0, 1.0)
         
-        # Combine all feedback
-        feedback = "".join(feedback_parts)
+        results = []
+        for i, req in enumerate(requirements):
+            scores = (float(clarity[i]), float(feasibility[i]), float(completeness[i]))
+            feedback = None
+            if with_feedback[i]:
+                feedback = encode_feedback(self._feedback_codes(
+                    self._analyze_section("title", req.get('title') or "")[1],
+                    self._analyze_section("business_goal", req.get('business_goal') or "")[1],
+                    self._analyze_section("data_scope", req.get('data_scope') or "")[1],
+                    self._analyze_section(
+                        "expected_output", req.get('expected_output') or "", req.get('priority') or "Medium"
+                    )[1],
+                    *scores
+                ))
+            results.append(scores + (feedback,))
         
-        # Return the three scores and feedback
-        return clarity_score, feasibility_score, completeness_score, feedback
+        return results
+    
+    def _keyword_scores(self, found: "np.ndarray", text_length: "np.ndarray", matcher: KeywordMatcher) -> "np.ndarray":
+        """Array form of _check_keywords, from keyword counts and lowercased text lengths"""
+        import numpy as np
+        text_length_factor = np.minimum(1.0, text_length / 200.0)
+        text_length_factor = np.where((text_length_factor < 0.3) & (found > 0), 0.3, text_length_factor)
+        scores = np.minimum(1.0, (found / min(10, matcher.size)) * text_length_factor)
+        return np.where(text_length > 0, scores, 0.0)
+
+class AnalysisCache:
+    """LRU cache of analysis results with a time-to-live, keyed on requirement_key()"""
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str):
+        """Return the cached result for key, or None if absent or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+    
+    def put(self, key: str, result) -> None:
+        """Store a result, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class AnalyzerBusyError(Exception):
+    """Raised when the analysis work queue is full"""
+
+def _run_analysis(method: str, *args):
+    """Run one analyzer method with this process's global analyzer"""
+    return getattr(analyzer, method)(*args)
+
+def _warm_worker() -> None:
+    """Load the analyzer in a worker before real work arrives"""
+    _run_analysis("analyze", "Warm up", "Warm up the analyzer", "", "", "Medium")
+
+class AnalysisExecutor:
+    """Runs analyses on a thread pool, a process pool or inline, with a bounded queue"""
+    
+    BACKENDS = ("thread", "process", "inline")
+    
+    def __init__(self, backend: str = "thread", workers: Optional[int] = None, queue_size: int = 64):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown analysis backend: {backend}")
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self._pool = None
+        self._start_lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+    
+    def start(self) -> None:
+        """Create the worker pool; process workers are started and warmed up front
+        
+        Safe to call from several threads; the first analysis also starts the pool.
+        """
+        if self._pool is not None or self.backend == "inline":
+            return
+        with self._start_lock:
+            if self._pool is not None:
+                return
+            if self.backend == "thread":
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="analyzer")
+            else:
+                pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+                # Workers warm up in the initializer; a trivial task waits until they run
+                pool.submit(os.getpid).result()
+                self._pool = pool
+    
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    async def run(self, *args, method: str = "analyze"):
+        """Analyze one requirement, raising AnalyzerBusyError when the queue is full
+        
+        method names the RequirementAnalyzer method to run: analyze, analyze_coded,
+        or analyze_many for a batch.
+        """
+        # Work beyond the busy workers plus the queue is shed instead of waiting
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise AnalyzerBusyError("Analysis queue is full, please retry shortly")
+        
+        self.pending += 1
+        try:
+            if self.backend == "inline":
+                result = _run_analysis(method, *args)
+            else:
+                if self._pool is None:
+                    # Off the event loop, as a process pool may still be warming up
+                    await asyncio.to_thread(self.start)
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._pool, _run_analysis, method, *args)
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+    
+    def stats(self) -> Dict[str, float]:
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+LLM_SYSTEM_PROMPT = (
+    "You review data analysis requirements written by product managers for researchers. "
+    "For every requirement in the user message, score clarity, feasibility and completeness "
+    "between 0 and 1, and write concise feedback with concrete suggestions. Title descriptiveness "
+    "and business goal clarity drive the clarity score; supporting files, expected output and "
+    "deadline are optional. Reply with JSON only, in the form "
+    '{"results": [{"id": 0, "clarity_score": 0.0, "feasibility_score": 0.0, '
+    '"completeness_score": 0.0, "feedback": "..."}]}, one result per requirement id.'
+)
+
+# Prompt for streamed verification: feedback first, as text that can be shown while it
+# arrives, then the scores on a marked last line
+LLM_STREAM_SYSTEM_PROMPT = (
+    "You review a data analysis requirement written by a product manager for researchers. "
+    "The user message holds it as JSON. Write concise feedback with concrete suggestions as "
+    "plain text. Title descriptiveness and business goal clarity drive the clarity score; "
+    "supporting files, expected output and deadline are optional. Then, on a final line, write "
+    'SCORES: followed by JSON in the form {"clarity_score": 0.0, "feasibility_score": 0.0, '
+    '"completeness_score": 0.0}, each score between 0 and 1.'
+)
+
+class ScoredFeedbackParser:
+    """Splits a streamed reply into feedback text, released as it arrives, and the scores line"""
+    
+    MARKER = "SCORES:"
+    
+    def __init__(self):
+        self._buffer = ""
+        self._in_scores = False
+    
+    def feed(self, delta: str) -> str:
+        """Add a piece of the reply and return the feedback text that is now safe to show"""
+        self._buffer += delta
+        if self._in_scores:
+            return ""
+        index = self._buffer.find(self.MARKER)
+        if index >= 0:
+            text, self._buffer = self._buffer[:index], self._buffer[index + len(self.MARKER):]
+            self._in_scores = True
+            return text
+        # The tail may be the start of the marker, so it is held back until the next piece
+        safe = len(self._buffer) - (len(self.MARKER) - 1)
+        if safe <= 0:
+            return ""
+        text, self._buffer = self._buffer[:safe], self._buffer[safe:]
+        return text
+    
+    def scores(self) -> Tuple[float, float, float]:
+        """The scores from the marked line, once the reply is complete"""
+        if not self._in_scores:
+            raise ValueError("Model reply has no scores line")
+        content = self._buffer
+        data = json.loads(content[content.index("{"):content.rindex("}") + 1])
+        return tuple(
+            max(0.0, min(1.0, float(data[name])))
+            for name in ("clarity_score", "feasibility_score", "completeness_score")
+        )
+
+class LLMRequirementAnalyzer:
+    """Analyzes requirements with an OpenAI-compatible chat model
+    
+    Identical in-flight requests share one call, requests arriving within the batch
+    window are sent together in one prompt, and calls are limited by a semaphore on
+    top of the client's shared connection pool. Each analysis has a latency budget,
+    after which (or on any model error) the fallback analysis is returned instead.
+    """
+    
+    def __init__(
+        self,
+        client,
+        model: str,
+        fallback,
+        max_concurrency: int = 4,
+        batch_window: float = 0.02,
+        max_batch_size: int = 8,
+        latency_budget: float = 8.0
+    ):
+        self.client = client
+        self.model = model
+        self.fallback = fallback
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.latency_budget = latency_budget
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight = {}
+        self._pending = []
+        self._flush_handle = None
+        self._tasks = set()
+        self.calls = 0
+        self.batches = 0
+        self.streams = 0
+        self.coalesced = 0
+        self.fallbacks = 0
+    
+    async def analyze(
+        self,
+        title: str,
+        business_goal: str,
+        data_scope: str,
+        expected_output: str,
+        priority: str = "Medium"
+    ) -> Tuple[float, float, float, str]:
+        """Analyze one requirement, falling back when the model is slow or fails"""
+        result, _ = await self.analyze_with_source(title, business_goal, data_scope, expected_output, priority)
+        return result
+    
+    async def analyze_with_source(
+        self,
+        title: str,
+        business_goal: str,
+        data_scope: str,
+        expected_output: str,
+        priority: str = "Medium"
+    ) -> Tuple[Tuple[float, float, float, str], bool]:
+        """Like analyze(), also returning whether the result came from the model rather than the fallback"""
+        key = requirement_key(title, business_goal, data_scope, expected_output, priority)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            self._enqueue(key, {
+                "title": title,
+                "business_goal": business_goal,
+                "data_scope": data_scope,
+                "expected_output": expected_output or "",
+                "priority": priority
+            }, future)
+        else:
+            self.coalesced += 1
+        
+        try:
+            # Shielded so that one caller running out of budget doesn't cancel the shared call
+            return await asyncio.wait_for(asyncio.shield(future), self.latency_budget), True
+        except Exception:
+            self.fallbacks += 1
+            return await self.fallback(title, business_goal, data_scope, expected_output, priority), False
+    
+    def _enqueue(self, key: str, payload: Dict[str, str], future: asyncio.Future) -> None:
+        self._pending.append((key, payload, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+    
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, batch) -> None:
+        try:
+            async with self._semaphore:
+                results = await self._complete([payload for _, payload, _ in batch])
+            for (_, _, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if result is None:
+                    future.set_exception(ValueError("Model returned no result for this requirement"))
+                else:
+                    future.set_result(result)
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            for key, _, future in batch:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+                # Waiters that already fell back never retrieve the error
+                if future.done() and not future.cancelled():
+                    future.exception()
+    
+    async def _complete(self, payloads: List[Dict[str, str]]) -> List[Optional[Tuple[float, float, float, str]]]:
+        """Send one batch prompt and parse one result per requirement"""
+        self.calls += 1
+        if len(payloads) > 1:
+            self.batches += 1
+        requirements = [{"id": i, **payload} for i, payload in enumerate(payloads)]
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": LLM_SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps({"requirements": requirements})}
+            ],
+            temperature=0
+        )
+        content = response.choices[0].message.content or ""
+        data = json.loads(content[content.index("{"):content.rindex("}") + 1])
+        
+        by_id = {}
+        for item in data.get("results", []):
+            try:
+                by_id[int(item["id"])] = (
+                    max(0.0, min(1.0, float(item["clarity_score"]))),
+                    max(0.0, min(1.0, float(item["feasibility_score"]))),
+                    max(0.0, min(1.0, float(item["completeness_score"]))),
+                    str(item["feedback"])
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        return [by_id.get(i) for i in range(len(payloads))]
+    
+    async def stream(
+        self,
+        title: str,
+        business_goal: str,
+        data_scope: str,
+        expected_output: str,
+        priority: str = "Medium"
+    ):
+        """Yield ("feedback", text) pieces as the model writes them, then ("scores", scores)
+        
+        Streams aren't batched or coalesced. Raises on model errors, and when the model
+        takes longer than the latency budget to start or between pieces.
+        """
+        self.calls += 1
+        self.streams += 1
+        requirement = {
+            "title": title,
+            "business_goal": business_goal,
+            "data_scope": data_scope,
+            "expected_output": expected_output or "",
+            "priority": priority
+        }
+        async with self._semaphore:
+            response = await asyncio.wait_for(self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": LLM_STREAM_SYSTEM_PROMPT},
+                    {"role": "user", "content": json.dumps({"requirements": [{"id": 0, **requirement}]})}
+                ],
+                temperature=0,
+                stream=True
+            ), self.latency_budget)
+            parser = ScoredFeedbackParser()
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), self.latency_budget)
+                except StopAsyncIteration:
+                    break
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    text = parser.feed(delta)
+                    if text:
+                        yield "feedback", text
+            yield "scores", parser.scores()
+    
+    async def close(self) -> None:
+        await self.client.close()
+    
+    def stats(self) -> Dict[str, float]:
+        return {
+            "model": self.model,
+            "calls": self.calls,
+            "batches": self.batches,
+            "streams": self.streams,
+            "coalesced": self.coalesced,
+            "fallbacks": self.fallbacks,
+            "inflight": len(self._inflight)
+        }
+
+def create_llm_client(max_connections: int, timeout: float):
+    """Create an Azure OpenAI client, or a plain OpenAI-compatible one when only a base URL is set"""
+    import httpx
+    from openai import AsyncAzureOpenAI, AsyncOpenAI
+    
+    # One pooled connection per allowed concurrent call, kept alive between calls
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=timeout
+    )
+    if os.getenv("AZURE_OPENAI_ENDPOINT"):
+        return AsyncAzureOpenAI(
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2023-05-15"),
+            http_client=http_client,
+            max_retries=0
+        )
+    return AsyncOpenAI(
+        base_url=os.getenv("OPENAI_BASE_URL"),
+        api_key=os.getenv("OPENAI_API_KEY", "local-stub"),
+        http_client=http_client,
+        max_retries=0
+    )
+
+# Analysis settings, overridable through environment variables
+ANALYSIS_DETERMINISTIC = os.getenv("ANALYSIS_DETERMINISTIC", "1") == "1"
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "1024"))
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "600"))
+ANALYSIS_BACKEND = os.getenv("ANALYSIS_BACKEND", "thread")
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "0")) or None
+ANALYSIS_QUEUE_SIZE = int(os.getenv("ANALYSIS_QUEUE_SIZE", "64"))
+ANALYSIS_ENGINE = os.getenv("ANALYSIS_ENGINE", "heuristic")  # "heuristic" or "llm"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "20"))
+LLM_MAX_BATCH_SIZE = int(os.getenv("LLM_MAX_BATCH_SIZE", "8"))
+LLM_LATENCY_BUDGET = float(os.getenv("LLM_LATENCY_BUDGET", "8"))
 
 # Create a global analyzer instance
-analyzer = RequirementAnalyzer()
+analyzer = RequirementAnalyzer(deterministic=ANALYSIS_DETERMINISTIC)
+
+# Results can only be reused when the same content always gets the same scores
+analysis_cache = AnalysisCache(
+    maxsize=ANALYSIS_CACHE_SIZE if ANALYSIS_DETERMINISTIC else 0,
+    ttl=ANALYSIS_CACHE_TTL
+)
+
+# Inputs of recent analyses, keyed by the analysis token handed to clients
+analysis_inputs = AnalysisCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL)
+
+# Executor that runs the CPU-bound analysis off the event loop
+analysis_executor = AnalysisExecutor(
+    backend=ANALYSIS_BACKEND,
+    workers=ANALYSIS_WORKERS,
+    queue_size=ANALYSIS_QUEUE_SIZE
+)
+
+# Optional model-backed analyzer; the heuristic analyzer is its fallback
+llm_analyzer = None
+if ANALYSIS_ENGINE == "llm":
+    llm_analyzer = LLMRequirementAnalyzer(
+        create_llm_client(LLM_MAX_CONCURRENCY, LLM_LATENCY_BUDGET),
+        model=os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini"),
+        fallback=functools.partial(analysis_executor.run, method="analyze_coded"),
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        batch_window=LLM_BATCH_WINDOW_MS / 1000,
+        max_batch_size=LLM_MAX_BATCH_SIZE,
+        latency_budget=LLM_LATENCY_BUDGET
+    )
+
+async def analyze_requirement_coded(
+    title: str,
+    business_goal: str,
+    data_scope: str,
+    expected_output: str,
+    priority: str = "Medium"
+) -> Tuple[float, float, float, str]:
+    """
+    Analyze requirements and generate scores and feedback in its stored form
+    
+    Returns:
+        Tuple containing clarity_score, feasibility_score, completeness_score, and feedback
+        as coded by feedback_messages (model feedback is kept as free text).
+    """
+    # Verify and create send the same content, so the second call is a cache hit
+    expected_output = expected_output or ""
+    key = requirement_key(title, business_goal, data_scope, expected_output, priority)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    if llm_analyzer is not None:
+        result, from_model = await llm_analyzer.analyze_with_source(
+            title, business_goal, data_scope, expected_output, priority
+        )
+        # A fallback answer (after a timeout or model error) isn't cached, so the next
+        # request tries the model again instead of getting the heuristic for the whole TTL
+        if not from_model:
+            return result
+    else:
+        # Run the synchronous analyzer on the configured executor backend
+        # This prevents blocking the event loop and avoids the greenlet error
+        result = await analysis_executor.run(
+            title, business_goal, data_scope, expected_output, priority, method="analyze_coded"
+        )
+    analysis_cache.put(key, result)
+    return result
 
 async def analyze_requirement(
     title: str,
@@ -337,6 +1128,234 @@ async def analyze_requirement(
     Returns:
         Tuple containing clarity_score, feasibility_score, completeness_score, and feedback.
     """
-    # Use asyncio.to_thread to run the synchronous analyzer.analyze in a separate thread
-    # This prevents blocking the event loop and avoids the greenlet error
-    return await asyncio.to_thread(analyzer.analyze, title, business_goal, data_scope, expected_output, priority) 
\ No newline at end of file
+    clarity_score, feasibility_score, completeness_score, feedback = await analyze_requirement_coded(
+        title, business_goal, data_scope, expected_output, priority
+    )
+    return clarity_score, feasibility_score, completeness_score, render_feedback(feedback)
+
+async def stream_requirement_analysis(
+    title: str,
+    business_goal: str,
+    data_scope: str,
+    expected_output: str,
+    priority: str = "Medium"
+):
+    """
+    Analyze requirements as a sequence of (event, data) pairs
+    
+    Yields the scores as soon as the heuristic analysis has them, then the feedback in
+    display order. With the model backend, those first scores are marked provisional and
+    the model's feedback follows piece by piece as it is generated, then its final
+    scores. If the model fails part-way, a "restart" event tells the client to discard
+    the feedback shown so far, and the heuristic result follows instead.
+    """
+    expected_output = expected_output or ""
+    key = requirement_key(title, business_goal, data_scope, expected_output, priority)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        async for event in _result_events(cached):
+            yield event
+        return
+    
+    # The heuristic analysis takes milliseconds, so its scores go out first
+    heuristic = await analysis_executor.run(
+        title, business_goal, data_scope, expected_output, priority, method="analyze_coded"
+    )
+    if llm_analyzer is None:
+        analysis_cache.put(key, heuristic)
+        async for event in _result_events(heuristic):
+            yield event
+        return
+    
+    yield "scores", {**_score_fields(heuristic), "provisional": True}
+    pieces = []
+    scores = None
+    try:
+        async for kind, value in llm_analyzer.stream(title, business_goal, data_scope, expected_output, priority):
+            if kind == "feedback":
+                pieces.append(value)
+                yield "feedback", {"section": "feedback", "text": value}
+            else:
+                scores = value
+    except Exception:
+        llm_analyzer.fallbacks += 1
+        if pieces:
+            yield "restart", {}
+        async for event in _result_events(heuristic):
+            yield event
+        return
+    
+    result = (*scores, "".join(pieces).strip())
+    analysis_cache.put(key, result)
+    yield "scores", _score_fields(result)
+
+def _score_fields(result: Tuple[float, float, float, str]) -> Dict[str, float]:
+    return {
+        "clarity_score": result[0],
+        "feasibility_score": result[1],
+        "completeness_score": result[2]
+    }
+
+async def _result_events(result: Tuple[float, float, float, str]):
+    """The events of a finished analysis: its scores, then each feedback part"""
+    yield "scores", _score_fields(result)
+    for part, text in feedback_parts(result[3]):
+        yield "feedback", {"section": part, "text": text}
+
+def remember_analysis_inputs(
+    title: str,
+    business_goal: str,
+    data_scope: str,
+    expected_output: Optional[str],
+    priority: str = "Medium",
+    file_count: int = 0
+) -> str:
+    """Store the inputs of an analysis and return its token for incremental re-analysis"""
+    token = requirement_key(title, business_goal, with_file_count(data_scope, file_count), expected_output, priority)
+    analysis_inputs.put(token, {
+        "title": title,
+        "business_goal": business_goal,
+        "data_scope": data_scope,
+        "expected_output": expected_output or "",
+        "priority": priority,
+        "file_count": file_count
+    })
+    return token
+
+async def reanalyze_requirement(
+    token: str,
+    changes: Dict[str, str]
+) -> Optional[Tuple[str, Tuple[float, float, float, str]]]:
+    """
+    Re-analyze a previously analyzed requirement with some fields changed
+    
+    Only the sections whose input changed are recomputed; the others come from the
+    analyzer's section memo.
+    
+    Returns:
+        Tuple of the new token and the analysis result, or None if the token is unknown or expired.
+    """
+    inputs = analysis_inputs.get(token)
+    if inputs is None:
+        return None
+    
+    inputs = {**inputs, **changes}
+    new_token = remember_analysis_inputs(**inputs)
+    return new_token, await analyze_requirement(
+        inputs["title"],
+        inputs["business_goal"],
+        with_file_count(inputs["data_scope"], inputs["file_count"]),
+        inputs["expected_output"],
+        inputs["priority"]
+    )
+
+def benchmark_keywords(texts: int = 2000, repeat: int = 3) -> None:
+    """Time the keyword scan against a regex alternation, on short texts and ~10 KB goals"""
+    rng = random.Random(0)
+    words = sorted(BUSINESS_METRICS | ANALYSIS_METHODS) + (
+        "customers premium segment quarter region team product launch reduce improve "
+        "understand why which how the of for in and to by with our"
+    ).split() * 4
+    
+    def sample(length: int) -> str:
+        text = []
+        size = 0
+        while size < length:
+            text.append(rng.choice(words))
+            size += len(text[-1]) + 1
+        return " ".join(text).lower()
+    
+    for size_label, length in (("short", 300), ("10 KB", 10240)):
+        samples = [sample(length) for _ in range(texts)]
+        for name, matcher in (
+            ("business metrics", BUSINESS_METRICS_MATCHER),
+            ("analysis methods", ANALYSIS_METHODS_MATCHER)
+        ):
+            # Every keyword that starts at each position, as the substring tests find them
+            pattern = re.compile(
+                "(?=(" + "|".join(re.escape(k) for k in sorted(matcher.keywords, key=len, reverse=True)) + "))"
+            )
+            
+            def scan():
+                return [matcher.count(text) for text in samples]
+            
+            def regex():
+                return [len({match.group(1) for match in pattern.finditer(text)}) for text in samples]
+            
+            assert scan() == regex()
+            for label, count in (("scan", scan), ("regex", regex)):
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    count()
+                    timings.append(time.perf_counter() - started)
+                print(f"{size_label:<6} {name:<17} {label:<6} {min(timings) * 1e6 / texts:9.2f} us/text")
+
+async def _executor_load(executor: AnalysisExecutor, requests: int, clients: int) -> Dict[str, float]:
+    """Send requests from a number of concurrent clients, each waiting for its last answer"""
+    latencies = []
+    rejected = 0
+    numbers = iter(range(requests))
+    goal = "Reduce churn in the premium segment and understand which features drive retention " * 3
+    
+    async def client():
+        nonlocal rejected
+        for i in numbers:
+            started = time.perf_counter()
+            try:
+                # Distinct goals, so the analyzer's section memo doesn't answer for the workers
+                await executor.run(f"Requirement {i}", f"{goal} {i}", "usage.csv", "Actionable Insights", "High")
+            except AnalyzerBusyError:
+                rejected += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        "rejected": rejected
+    }
+
+def benchmark_executor(requests: int = 2000, max_workers: Optional[int] = None, queue_size: int = 16) -> None:
+    """Time each executor backend at every worker count up to the CPUs, under steady load
+    and then a burst larger than it accepts"""
+    max_workers = max_workers or os.cpu_count() or 1
+    for backend in AnalysisExecutor.BACKENDS:
+        # The inline backend runs on the event loop, so its worker count means nothing
+        for workers in range(1, (1 if backend == "inline" else max_workers) + 1):
+            executor = AnalysisExecutor(backend=backend, workers=workers, queue_size=queue_size)
+            executor.start()
+            try:
+                # Steady: one client per worker. Burst: every request at once, so whatever
+                # exceeds the workers plus the queue is shed
+                for load, clients in (("steady", workers), ("burst", requests)):
+                    result = asyncio.run(_executor_load(executor, requests, clients))
+                    print(
+                        f"{backend:<8} {workers:>2} workers {load:<7} {result['throughput']:8.0f} req/s  "
+                        f"p50 {result['p50']:7.2f} ms  p95 {result['p95']:7.2f} ms  "
+                        f"p99 {result['p99']:7.2f} ms  shed {result['rejected']}"
+                    )
+            finally:
+                executor.shutdown()
+
+def main(argv: List[str]) -> int:
+    if argv[:2] == ["benchmark", "keywords"]:
+        benchmark_keywords(int(argv[2]) if len(argv) > 2 else 2000)
+        return 0
+    if argv[:2] == ["benchmark", "executor"]:
+        benchmark_executor(
+            int(argv[2]) if len(argv) > 2 else 2000,
+            int(argv[3]) if len(argv) > 3 else None
+        )
+        return 0
+    print("Usage: python -m app.ai_service benchmark keywords [texts] | executor [requests] [max_workers]")
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,12 +1,34 @@
+"""
+Authentication: password hashing, access tokens and the current-user dependencies.
+
+See how the password hasher pool behaves as concurrent logins grow past its workers
+and queue, including the event loop's responsiveness meanwhile, with:
+
+    python -m app.auth benchmark [max_concurrency]
+
+and how the API's reads and writes respond during bursts of logins and registrations,
+against a running app (registrations add throwaway bench-*@example.com users), with:
+
+    python -m app.auth benchmark api [base_url] [burst]
+"""
+import asyncio
+import itertools
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Hashable, List, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 from sqlalchemy.future import select
-from .database import get_db
+from .database import get_read_db
 from .models.models import User
 
 # Security configurations
@@ -14,9 +36,160 @@ SECRET_KEY = "your-secret-key-here"  # In production, use a secure secret key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Principal cache settings, overridable through environment variables
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+# Password hashing settings, overridable through environment variables
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+class PasswordHasherBusyError(Exception):
+    """Raised when too many password hashes are already queued"""
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated thread pool so it never blocks the event loop
+    
+    bcrypt releases the GIL, so hashes run in parallel with request handling. At most
+    `workers` hashes run at once and at most `queue_size` more wait; beyond that, calls
+    fail fast with PasswordHasherBusyError (a 503) instead of queueing without bound.
+    """
+    
+    def __init__(self, workers: int = 2, queue_size: int = 32):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.hash_seconds = 0.0
+        self.max_hash_seconds = 0.0
+        self.wait_seconds = 0.0
+    
+    async def run(self, func, *args):
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise PasswordHasherBusyError("Too many logins in progress, please retry shortly")
+        
+        def timed():
+            started = time.perf_counter()
+            return func(*args), started, time.perf_counter()
+        
+        self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self.pending -= 1
+        
+        self.completed += 1
+        self.wait_seconds += started - submitted
+        self.hash_seconds += finished - started
+        self.max_hash_seconds = max(self.max_hash_seconds, finished - started)
+        return result
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+    
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+    
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def stats(self) -> Dict[str, float]:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_hash_ms": self.hash_seconds * 1000 / self.completed if self.completed else 0.0,
+            "max_hash_ms": self.max_hash_seconds * 1000,
+            "avg_wait_ms": self.wait_seconds * 1000 / self.completed if self.completed else 0.0
+        }
+
+# Create a global hasher instance
+password_hasher = PasswordHasher(workers=PASSWORD_HASH_WORKERS, queue_size=PASSWORD_HASH_QUEUE_SIZE)
+
+class AuthCache:
+    """LRU cache with a time-to-live for authentication lookups"""
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def get(self, key: Hashable):
+        """Return the cached value for key, or None if absent or expired"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, key: Hashable, value) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, key: Hashable) -> None:
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+    
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+# Users by id, and verified token claims by token
+principal_cache = AuthCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+token_cache = AuthCache(maxsize=AUTH_CACHE_SIZE * 4, ttl=AUTH_CACHE_TTL)
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop a cached user, e.g. after it was deactivated or its role changed"""
+    principal_cache.invalidate(user_id)
+
+@event.listens_for(User, "after_update")
+def collect_updated_user(mapper, connection, target):
+    # Any ORM update of a user (role, active flag, password) reloads it on the next request,
+    # once committed: dropped at flush, a request in between would cache the old row again.
+    # Other processes keep their cached copy until it expires after AUTH_CACHE_TTL.
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("updated_user_ids", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_users(session):
+    for user_id in session.info.pop("updated_user_ids", ()):
+        invalidate_principal(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def forget_rolled_back_users(session):
+    session.info.pop("updated_user_ids", None)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -33,29 +206,190 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+def decode_access_token(token: str) -> dict:
+    """Verify a token and return its claims, caching the result until the token expires"""
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.put(token, payload)
+    elif payload.get("exp", 0) < time.time():
+        token_cache.invalidate(token)
+        raise JWTError("Signature has expired.")
+    return payload
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_read_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
+        user_id: Optional[int] = payload.get("uid")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    
+    # Tokens carry the user id, so known users need no query at all
+    user = principal_cache.get(user_id) if user_id is not None else None
+    if user is not None:
+        return user
         
     async with db as session:
-        result = await session.execute(select(User).filter(User.email == email))
-        user = result.scalar_one_or_none()
+        if user_id is not None:
+            user = await session.get(User, user_id)
+        else:
+            # Tokens issued before the id claim was added
+            result = await session.execute(select(User).filter(User.email == email))
+            user = result.scalar_one_or_none()
         
     if user is None:
         raise credentials_exception
+    principal_cache.put(user.id, user)
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user 
\ No newline at end of file
+    return current_user 
+
+async def _login_burst(hasher: PasswordHasher, hashed: str, logins: int) -> Dict[str, float]:
+    """Verify a password for many logins at once while measuring event loop lag"""
+    latencies = []
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        # A blocked event loop shows up as ticks arriving late
+        nonlocal lag
+        while not done.is_set():
+            expected = time.perf_counter() + 0.005
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - expected)
+
+    async def login():
+        started = time.perf_counter()
+        try:
+            await hasher.verify("password123", hashed)
+        except PasswordHasherBusyError:
+            return
+        latencies.append(time.perf_counter() - started)
+
+    ticking = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticking
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000,
+        "lag": lag * 1000
+    }
+
+def benchmark(max_concurrency: int = 128) -> None:
+    """Time bursts of concurrent logins against the configured hasher pool size"""
+    hashed = get_password_hash("password123")
+    print(f"{PASSWORD_HASH_WORKERS} workers, queue of {PASSWORD_HASH_QUEUE_SIZE}")
+    concurrency = 1
+    while concurrency <= max_concurrency:
+        hasher = PasswordHasher(workers=PASSWORD_HASH_WORKERS, queue_size=PASSWORD_HASH_QUEUE_SIZE)
+        try:
+            result = asyncio.run(_login_burst(hasher, hashed, concurrency))
+        finally:
+            hasher.shutdown()
+        print(
+            f"{concurrency:>4} logins  {result['throughput']:6.1f} logins/s  "
+            f"p50 {result['p50']:7.1f} ms  p95 {result['p95']:7.1f} ms  "
+            f"shed {hasher.rejected:>3}  loop lag {result['lag']:5.1f} ms"
+        )
+        concurrency *= 2
+
+def _percentiles(latencies: List[float]) -> str:
+    latencies = sorted(latencies)
+    if not latencies:
+        return "no requests"
+    return (
+        f"p50 {latencies[len(latencies) // 2] * 1000:7.1f} ms  "
+        f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.1f} ms"
+    )
+
+async def _api_benchmark(base_url: str, burst: int) -> None:
+    """Probe a read and a write endpoint while bursts of logins and registrations run"""
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        response = await client.post("/api/token", data={"username": "pm@test.com", "password": "password123"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await client.post(
+            "/api/requirements/",
+            data={"title": "Auth benchmark probe", "priority": "Low", "business_goal": "Probe", "data_scope": "x"},
+            headers=headers
+        )
+        probe_url = f"/api/requirements/{response.json()['id']}"
+        run = time.time_ns()
+
+        async def probe(done: asyncio.Event) -> Dict[str, List[float]]:
+            # One read and one write at a time, for as long as the burst lasts
+            latencies = {"read": [], "write": []}
+            priorities = itertools.cycle(("Low", "Medium"))
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/api/requirements/", headers=headers)
+                latencies["read"].append(time.perf_counter() - started)
+                started = time.perf_counter()
+                await client.put(probe_url, json={"priority": next(priorities)}, headers=headers)
+                latencies["write"].append(time.perf_counter() - started)
+            return latencies
+
+        def login(i: int):
+            return client.post("/api/token", data={"username": "pm@test.com", "password": "password123"})
+
+        def register(i: int):
+            return client.post("/api/register", params={
+                "email": f"bench-{run}-{i}@example.com", "password": "password123", "role": "researcher"
+            })
+
+        try:
+            for name, request in (("idle", None), ("logins", login), ("registrations", register)):
+                done = asyncio.Event()
+                probing = asyncio.create_task(probe(done))
+                started = time.perf_counter()
+                if request is None:
+                    await asyncio.sleep(2)
+                    statuses = []
+                else:
+                    statuses = [response.status_code for response in await asyncio.gather(
+                        *(request(i) for i in range(burst))
+                    )]
+                elapsed = time.perf_counter() - started
+                done.set()
+                latencies = await probing
+                burst_summary = (
+                    f"{statuses.count(200):>4} ok {statuses.count(503):>4} shed in {elapsed:5.1f}s"
+                    if statuses else " " * 26
+                )
+                print(
+                    f"{name:<14} {burst_summary}  read {_percentiles(latencies['read'])}  "
+                    f"write {_percentiles(latencies['write'])}"
+                )
+        finally:
+            await client.delete(probe_url, headers=headers)
+
+def main(argv: List[str]) -> int:
+    if argv[:2] == ["benchmark", "api"]:
+        base_url = argv[2] if len(argv) > 2 else "http://127.0.0.1:8000"
+        asyncio.run(_api_benchmark(base_url, int(argv[3]) if len(argv) > 3 else 64))
+        return 0
+    if argv and argv[0] == "benchmark":
+        benchmark(int(argv[1]) if len(argv) > 1 else 128)
+        return 0
+    print("Usage: python -m app.auth benchmark [max_concurrency] | benchmark api [base_url] [burst]")
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
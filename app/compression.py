@@ -0,0 +1,197 @@
+"""
+Response compression negotiated from Accept-Encoding.
+
+gzip is always available; brotli and zstd are offered when the `brotli` and
+`zstandard` packages are installed. Only complete, single-message responses of a
+compressible type are compressed: small bodies aren't worth it, and streaming
+responses (Server-Sent Events, exports, file downloads) are passed through untouched so
+they keep flowing as they are produced. Bodies above COMPRESSION_THREAD_THRESHOLD are
+compressed in a worker thread so the event loop keeps serving other requests.
+"""
+import asyncio
+import gzip
+import os
+import threading
+from typing import Dict, Optional
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compression settings, overridable through environment variables
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+COMPRESSION_THREAD_THRESHOLD = int(os.getenv("COMPRESSION_THREAD_THRESHOLD", str(64 * 1024)))
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml"
+)
+
+def _gzip(body: bytes) -> bytes:
+    # A fixed mtime keeps the output, and so its length, the same for the same body
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+def _brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+
+def _zstd(body: bytes) -> bytes:
+    # Compressor objects aren't thread-safe, and a new one per body is cheap
+    return zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(body)
+
+# Available encodings in order of preference, for clients that accept several equally
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd
+if brotli is not None:
+    ENCODERS["br"] = _brotli
+ENCODERS["gzip"] = _gzip
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """The available encoding the client prefers, or None to send the body as it is"""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in ENCODERS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+class CompressionStats:
+    """Counters of the compressed responses and the bytes they saved"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.encodings: Dict[str, Dict[str, int]] = {}
+            self.offloaded = 0
+
+    def record(self, encoding: str, size: int, compressed_size: int, offloaded: bool) -> None:
+        with self._lock:
+            counters = self.encodings.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+            counters["responses"] += 1
+            counters["bytes_in"] += size
+            counters["bytes_out"] += compressed_size
+            if offloaded:
+                self.offloaded += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            bytes_in = sum(counters["bytes_in"] for counters in self.encodings.values())
+            bytes_out = sum(counters["bytes_out"] for counters in self.encodings.values())
+            return {
+                "available_encodings": list(ENCODERS),
+                "responses": sum(counters["responses"] for counters in self.encodings.values()),
+                "offloaded": self.offloaded,
+                "bytes_in": bytes_in,
+                "bytes_out": bytes_out,
+                "bytes_saved": bytes_in - bytes_out,
+                "saved_ratio": (bytes_in - bytes_out) / bytes_in if bytes_in else 0.0,
+                "encodings": {encoding: dict(counters) for encoding, counters in self.encodings.items()}
+            }
+
+compression_stats = CompressionStats()
+
+class CompressionMiddleware:
+    """ASGI middleware that compresses complete responses in the encoding the client prefers"""
+
+    def __init__(self, app, min_size: int = COMPRESSION_MIN_SIZE, thread_threshold: int = COMPRESSION_THREAD_THRESHOLD):
+        self.app = app
+        self.min_size = min_size
+        self.thread_threshold = thread_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        decided = False
+
+        async def send_compressed(message):
+            nonlocal start_message, decided
+            if decided:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held back until the body shows whether the response is worth compressing
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                # Extension messages, such as the test client's http.response.debug
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message.setdefault("headers", []))
+            if message.get("more_body", False):
+                # Streaming responses go out as they are produced
+                decided = True
+                await send(start_message)
+                await send(message)
+                return
+
+            decided = True
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                await send(start_message)
+                await send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if len(body) < self.min_size:
+                await send(start_message)
+                await send(message)
+                return
+
+            offloaded = len(body) >= self.thread_threshold
+            if offloaded:
+                compressed = await asyncio.to_thread(ENCODERS[encoding], body)
+            else:
+                compressed = ENCODERS[encoding](body)
+            compression_stats.record(encoding, len(body), len(compressed), offloaded)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            # Each encoding is a different representation, so a strong ETag becomes weak;
+            # conditional requests compare ETags weakly and still match
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
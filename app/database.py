@@ -1,16 +1,84 @@
-from sqlalchemy import create_engine
+"""
+Database engines and session dependencies.
+
+Writes go through a single writer engine and reads through a pool of read-only
+connections; with SQLite in WAL mode the readers don't wait for the writer. Compare
+concurrent reads and writes in WAL and rollback journal mode with:
+
+    python -m app.database benchmark [seconds]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 # Use SQLite as database
-SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./clarifai.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./clarifai.db")
+
+# Engine settings, overridable through environment variables
+DB_WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "1"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "5"))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# SQLite pragmas applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative values are KiB
+
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+def _create_engine(
+    pool_size: int,
+    max_overflow: int,
+    read_only: bool,
+    url: str = SQLALCHEMY_DATABASE_URL,
+    journal_mode: str = SQLITE_JOURNAL_MODE
+):
+    connect_args = {"check_same_thread": False} if IS_SQLITE else {}
+    new_engine = create_async_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=DB_POOL_TIMEOUT
+    )
+
+    if IS_SQLITE:
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+            if read_only:
+                cursor.execute("PRAGMA query_only=ON")
+            cursor.close()
+
+    return new_engine
+
+# All writes go through a single writer engine; with SQLite a one-connection pool
+# queues writers in-process instead of failing with "database is locked"
+engine = _create_engine(DB_WRITE_POOL_SIZE, 0, read_only=False)
+
+# Read-only queries use a separate pool of reader connections, which WAL lets run
+# concurrently with the writer
+read_engine = _create_engine(DB_READ_POOL_SIZE, DB_READ_MAX_OVERFLOW, read_only=True)
 
-engine = create_async_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
 SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+ReadSessionLocal = sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -20,4 +88,90 @@ async def get_db():
     try:
         yield db
     finally:
-        await db.close() 
\ No newline at end of file
+        await db.close()
+
+# Dependency to get a read-only database session
+async def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+async def _read_write_load(url: str, journal_mode: str, seconds: float, readers: int, writers: int) -> Dict[str, float]:
+    """Run reader and writer tasks against a database for a while and count their work"""
+    writer = _create_engine(1, 0, read_only=False, url=url, journal_mode=journal_mode)
+    reader = _create_engine(readers, 0, read_only=True, url=url, journal_mode=journal_mode)
+    read_latencies: List[float] = []
+    writes = 0
+    deadline = time.perf_counter() + seconds
+
+    async def write_loop():
+        nonlocal writes
+        while time.perf_counter() < deadline:
+            async with writer.begin() as conn:
+                await conn.exec_driver_sql(
+                    "INSERT INTO requirements (creator_id, title, priority, business_goal, data_scope, "
+                    "created_at, updated_at) VALUES (1, 'Load', 'Medium', 'Write load', 'x', "
+                    "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+                )
+            writes += 1
+
+    async def read_loop():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            async with reader.connect() as conn:
+                await conn.exec_driver_sql(
+                    "SELECT id, title FROM requirements WHERE creator_id = 1 "
+                    "ORDER BY created_at DESC LIMIT 50"
+                )
+            read_latencies.append(time.perf_counter() - started)
+
+    try:
+        await asyncio.gather(*(write_loop() for _ in range(writers)), *(read_loop() for _ in range(readers)))
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+    read_latencies.sort()
+    return {
+        "writes": writes / seconds,
+        "reads": len(read_latencies) / seconds,
+        "p95": read_latencies[int(len(read_latencies) * 0.95)] * 1000 if read_latencies else 0.0
+    }
+
+def benchmark(seconds: float = 5, rows: int = 10000, readers: int = 5, writers: int = 4) -> None:
+    """Time concurrent reads and writes on a file database in each journal mode"""
+    from .migrations import run_migrations
+
+    for journal_mode in ("DELETE", "WAL"):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchmark.db")
+            setup = create_engine(f"sqlite:///{path}")
+            with setup.begin() as conn:
+                conn.exec_driver_sql(f"PRAGMA journal_mode={journal_mode}")
+                run_migrations(conn)
+                conn.exec_driver_sql(
+                    "INSERT INTO requirements (creator_id, title, priority, business_goal, data_scope, "
+                    "created_at, updated_at) VALUES (1, 'Seed', 'Medium', 'Seed row', 'x', "
+                    "CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+                    [()] * rows
+                )
+            setup.dispose()
+
+            result = asyncio.run(
+                _read_write_load(f"sqlite+aiosqlite:///{path}", journal_mode, seconds, readers, writers)
+            )
+            print(
+                f"{journal_mode:<7} {result['writes']:8.0f} writes/s  {result['reads']:8.0f} reads/s  "
+                f"read p95 {result['p95']:7.2f} ms"
+            )
+
+def main(argv: List[str]) -> int:
+    if argv and argv[0] == "benchmark":
+        benchmark(float(argv[1]) if len(argv) > 1 else 5)
+        return 0
+    print("Usage: python -m app.database benchmark [seconds]")
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,89 @@
+"""
+Compact storage format for AI feedback.
+
+Feedback is stored as a list of message codes with optional parameters, for example
+"@fb1:C;O2;G2;D1=3;Z2", and rendered into text from the template table below only when
+it is returned by the API. Stored values without the "@fb1:" prefix are free text (model
+feedback, or rows written before the coded format) and are returned unchanged.
+"""
+from functools import lru_cache
+from typing import List, Tuple
+
+FEEDBACK_PREFIX = "@fb1:"
+
+# Message templates by code; the first letter of a code is its section
+FEEDBACK_MESSAGES = {
+    # Scoring criteria
+    "C": "Requirement analysis results are based primarily on title descriptiveness and business goal clarity. Supporting Files, Expected Output, and Deadline are optional fields and do not affect the Clarity Score.",
+    # Overall assessment
+    "O1": "Your requirement definition is very comprehensive, and researchers can start working immediately.",
+    "O2": "Your requirement is generally reasonable, but there are some areas that could be further optimized.",
+    "O3": "Your requirement definition needs significant improvement before researchers can understand and begin working on it.",
+    # Title
+    "T1": "Title is too short. Consider providing a more descriptive title to help researchers better understand the requirement content.",
+    "T2": "Title is quite long. Consider making it more concise to highlight the key points.",
+    "T3": "Title is not specific enough. Try using more descriptive words to clearly express the core objective of the requirement.",
+    # Business goal
+    "G1": "Business goal description is too brief. Consider elaborating on the business context, specific objectives, and expected business value.",
+    "G2": "Business goal lacks specific business metrics. Consider clearly defining the key performance indicators (KPIs) that need to be improved or tracked.",
+    "G3": "Structure of the business goal could be improved. Consider breaking it down into sections describing business context, specific problems, and solution expectations.",
+    # Data scope
+    "D1": "You've uploaded {0} supporting file(s). This will help researchers better understand your requirements.",
+    "D2": "You've indicated file uploads, but no files were detected. This is optional and won't affect your clarity score.",
+    "D3": "No supporting files were uploaded. This is optional and won't affect your clarity score.",
+    # Expected output
+    "E1": "No expected output has been specified. While this is optional for requirement verification, specifying an expected output could provide researchers with clearer guidance.",
+    "E2": "The selected expected output is not among standard options. Consider selecting one of the standard options for better clarity.",
+    "E3": "Note: The selected expected output and priority combination is uncommon. You may want to reconsider either, but this won't affect your requirement's clarity score.",
+    # Closing
+    "Z1": "✅ Your requirement definition is already good. Only minor adjustments are needed to further improve clarity.",
+    "Z2": "⚠️ Adjusting your requirement based on the above feedback can significantly improve researchers' understanding and implementation efficiency."
+}
+
+# Section of each code prefix, with the text placed before the section's messages
+FEEDBACK_SECTIONS = {
+    "C": ("criteria", ""),
+    "O": ("overall", "\n\n📊 Overall assessment: "),
+    "T": ("title", "\n\n📝 Title feedback:\n• "),
+    "G": ("business_goal", "\n\n🎯 Business goal feedback:\n• "),
+    "D": ("data_scope", "\n\n📁 Data scope feedback:\n• "),
+    "E": ("expected_output", "\n\n📈 Expected output feedback:\n• "),
+    "Z": ("closing", "\n\n")
+}
+
+def feedback_code(code: str, *params) -> str:
+    """Return a message code with its parameters, e.g. D1=3"""
+    if not params:
+        return code
+    return code + "=" + ",".join(str(param) for param in params)
+
+def encode_feedback(codes: List[str]) -> str:
+    """Encode message codes in display order as a stored feedback value"""
+    return FEEDBACK_PREFIX + ";".join(codes)
+
+def is_coded_feedback(value: str) -> bool:
+    return bool(value) and value.startswith(FEEDBACK_PREFIX)
+
+@lru_cache(maxsize=4096)
+def feedback_parts(value: str) -> Tuple[Tuple[str, str], ...]:
+    """Render a stored feedback value as (section, text) pairs in display order"""
+    if not is_coded_feedback(value):
+        return (("feedback", value or ""),)
+
+    parts = []
+    current_section = None
+    for item in value[len(FEEDBACK_PREFIX):].split(";"):
+        code, _, params = item.partition("=")
+        message = FEEDBACK_MESSAGES[code].format(*params.split(",")) if params else FEEDBACK_MESSAGES[code]
+        section, heading = FEEDBACK_SECTIONS[code[0]]
+        if section == current_section:
+            # Further messages of a section become further bullets
+            parts[-1] = (section, parts[-1][1] + "\n• " + message)
+        else:
+            parts.append((section, heading + message))
+            current_section = section
+    return tuple(parts)
+
+def render_feedback(value: str) -> str:
+    """Render a stored feedback value as the feedback text shown to users"""
+    return "".join(text for _, text in feedback_parts(value))
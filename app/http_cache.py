@@ -0,0 +1,53 @@
+"""
+Conditional GET support for the requirement and feedback endpoints.
+
+Responses carry a strong ETag derived from the user, the request's query string and
+the newest updated_at and row count of what they return. Single requirements also
+carry a Last-Modified date; collections don't, as deleting a row other than the newest
+leaves their newest updated_at unchanged. The validators come from an aggregate
+query that doesn't read the rows, so a client sending If-None-Match for unchanged data
+gets a 304 without the rows being loaded or encoded.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+from fastapi import Request, Response
+
+def entity_tag(*parts) -> str:
+    """A strong ETag over the values a response is derived from"""
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def http_date(value: datetime) -> str:
+    # Timestamps are stored as naive UTC
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def validators(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    """Response headers that let the client revalidate instead of downloading again"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Whether the request's validators still match, per RFC 9110 section 13.2.2"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # GET compares entity tags weakly, so a W/ prefix added by a proxy still matches
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+    return Response(status_code=304, headers=validators(etag, last_modified))
@@ -0,0 +1,90 @@
+"""
+Local OpenAI-compatible stub server for developing and testing the LLM analysis backend.
+
+Run it next to the app and point the backend at it:
+
+    uvicorn app.llm_stub:app --port 8001
+    ANALYSIS_ENGINE=llm OPENAI_BASE_URL=http://127.0.0.1:8001/v1 uvicorn app.main:app
+
+Answers are produced by the heuristic analyzer. STUB_LATENCY_MS adds an artificial
+delay to every completion, which is useful to exercise the latency budget fallback.
+Streamed completions send the feedback a few words at a time, STUB_TOKEN_DELAY_MS apart.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from .ai_service import RequirementAnalyzer
+
+app = FastAPI(title="ClarifAI - LLM stub server")
+
+analyzer = RequirementAnalyzer(deterministic=True)
+stats = {"completions": 0, "requirements": 0}
+
+@app.post("/v1/chat/completions")
+@app.post("/openai/deployments/{deployment}/chat/completions")
+async def chat_completions(request: Request, deployment: str = None):
+    body = await request.json()
+    latency_ms = float(os.getenv("STUB_LATENCY_MS", "0"))
+    if latency_ms:
+        await asyncio.sleep(latency_ms / 1000)
+
+    # The backend sends the requirements as JSON in the last user message
+    requirements = json.loads(body["messages"][-1]["content"])["requirements"]
+    results = []
+    for req in requirements:
+        clarity_score, feasibility_score, completeness_score, feedback = analyzer.analyze(
+            req["title"], req["business_goal"], req["data_scope"], req["expected_output"], req["priority"]
+        )
+        results.append({
+            "id": req["id"],
+            "clarity_score": clarity_score,
+            "feasibility_score": feasibility_score,
+            "completeness_score": completeness_score,
+            "feedback": feedback
+        })
+
+    stats["completions"] += 1
+    stats["requirements"] += len(requirements)
+    if body.get("stream"):
+        return StreamingResponse(_stream(results[0], body.get("model") or deployment), media_type="text/event-stream")
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model") or deployment,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": json.dumps({"results": results})},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
+
+async def _stream(result: dict, model: str):
+    """The streamed reply: feedback a few words per chunk, then the scores line"""
+    token_delay_ms = float(os.getenv("STUB_TOKEN_DELAY_MS", "20"))
+    scores = {name: result[name] for name in ("clarity_score", "feasibility_score", "completeness_score")}
+    words = result["feedback"].split(" ")
+    pieces = [" ".join(words[i:i + 4]) + " " for i in range(0, len(words), 4)]
+    pieces.append("\nSCORES: " + json.dumps(scores))
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    for piece in pieces:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        if token_delay_ms:
+            await asyncio.sleep(token_delay_ms / 1000)
+    yield "data: [DONE]\n\n"
+
+@app.get("/stats")
+async def get_stats():
+    return stats
@@ -1,13 +1,17 @@
-from fastapi import FastAPI, Request
+import asyncio
+import functools
+from fastapi import FastAPI, Request, Depends
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from .database import Base, engine
-from .models.models import User
-from .auth import get_password_hash
-from .routers import auth, requirements
+from .database import engine
+from .migrations import run_migrations
+from .auth import password_hasher, PasswordHasherBusyError, get_current_active_user
+from .ai_service import analysis_executor, llm_analyzer, AnalyzerBusyError
+from .rescore import rescore_runner
+from .query_stats import QueryStatsMiddleware
+from .compression import CompressionMiddleware, compression_stats
+from .routers import auth, requirements, rescore, search, bulk, events, stats
 
 app = FastAPI(title="ClarifAI - Requirement Management System")
 
@@ -20,67 +24,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Count database queries per request
+app.add_middleware(QueryStatsMiddleware)
+
+# Compress responses in the encoding the client accepts; added last, so it runs outermost
+app.add_middleware(CompressionMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-# Configure templates
-templates = Jinja2Templates(directory="app/templates")
+# Templates are loaded on the first page request, keeping Jinja out of startup
+@functools.lru_cache(maxsize=None)
+def get_templates():
+    from fastapi.templating import Jinja2Templates
+    return Jinja2Templates(directory="app/templates")
 
 # Include routers with prefix
 app.include_router(auth.router, prefix="/api", tags=["authentication"])
 app.include_router(requirements.router, prefix="/api", tags=["requirements"])
+app.include_router(rescore.router, prefix="/api", tags=["rescore"])
+app.include_router(search.router, prefix="/api", tags=["search"])
+app.include_router(bulk.router, prefix="/api", tags=["bulk"])
+app.include_router(events.router, prefix="/api", tags=["events"])
+app.include_router(stats.router, prefix="/api", tags=["stats"])
+
+@app.exception_handler(AnalyzerBusyError)
+async def analyzer_busy_handler(request: Request, exc: AnalyzerBusyError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.get("/api/compression-stats", tags=["monitoring"])
+async def get_compression_stats(current_user = Depends(get_current_active_user)):
+    """Get the number of compressed responses and the share of bytes compression saved"""
+    return compression_stats.stats()
 
 @app.on_event("startup")
 async def startup():
-    # Create database tables
+    # Create or upgrade the database schema; the test accounts are seeded by a migration,
+    # so an up-to-date database needs no further work
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        applied = await conn.run_sync(run_migrations)
+    if applied:
+        print(f"Applied schema migrations: {applied}")
+    
+    # Warm up process workers in the background; thread workers start with the first analysis
+    if analysis_executor.backend == "process":
+        app.state.analysis_warmup = asyncio.get_running_loop().run_in_executor(None, analysis_executor.start)
     
-    # Create test accounts if they don't exist
-    async with AsyncSession(engine) as session:
-        # Check if PM account exists
-        result = await session.execute(select(User).filter(User.email == "pm@test.com"))
-        pm_user = result.scalar_one_or_none()
-        if not pm_user:
-            # Create PM test account
-            pm_user = User(
-                email="pm@test.com",
-                hashed_password=get_password_hash("password123"),
-                role="pm",
-                is_active=True
-            )
-            session.add(pm_user)
-        
-        # Check if Researcher account exists
-        result = await session.execute(select(User).filter(User.email == "researcher@test.com"))
-        researcher_user = result.scalar_one_or_none()
-        if not researcher_user:
-            # Create Researcher test account
-            researcher_user = User(
-                email="researcher@test.com",
-                hashed_password=get_password_hash("password123"),
-                role="researcher",
-                is_active=True
-            )
-            session.add(researcher_user)
-        
-        # Commit changes if any accounts were created
-        await session.commit()
-        
-    print("Database initialized with test accounts")
+    # Resume re-scoring jobs interrupted by the last shutdown
+    await rescore_runner.resume_unfinished()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await rescore_runner.shutdown()
+    analysis_executor.shutdown()
+    password_hasher.shutdown()
+    if llm_analyzer is not None:
+        await llm_analyzer.close()
 
 @app.get("/")
 async def home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return get_templates().TemplateResponse("index.html", {"request": request})
 
 @app.get("/dashboard")
 async def dashboard(request: Request):
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+    return get_templates().TemplateResponse("dashboard.html", {"request": request})
 
 @app.get("/all-tasks")
 async def all_tasks(request: Request):
-    return templates.TemplateResponse("all_tasks.html", {"request": request})
+    return get_templates().TemplateResponse("all_tasks.html", {"request": request})
 
 @app.get("/task-detail/{task_id}")
 async def task_detail(request: Request, task_id: int):
-    return templates.TemplateResponse("task_detail.html", {"request": request, "task_id": task_id}) 
\ No newline at end of file
+    return get_templates().TemplateResponse("task_detail.html", {"request": request, "task_id": task_id}) 
\ No newline at end of file
@@ -0,0 +1,327 @@
+"""
+Versioned schema migrations and query plan checks.
+
+Each migration runs once per database, in version order, and is recorded in the
+schema_migrations table. Run pending migrations with:
+
+    python -m app.migrations
+
+and check that the hot queries still use indexes on a freshly migrated schema (exits
+non-zero on a full table scan):
+
+    python -m app.migrations --check-plans
+"""
+import asyncio
+import datetime
+import re
+import sys
+from typing import Callable, List, Tuple
+from sqlalchemy import func, inspect, or_
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.future import select
+from .database import Base, engine, IS_SQLITE
+from .models.models import User, Requirement, Feedback, RescoreJob, RequirementFile, RequirementStats
+from .stats import create_stats_triggers, reconcile_stats
+
+def _create_base_tables(conn) -> None:
+    # Creates only the tables that don't exist yet, so databases created before
+    # migrations existed are adopted as they are
+    Base.metadata.create_all(conn)
+
+def _add_hot_path_indexes(conn) -> None:
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_requirements_creator_created ON requirements (creator_id, created_at)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_requirements_assignee_created ON requirements (assigned_to_id, created_at)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_feedbacks_requirement_created ON feedbacks (requirement_id, created_at)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_users_role ON users (role)"
+    )
+
+def _add_search_index(conn) -> None:
+    if not IS_SQLITE:
+        return
+    # External-content FTS5 tables index the text columns without storing a second copy
+    conn.exec_driver_sql(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS requirements_fts USING fts5("
+        "title, business_goal, data_scope, "
+        "content='requirements', content_rowid='id', tokenize='porter unicode61')"
+    )
+    conn.exec_driver_sql(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS feedbacks_fts USING fts5("
+        "content, content='feedbacks', content_rowid='id', tokenize='porter unicode61')"
+    )
+
+    # Triggers keep the index in step with every write; updates that don't touch the
+    # indexed columns (such as re-scoring) leave it alone
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS requirements_fts_insert AFTER INSERT ON requirements BEGIN "
+        "INSERT INTO requirements_fts (rowid, title, business_goal, data_scope) "
+        "VALUES (new.id, new.title, new.business_goal, new.data_scope); END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS requirements_fts_delete AFTER DELETE ON requirements BEGIN "
+        "INSERT INTO requirements_fts (requirements_fts, rowid, title, business_goal, data_scope) "
+        "VALUES ('delete', old.id, old.title, old.business_goal, old.data_scope); END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS requirements_fts_update "
+        "AFTER UPDATE OF title, business_goal, data_scope ON requirements BEGIN "
+        "INSERT INTO requirements_fts (requirements_fts, rowid, title, business_goal, data_scope) "
+        "VALUES ('delete', old.id, old.title, old.business_goal, old.data_scope); "
+        "INSERT INTO requirements_fts (rowid, title, business_goal, data_scope) "
+        "VALUES (new.id, new.title, new.business_goal, new.data_scope); END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS feedbacks_fts_insert AFTER INSERT ON feedbacks BEGIN "
+        "INSERT INTO feedbacks_fts (rowid, content) VALUES (new.id, new.content); END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS feedbacks_fts_delete AFTER DELETE ON feedbacks BEGIN "
+        "INSERT INTO feedbacks_fts (feedbacks_fts, rowid, content) VALUES ('delete', old.id, old.content); END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS feedbacks_fts_update AFTER UPDATE OF content ON feedbacks BEGIN "
+        "INSERT INTO feedbacks_fts (feedbacks_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+        "INSERT INTO feedbacks_fts (rowid, content) VALUES (new.id, new.content); END"
+    )
+
+    # Index the rows that existed before the tables were created
+    conn.exec_driver_sql("INSERT INTO requirements_fts (requirements_fts) VALUES ('rebuild')")
+    conn.exec_driver_sql("INSERT INTO feedbacks_fts (feedbacks_fts) VALUES ('rebuild')")
+
+def _unstemmed_search_index(conn) -> None:
+    if not IS_SQLITE:
+        return
+    # The porter tokenizer also stems the prefix of a query like "analy*", so partly typed
+    # words found nothing. Without stemming, prefixes match the words as written, and the
+    # prefix indexes answer short ones without scanning the whole vocabulary. The triggers
+    # of migration 3 write to these tables by name, so they carry on unchanged
+    conn.exec_driver_sql("DROP TABLE IF EXISTS requirements_fts")
+    conn.exec_driver_sql("DROP TABLE IF EXISTS feedbacks_fts")
+    conn.exec_driver_sql(
+        "CREATE VIRTUAL TABLE requirements_fts USING fts5("
+        "title, business_goal, data_scope, "
+        "content='requirements', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+    )
+    conn.exec_driver_sql(
+        "CREATE VIRTUAL TABLE feedbacks_fts USING fts5("
+        "content, content='feedbacks', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+    )
+    conn.exec_driver_sql("INSERT INTO requirements_fts (requirements_fts) VALUES ('rebuild')")
+    conn.exec_driver_sql("INSERT INTO feedbacks_fts (feedbacks_fts) VALUES ('rebuild')")
+
+# Test accounts, with the bcrypt hash of their password ("password123") computed once
+# here rather than on every boot
+TEST_ACCOUNTS = (
+    ("pm@test.com", "pm"),
+    ("researcher@test.com", "researcher"),
+)
+TEST_ACCOUNT_PASSWORD_HASH = "$2b$12$WzbtwppOKl/UUdwUATeRDOqErlpoq4lJB40ULFzPOxkfbIfCQPG3q"
+
+def _seed_test_accounts(conn) -> None:
+    # Accounts that already exist (seeded by earlier versions of the app) are kept
+    for email, role in TEST_ACCOUNTS:
+        conn.exec_driver_sql(
+            "INSERT INTO users (email, hashed_password, role, is_active) "
+            "SELECT ?, ?, ?, 1 WHERE NOT EXISTS (SELECT 1 FROM users WHERE email = ?)",
+            (email, TEST_ACCOUNT_PASSWORD_HASH, role, email)
+        )
+
+def _add_requirement_files(conn) -> None:
+    Base.metadata.create_all(conn, tables=[RequirementFile.__table__])
+
+def _add_updated_at(conn) -> None:
+    # Databases created from the current models already have the columns
+    for table in ("requirements", "feedbacks"):
+        columns = {column["name"] for column in inspect(conn).get_columns(table)}
+        if "updated_at" not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN updated_at DATETIME")
+            conn.exec_driver_sql(f"UPDATE {table} SET updated_at = created_at")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_requirements_creator_updated ON requirements (creator_id, updated_at)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_requirements_assignee_updated ON requirements (assigned_to_id, updated_at)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_feedbacks_requirement_updated ON feedbacks (requirement_id, updated_at)"
+    )
+
+def _add_requirement_stats(conn) -> None:
+    if not IS_SQLITE:
+        # Without the triggers nothing would keep the totals current, and /api/stats
+        # would serve stale numbers
+        raise RuntimeError(
+            "requirement_stats is maintained by SQLite triggers; "
+            "other databases would need equivalent triggers before this migration can run"
+        )
+    Base.metadata.create_all(conn, tables=[RequirementStats.__table__])
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_requirements_creator_deadline ON requirements (creator_id, deadline)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_requirements_assignee_deadline ON requirements (assigned_to_id, deadline)"
+    )
+    create_stats_triggers(conn)
+    # Totals of the rows that existed before the triggers
+    reconcile_stats(conn)
+
+def _add_single_running_rescore_job(conn) -> None:
+    # Keep only the newest of any concurrently started jobs running
+    conn.exec_driver_sql(
+        "UPDATE rescore_jobs SET status = 'cancelled' WHERE status = 'running' "
+        "AND id < (SELECT max(id) FROM rescore_jobs WHERE status = 'running')"
+    )
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_rescore_jobs_running ON rescore_jobs (status) "
+        "WHERE status = 'running'"
+    )
+
+# (version, description, migration) in the order they are applied
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "Create base tables", _create_base_tables),
+    (2, "Add hot-path composite indexes", _add_hot_path_indexes),
+    (3, "Add full-text search index", _add_search_index),
+    (4, "Seed test accounts", _seed_test_accounts),
+    (5, "Add requirement file metadata", _add_requirement_files),
+    (6, "Add updated_at for conditional requests", _add_updated_at),
+    (7, "Add incrementally maintained requirement stats", _add_requirement_stats),
+    (8, "Allow one running re-scoring job", _add_single_running_rescore_job),
+    (9, "Index search text unstemmed for prefix matching", _unstemmed_search_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def run_migrations(conn) -> List[int]:
+    """Apply pending migrations on a sync connection and return the versions applied
+
+    When the stored version is current this costs two small statements, so it is cheap
+    enough to run on every boot.
+    """
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, description VARCHAR, applied_at TIMESTAMP)"
+    )
+    applied = {row[0] for row in conn.exec_driver_sql("SELECT version FROM schema_migrations")}
+
+    newly_applied = []
+    for version, description, migration in MIGRATIONS:
+        if version in applied:
+            continue
+        migration(conn)
+        conn.exec_driver_sql(
+            "INSERT INTO schema_migrations (version, description, applied_at) VALUES (?, ?, ?)",
+            (version, description, datetime.datetime.utcnow())
+        )
+        newly_applied.append(version)
+    return newly_applied
+
+def drop_schema(conn) -> None:
+    """Drop every table, including the migration history"""
+    Base.metadata.drop_all(conn)
+    conn.exec_driver_sql("DROP TABLE IF EXISTS requirements_fts")
+    conn.exec_driver_sql("DROP TABLE IF EXISTS feedbacks_fts")
+    conn.exec_driver_sql("DROP TABLE IF EXISTS schema_migrations")
+
+def hot_queries():
+    """The queries behind the most frequent endpoints, as (name, statement) pairs"""
+    assigned = select(Requirement, User.email.label("assigned_email")).outerjoin(
+        User, Requirement.assigned_to_id == User.id
+    )
+    newest_first = (Requirement.created_at.desc(), Requirement.id.desc())
+    return [
+        ("pm requirement list", assigned
+            .where(Requirement.creator_id == 1)
+            .order_by(*newest_first)
+            .limit(51)),
+        ("researcher requirement list", assigned
+            .where(or_(Requirement.assigned_to_id == 2, Requirement.assigned_to_id == None))
+            .order_by(*newest_first)
+            .limit(51)),
+        ("pm requirement list validators", select(func.max(Requirement.updated_at), func.count())
+            .select_from(Requirement)
+            .where(Requirement.creator_id == 1)),
+        ("researcher requirement list validators", select(func.max(Requirement.updated_at), func.count())
+            .select_from(Requirement)
+            .where(or_(Requirement.assigned_to_id == 2, Requirement.assigned_to_id == None))),
+        ("requirement detail", select(Requirement).filter(Requirement.id == 1)),
+        ("requirement feedbacks", select(Feedback)
+            .filter(Feedback.requirement_id == 1)
+            .order_by(Feedback.created_at.desc())),
+        ("requirement feedbacks validators", select(func.max(Feedback.updated_at), func.count(Feedback.id))
+            .select_from(Requirement)
+            .outerjoin(Feedback, Feedback.requirement_id == Requirement.id)
+            .filter(Requirement.id == 1)
+            .group_by(Requirement.id)),
+        ("researchers", select(User).filter(User.role == "researcher")),
+        ("user by email", select(User).filter(User.email == "pm@test.com")),
+        ("rescore chunk", select(Requirement.id)
+            .filter(Requirement.id > 0)
+            .order_by(Requirement.id)
+            .limit(500)),
+        ("requirement files", select(RequirementFile)
+            .filter(RequirementFile.requirement_id == 1)
+            .order_by(RequirementFile.id)),
+        ("running rescore jobs", select(RescoreJob.id).filter(RescoreJob.id > 0)),
+        ("requirement stats", select(RequirementStats).filter(
+            RequirementStats.scope == "assignee", RequirementStats.user_id.in_([2, 0])
+        )),
+        ("pm overdue count", select(func.count())
+            .select_from(Requirement)
+            .filter(Requirement.creator_id == 1, Requirement.deadline < datetime.datetime(2024, 1, 1))),
+        ("researcher overdue count", select(func.count())
+            .select_from(Requirement)
+            .filter(
+                or_(Requirement.assigned_to_id == 2, Requirement.assigned_to_id == None),
+                Requirement.deadline < datetime.datetime(2024, 1, 1)
+            )),
+    ]
+
+# A full scan of a table, as opposed to SEARCH ... USING INDEX
+FULL_SCAN = re.compile(r"^SCAN (\w+)\b(?! USING (COVERING )?INDEX| USING INTEGER PRIMARY KEY)")
+
+async def check_query_plans() -> List[str]:
+    """Run EXPLAIN QUERY PLAN for each hot query and describe any full table scans
+
+    Plans are taken on an empty in-memory SQLite database built by the migrations, so
+    the result depends only on the schema and not on the data or statistics at hand.
+    """
+    plan_engine = create_async_engine("sqlite+aiosqlite://")
+    problems = []
+    try:
+        async with plan_engine.begin() as conn:
+            await conn.run_sync(run_migrations)
+            for name, statement in hot_queries():
+                compiled = statement.compile(conn.sync_connection, compile_kwargs={"literal_binds": True})
+                result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+                for row in result:
+                    detail = row[-1]
+                    if FULL_SCAN.match(detail):
+                        problems.append(f"{name}: {detail}")
+    finally:
+        await plan_engine.dispose()
+    return problems
+
+async def main(argv: List[str]) -> int:
+    async with engine.begin() as conn:
+        applied = await conn.run_sync(run_migrations)
+    print(f"Applied migrations: {applied}" if applied else f"Schema is up to date (version {SCHEMA_VERSION})")
+
+    if "--check-plans" in argv:
+        problems = await check_query_plans()
+        for problem in problems:
+            print(f"Full table scan in {problem}")
+        if problems:
+            return 1
+        print("All hot queries use indexes")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
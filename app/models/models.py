@@ -1,10 +1,13 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, Text, DateTime
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, Text, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from ..database import Base
 import datetime
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_role", "role"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
@@ -19,6 +22,18 @@ class User(Base):
 
 class Requirement(Base):
     __tablename__ = "requirements"
+    __table_args__ = (
+        # PM lists: own requirements, newest first
+        Index("ix_requirements_creator_created", "creator_id", "created_at"),
+        # Researcher lists: assigned to them or unassigned
+        Index("ix_requirements_assignee_created", "assigned_to_id", "created_at"),
+        # ETag aggregates: newest change and row count of a list, from the index alone
+        Index("ix_requirements_creator_updated", "creator_id", "updated_at"),
+        Index("ix_requirements_assignee_updated", "assigned_to_id", "updated_at"),
+        # Overdue counts for the dashboard stats
+        Index("ix_requirements_creator_deadline", "creator_id", "deadline"),
+        Index("ix_requirements_assignee_deadline", "assigned_to_id", "deadline"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     creator_id = Column(Integer, ForeignKey("users.id"))
@@ -30,6 +45,7 @@ class Requirement(Base):
     expected_output = Column(String)
     deadline = Column(DateTime)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     
     # Scorecard metrics
     clarity_score = Column(Float, default=0.0)
@@ -46,13 +62,73 @@ class Requirement(Base):
 
 class Feedback(Base):
     __tablename__ = "feedbacks"
+    __table_args__ = (
+        Index("ix_feedbacks_requirement_created", "requirement_id", "created_at"),
+        Index("ix_feedbacks_requirement_updated", "requirement_id", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     requirement_id = Column(Integer, ForeignKey("requirements.id"))
     researcher_id = Column(Integer, ForeignKey("users.id"))
     content = Column(Text)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
     # Relationships
     requirement = relationship("Requirement", back_populates="feedbacks")
-    researcher = relationship("User", back_populates="feedbacks") 
\ No newline at end of file
+    researcher = relationship("User", back_populates="feedbacks") 
+class RescoreJob(Base):
+    __tablename__ = "rescore_jobs"
+    __table_args__ = (
+        # At most one running job: starting a second one fails on insert
+        Index(
+            "ux_rescore_jobs_running", "status", unique=True,
+            sqlite_where=text("status = 'running'"), postgresql_where=text("status = 'running'")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, default="running")  # "running", "completed", "cancelled", "failed"
+    created_by_id = Column(Integer, ForeignKey("users.id"))
+    
+    # Checkpoint: every requirement with an id up to this one has been re-scored
+    last_requirement_id = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    total = Column(Integer, default=0)
+    
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+class RequirementFile(Base):
+    __tablename__ = "requirement_files"
+    __table_args__ = (
+        Index("ix_requirement_files_requirement", "requirement_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    requirement_id = Column(Integer, ForeignKey("requirements.id"))
+    filename = Column(String)
+    content_type = Column(String, nullable=True)
+    size = Column(Integer)
+    # Content address of the stored blob, shared by every upload of the same content
+    sha256 = Column(String, index=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class RequirementStats(Base):
+    """Running totals of the requirements a user created or is assigned, kept by triggers"""
+    __tablename__ = "requirement_stats"
+
+    # "creator" rows are keyed by the PM's id, "assignee" rows by the researcher's id,
+    # with user_id 0 for the pool of unassigned requirements
+    scope = Column(String, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    total = Column(Integer, default=0)
+    high = Column(Integer, default=0)
+    medium = Column(Integer, default=0)
+    low = Column(Integer, default=0)
+    assigned = Column(Integer, default=0)
+    clarity_sum = Column(Float, default=0.0)
+    feasibility_sum = Column(Float, default=0.0)
+    completeness_sum = Column(Float, default=0.0)
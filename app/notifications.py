@@ -0,0 +1,158 @@
+"""
+Change notifications for open dashboards.
+
+The requirement routers publish a compact event after every committed change:
+
+    {"kind": "requirement.updated", "id": 12, "changed": {"priority": "Low"}}
+
+A bulk import publishes one "requirements.imported" event per committed batch, listing
+the new ids, instead of one event per row.
+
+and GET /api/events streams the events a user may see as Server-Sent Events, so pages
+apply the change instead of re-fetching their lists. Each subscriber has a bounded
+queue; a client that falls behind loses its queued events and gets a single "resync"
+event instead, telling it to reload once. Events are encoded once per publish, not once
+per subscriber. A client following a single requirement gets a final "removed" event,
+and its stream ends, when the requirement is deleted or it can no longer see it.
+
+The hub lives in the process, so with several workers each one only notifies the
+clients connected to it.
+"""
+import asyncio
+import itertools
+import os
+from typing import Iterable, Optional, Sequence, Set
+import orjson
+
+# Notification settings, overridable through environment variables
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+
+RESYNC_EVENT = b'event: resync\ndata: {}\n\n'
+
+class Subscriber:
+    """One connected client: who it is, what it follows, and its pending events"""
+
+    def __init__(self, user_id: int, role: str, requirement_id: Optional[int], queue_size: int):
+        self.user_id = user_id
+        self.role = role
+        self.requirement_id = requirement_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def can_see(self, creator_id: Optional[int], assignee: Optional[int]) -> bool:
+        """Whether a requirement with this creator and assignee is visible to this subscriber"""
+        if self.role == "pm":
+            return creator_id == self.user_id
+        return assignee is None or assignee == self.user_id
+
+    def wants(self, requirement_id: int, creator_id: Optional[int], assignees: Sequence[Optional[int]]) -> bool:
+        """Whether a change to a requirement is visible to this subscriber"""
+        if self.requirement_id is not None:
+            # Checked per event rather than only at connect, as the requirement may have
+            # been reassigned since
+            return requirement_id == self.requirement_id and self.can_see(creator_id, assignees[-1])
+        if self.role == "pm":
+            return creator_id == self.user_id
+        # Researchers follow requirements assigned to them or to nobody, including ones
+        # that have just been reassigned away, so they can drop them
+        return any(assignee is None or assignee == self.user_id for assignee in assignees)
+
+    def deliver(self, message: bytes) -> bool:
+        """Queue a message, returning False if the queue was full and has been reset"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            # The client can't keep up: its backlog is replaced by one resync
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+            return False
+
+    def close(self, message: bytes) -> None:
+        """Replace any pending events with a last message, after which the stream ends"""
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+class ChangeHub:
+    """Fans change events out to the subscribers allowed to see them"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscriber] = set()
+        self._event_ids = itertools.count(1)
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+        self.removed = 0
+
+    def publish(
+        self,
+        kind: str,
+        item_id: int,
+        changed: dict,
+        requirement_id: int,
+        creator_id: Optional[int],
+        assignees: Iterable[Optional[int]] = (None,)
+    ) -> None:
+        """Send an event to every subscriber that can see the requirement it concerns
+
+        assignees are the requirement's assignees before and after the change, the
+        current one last. Subscribers following a requirement they can no longer see,
+        or one that was deleted, are sent "removed" and dropped.
+        """
+        assignees = tuple(assignees)
+        event = {"kind": kind, "id": item_id, "changed": changed}
+        if kind.startswith("feedback."):
+            event["requirement_id"] = requirement_id
+        message = (
+            f"id: {next(self._event_ids)}\nevent: change\ndata: ".encode()
+            + orjson.dumps(event)
+            + b"\n\n"
+        )
+        self.published += 1
+        for subscriber in tuple(self._subscribers):
+            wants = subscriber.wants(requirement_id, creator_id, assignees)
+            if subscriber.requirement_id == requirement_id and (kind == "requirement.deleted" or not wants):
+                self._subscribers.discard(subscriber)
+                self.removed += 1
+                subscriber.close(b"event: removed\ndata: " + orjson.dumps({"id": requirement_id}) + b"\n\n")
+            elif wants:
+                self.delivered += 1
+                if not subscriber.deliver(message):
+                    self.overflows += 1
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "queued": sum(subscriber.queue.qsize() for subscriber in self._subscribers),
+            "overflows": self.overflows,
+            "removed": self.removed
+        }
+
+    async def stream(self, user_id: int, role: str, requirement_id: Optional[int] = None):
+        """Subscribe and yield the events as SSE messages until the client disconnects
+
+        The subscription starts with the stream, so one that never starts leaves nothing behind.
+        """
+        subscriber = Subscriber(user_id, role, requirement_id, self.queue_size)
+        self._subscribers.add(subscriber)
+        try:
+            # Tells the client the subscription is live, so it can reload once to catch
+            # up on changes made while it was connecting
+            yield b"event: ready\ndata: {}\n\n"
+            while not (subscriber.closed and subscriber.queue.empty()):
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # A comment line keeps proxies from closing an idle connection
+                    yield b": keepalive\n\n"
+        finally:
+            self._subscribers.discard(subscriber)
+
+change_hub = ChangeHub(EVENTS_QUEUE_SIZE)
@@ -0,0 +1,114 @@
+"""
+Per-request database query counting.
+
+SQLAlchemy cursor events count the statements each request runs and the time spent in
+them. With QUERY_STATS_HEADER=1 the totals are returned in the X-Query-Count and
+X-Query-Time-Ms response headers. Requests that run more queries than their endpoint's
+budget in QUERY_BUDGETS are logged, and with QUERY_BUDGET_STRICT=1 they fail with a
+500 instead, which is how development and test runs catch new N+1 patterns.
+"""
+import contextvars
+import logging
+import os
+import time
+from typing import Dict, Optional
+from sqlalchemy import event
+from .database import engine, read_engine
+
+logger = logging.getLogger(__name__)
+
+QUERY_STATS_HEADER = os.getenv("QUERY_STATS_HEADER", "0") == "1"
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "0") == "1"
+
+# Maximum queries per request by (method, route path), including the user lookup
+# done by authentication
+QUERY_BUDGETS: Dict[tuple, int] = {
+    ("POST", "/api/token"): 1,
+    ("GET", "/api/requirements/"): 3,
+    # Attachments add one executemany INSERT
+    ("POST", "/api/requirements/"): 3,
+    ("GET", "/api/requirements/{requirement_id}"): 2,
+    ("PUT", "/api/requirements/{requirement_id}"): 4,
+    # Deleting also loads the requirement's feedbacks and unlinks them, and deletes its
+    # file metadata
+    ("DELETE", "/api/requirements/{requirement_id}"): 6,
+    # Validators are checked with an aggregate before the feedbacks are loaded
+    ("GET", "/api/requirements/{requirement_id}/feedbacks"): 3,
+    ("GET", "/api/requirements/{requirement_id}/files"): 2,
+    ("GET", "/api/requirements/{requirement_id}/files/{file_id}"): 2,
+    ("POST", "/api/requirements/{requirement_id}/feedback"): 3,
+    ("GET", "/api/researchers/"): 2,
+    ("GET", "/api/events"): 2,
+    # The summary rows, then the overdue count
+    ("GET", "/api/stats"): 3
+}
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+class QueryStats:
+    """Query counter of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+
+current_query_stats: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar(
+    "current_query_stats", default=None
+)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.elapsed += time.perf_counter() - started
+
+for instrumented_engine in (engine, read_engine):
+    event.listen(instrumented_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(instrumented_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+class QueryStatsMiddleware:
+    """ASGI middleware that counts the queries of each HTTP request and checks its budget"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                # Streaming responses start before their last query, so only the
+                # queries run so far are counted
+                self.check_budget(scope, stats)
+                if QUERY_STATS_HEADER:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-query-count", str(stats.count).encode()),
+                        (b"x-query-time-ms", f"{stats.elapsed * 1000:.2f}".encode())
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            current_query_stats.reset(token)
+
+    @staticmethod
+    def check_budget(scope, stats: QueryStats) -> None:
+        route = scope.get("route")
+        budget = QUERY_BUDGETS.get((scope["method"], getattr(route, "path", None)))
+        if budget is None or stats.count <= budget:
+            return
+        message = f"{scope['method']} {route.path} ran {stats.count} queries, budget is {budget}"
+        if QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,234 @@
+import asyncio
+import os
+import time
+import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import update, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.future import select
+from .database import SessionLocal, ReadSessionLocal
+from .models.models import Requirement, RescoreJob, RequirementFile
+from .ai_service import analysis_executor, with_file_count, AnalyzerBusyError
+
+# Bulk re-score settings, overridable through environment variables
+RESCORE_CHUNK_SIZE = int(os.getenv("RESCORE_CHUNK_SIZE", "500"))
+RESCORE_MAX_ROWS_PER_SECOND = float(os.getenv("RESCORE_MAX_ROWS_PER_SECOND", "1000"))
+RESCORE_RETRY_DELAY = float(os.getenv("RESCORE_RETRY_DELAY", "1"))
+RESCORE_MAX_RETRY_DELAY = float(os.getenv("RESCORE_MAX_RETRY_DELAY", "30"))
+# Accounts allowed to start and cancel the system-wide job, as comma-separated emails
+RESCORE_ADMIN_EMAILS = {
+    email.strip().lower() for email in os.getenv("RESCORE_ADMIN_EMAILS", "").split(",") if email.strip()
+}
+
+class RescoreRunner:
+    """Re-scores stored requirements in keyset-paginated chunks, checkpointing after each chunk
+
+    Each chunk is split across the analysis executor's workers, written back with one
+    executemany UPDATE, and committed together with the job's checkpoint, so a restarted
+    job continues after the last committed chunk. Writes are paced to stay under
+    max_rows_per_second so the job doesn't starve live traffic. When the executor sheds
+    load, the chunk is retried from the checkpoint with exponential backoff; only other
+    errors fail the job.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        max_rows_per_second: float = 1000.0,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 30.0
+    ):
+        self.chunk_size = chunk_size
+        self.max_rows_per_second = max_rows_per_second
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._progress: Dict[int, Dict[str, float]] = {}
+
+    def is_running(self, job_id: int) -> bool:
+        task = self._tasks.get(job_id)
+        return task is not None and not task.done()
+
+    def start(self, job_id: int) -> None:
+        """Run (or resume) a job in the background"""
+        if self.is_running(job_id):
+            return
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id))
+
+    def cancel(self, job_id: int) -> None:
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+
+    async def resume_unfinished(self) -> None:
+        """Resume jobs that were still running when the process stopped"""
+        async with ReadSessionLocal() as session:
+            result = await session.execute(select(RescoreJob.id).filter(RescoreJob.status == "running"))
+            job_ids = result.scalars().all()
+        for job_id in job_ids:
+            self.start(job_id)
+
+    async def shutdown(self) -> None:
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        # A cancelled job stays "running" in the database, so the next start resumes it
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def progress(self, job: RescoreJob) -> Dict[str, Optional[float]]:
+        """Progress and throughput of a job, combining its checkpoint with in-memory counters"""
+        run = self._progress.get(job.id, {})
+        elapsed = run.get("finished", time.monotonic()) - run["started"] if run else 0.0
+        rate = run["processed"] / elapsed if run and elapsed > 0 else 0.0
+        remaining = max(0, (job.total or 0) - (job.processed or 0))
+        return {
+            "id": job.id,
+            "status": job.status,
+            "running": self.is_running(job.id),
+            "processed": job.processed,
+            "total": job.total,
+            "last_requirement_id": job.last_requirement_id,
+            "rows_per_second": rate,
+            "eta_seconds": remaining / rate if rate > 0 else None,
+            "busy_retries": int(run.get("busy_retries", 0)),
+            "error": job.error,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at,
+            "finished_at": job.finished_at
+        }
+
+    async def _run(self, job_id: int) -> None:
+        run = self._progress[job_id] = {"started": time.monotonic(), "processed": 0, "busy_retries": 0}
+        retry_delay = self.retry_delay
+        try:
+            while True:
+                async with ReadSessionLocal() as session:
+                    job = await session.get(RescoreJob, job_id)
+                    if job is None or job.status != "running":
+                        return
+
+                    # Keyset pagination: the checkpoint id is the lower bound of the next chunk
+                    result = await session.execute(
+                        select(
+                            Requirement.id,
+                            Requirement.title,
+                            Requirement.business_goal,
+                            Requirement.data_scope,
+                            Requirement.expected_output,
+                            Requirement.priority,
+                            select(func.count(RequirementFile.id))
+                            .where(RequirementFile.requirement_id == Requirement.id)
+                            .scalar_subquery()
+                            .label("file_count")
+                        )
+                        .filter(Requirement.id > job.last_requirement_id)
+                        .order_by(Requirement.id)
+                        .limit(self.chunk_size)
+                    )
+                    rows = result.mappings().all()
+
+                if not rows:
+                    async with SessionLocal() as session:
+                        job = await session.get(RescoreJob, job_id)
+                        job.status = "completed"
+                        job.finished_at = datetime.datetime.utcnow()
+                        job.updated_at = job.finished_at
+                        await session.commit()
+                    return
+
+                # Scored outside any session, so the writer connection is only held for the update
+                try:
+                    scores = await self._score(rows)
+                except AnalyzerBusyError:
+                    # Live traffic has the executor full: back off and retry the chunk from
+                    # the checkpoint, rather than failing a job that would only need resuming
+                    run["busy_retries"] += 1
+                    await asyncio.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, self.max_retry_delay)
+                    continue
+                retry_delay = self.retry_delay
+
+                async with SessionLocal() as session:
+                    # One executemany UPDATE by primary key, committed with the checkpoint
+                    await session.execute(update(Requirement), [
+                        {
+                            "id": row["id"],
+                            "clarity_score": clarity_score,
+                            "feasibility_score": feasibility_score,
+                            "completeness_score": completeness_score,
+                            "ai_feedback": ai_feedback
+                        }
+                        for row, (clarity_score, feasibility_score, completeness_score, ai_feedback)
+                        in zip(rows, scores)
+                    ])
+                    job = await session.get(RescoreJob, job_id)
+                    job.last_requirement_id = rows[-1]["id"]
+                    job.processed = (job.processed or 0) + len(rows)
+                    job.updated_at = datetime.datetime.utcnow()
+                    await session.commit()
+
+                run["processed"] += len(rows)
+                await self._throttle(run)
+        except Exception as exc:
+            async with SessionLocal() as session:
+                job = await session.get(RescoreJob, job_id)
+                if job is not None:
+                    job.status = "failed"
+                    job.error = str(exc)
+                    job.finished_at = datetime.datetime.utcnow()
+                    job.updated_at = job.finished_at
+                    await session.commit()
+        finally:
+            run["finished"] = time.monotonic()
+
+    async def _score(self, rows) -> List[tuple]:
+        """Analyze one chunk, split across the executor's workers"""
+        # Attachments count towards the data scope as they did when the requirement was created
+        requirements = [
+            {**row, "data_scope": with_file_count(row["data_scope"], row["file_count"])}
+            for row in rows
+        ]
+        slice_size = -(-len(requirements) // analysis_executor.workers)
+        slices = [requirements[i:i + slice_size] for i in range(0, len(requirements), slice_size)]
+        results = await asyncio.gather(*[
+            analysis_executor.run(chunk, True, method="analyze_many") for chunk in slices
+        ])
+        return [scores for chunk_results in results for scores in chunk_results]
+
+    async def _throttle(self, run: Dict[str, float]) -> None:
+        """Sleep until the job's write rate is back under the cap"""
+        if self.max_rows_per_second <= 0:
+            return
+        earliest = run["started"] + run["processed"] / self.max_rows_per_second
+        delay = earliest - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def can_manage_rescore(user) -> bool:
+    """Whether a user may start or cancel the system-wide re-scoring job"""
+    return user.role == "pm" and user.email.lower() in RESCORE_ADMIN_EMAILS
+
+async def create_rescore_job(created_by_id: int) -> Optional[RescoreJob]:
+    """Create a job covering every stored requirement, or return None if one is already running
+
+    The unique index on running jobs makes the check and the insert one atomic step.
+    """
+    async with SessionLocal() as session:
+        total = await session.scalar(select(func.count(Requirement.id)))
+        job = RescoreJob(created_by_id=created_by_id, status="running", total=total or 0)
+        session.add(job)
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return None
+        await session.refresh(job)
+    return job
+
+# Create a global runner instance
+rescore_runner = RescoreRunner(
+    chunk_size=RESCORE_CHUNK_SIZE,
+    max_rows_per_second=RESCORE_MAX_ROWS_PER_SECOND,
+    retry_delay=RESCORE_RETRY_DELAY,
+    max_retry_delay=RESCORE_MAX_RETRY_DELAY
+)
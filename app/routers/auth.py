@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
 from datetime import timedelta
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models.models import User
 from ..auth import (
-    verify_password,
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
-    get_password_hash
+    get_current_active_user,
+    principal_cache,
+    token_cache,
+    password_hasher
 )
 
 router = APIRouter()
@@ -17,7 +20,7 @@ router = APIRouter()
 @router.post("/token")
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     async with db as session:
         result = await session.execute(
@@ -25,15 +28,17 @@ async def login_for_access_token(
         )
         user = result.scalar_one_or_none()
         
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await password_hasher.verify(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # The id and role let requests skip the user lookup while the user is cached
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id, "role": user.role},
+        expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer", "role": user.role}
 
@@ -42,28 +47,54 @@ async def register_user(
     email: str,
     password: str,
     role: str,
+    read_db: AsyncSession = Depends(get_read_db),
     db: AsyncSession = Depends(get_db)
 ):
-    async with db as session:
-        # Check if user already exists
+    # The duplicate check and the hashing don't hold the writer connection, which is
+    # shared by every write in the app; it is only taken for the INSERT
+    async with read_db as session:
         result = await session.execute(
-            select(User).filter(User.email == email)
+            select(User.id).filter(User.email == email)
         )
         existing_user = result.scalar_one_or_none()
-        if existing_user:
+    if existing_user:
+        raise HTTPException(
+            status_code=400,
+            detail="Email already registered"
+        )
+        
+    # Create new user
+    hashed_password = await password_hasher.hash(password)
+    async with db as session:
+        session.add(User(
+            email=email,
+            hashed_password=hashed_password,
+            role=role
+        ))
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Registered by a concurrent request since the check
             raise HTTPException(
                 status_code=400,
                 detail="Email already registered"
             )
-            
-        # Create new user
-        hashed_password = get_password_hash(password)
-        new_user = User(
-            email=email,
-            hashed_password=hashed_password,
-            role=role
-        )
-        session.add(new_user)
-        await session.commit()
         
-    return {"message": "User created successfully"} 
\ No newline at end of file
+    return {"message": "User created successfully"} 
+
+@router.get("/auth/cache-stats")
+async def get_auth_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get hit/miss counters of the principal and token caches"""
+    return {
+        "principals": principal_cache.stats(),
+        "tokens": token_cache.stats()
+    }
+
+@router.get("/auth/hash-stats")
+async def get_hash_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get queue and timing counters of the password hashing pool"""
+    return password_hasher.stats()
@@ -0,0 +1,290 @@
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
+from sqlalchemy.future import select
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+from itertools import islice
+import asyncio
+import codecs
+import csv
+import io
+import json
+import os
+import orjson
+from ..database import SessionLocal, ReadSessionLocal
+from ..models.models import User, Requirement, Feedback
+from ..auth import get_current_active_user
+from ..feedback_messages import render_feedback
+from ..ai_service import analysis_executor, AnalyzerBusyError
+from ..notifications import change_hub
+from .requirements import REQUIREMENT_FIELDS, FEEDBACK_FIELDS, stored_datetime, visible_requirements
+
+router = APIRouter()
+
+# Bulk transfer settings, overridable through environment variables
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))
+IMPORT_BUSY_RETRIES = int(os.getenv("IMPORT_BUSY_RETRIES", "5"))
+IMPORT_RETRY_DELAY = float(os.getenv("IMPORT_RETRY_DELAY", "0.5"))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# Fields an imported requirement must have, as for POST /requirements/
+IMPORT_REQUIRED_FIELDS = ("title", "priority", "business_goal", "data_scope")
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+async def export_rows(query, names: List[str], format: str, converters: Dict[str, Callable]):
+    """Stream query rows as NDJSON lines or CSV, one chunk of rows at a time
+
+    Rows come from a server-side cursor, so only one chunk is held in memory. The read
+    session belongs to the generator, as it has to outlive the request handler.
+    """
+    convert = [converters.get(name, export_value) for name in names]
+    async with ReadSessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+
+        if format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(names)
+            yield buffer.getvalue()
+
+        async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+            values = [[converter(value) for converter, value in zip(convert, row)] for row in rows]
+            if format == "csv":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(values)
+                yield buffer.getvalue()
+            else:
+                yield b"".join(orjson.dumps(dict(zip(names, row))) + b"\n" for row in values)
+
+def export_response(query, names: List[str], format: str, filename: str, converters: Optional[Dict[str, Callable]] = None):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format, expected one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    return StreamingResponse(
+        export_rows(query, names, format, converters or {}),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
+
+@router.get("/export/requirements")
+async def export_requirements(
+    format: str = "ndjson",
+    current_user: User = Depends(get_current_active_user)
+):
+    """Export every requirement the user can list, as NDJSON or CSV"""
+    names = list(REQUIREMENT_FIELDS)
+    query = (
+        select(*[REQUIREMENT_FIELDS[name].label(name) for name in names])
+        .outerjoin(User, Requirement.assigned_to_id == User.id)
+        .where(visible_requirements(current_user))
+        .order_by(Requirement.id)
+    )
+    # Feedback is exported as rendered text, as the API returns it
+    return export_response(
+        query, names, format, "requirements",
+        {"ai_feedback": lambda value: render_feedback(value) if value else value}
+    )
+
+@router.get("/export/feedbacks")
+async def export_feedbacks(
+    format: str = "ndjson",
+    current_user: User = Depends(get_current_active_user)
+):
+    """Export researcher feedback on every requirement the user can list, as NDJSON or CSV"""
+    names = list(FEEDBACK_FIELDS)
+    query = (
+        select(*[FEEDBACK_FIELDS[name].label(name) for name in names])
+        .join(Requirement, Feedback.requirement_id == Requirement.id)
+        .where(visible_requirements(current_user))
+        .order_by(Feedback.id)
+    )
+    return export_response(query, names, format, "feedbacks")
+
+def read_records(upload: UploadFile, format: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Parse an uploaded file lazily into (line, record, error) triples"""
+    text = codecs.getreader("utf-8-sig")(upload.file)
+    if format == "csv":
+        # The reader's line_num doesn't count a row it fails on, so lines are counted here
+        lines_read = 0
+
+        def counted_lines():
+            nonlocal lines_read
+            for line in text:
+                lines_read += 1
+                yield line
+
+        reader = csv.DictReader(counted_lines())
+        error_line = None
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as exc:
+                # The reader has moved past the bad row, so the rows after it are still
+                # read; an error that consumed no input would only repeat, so it ends the file
+                if lines_read == error_line:
+                    return
+                error_line = lines_read
+                yield lines_read, None, f"Invalid CSV: {exc}"
+                continue
+            yield reader.line_num, record, None
+
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
+
+def import_values(record: dict) -> dict:
+    """Validate an imported record, returning the requirement's columns or raising ValueError"""
+    values = {}
+    for field in IMPORT_REQUIRED_FIELDS:
+        value = record.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"Missing {field}")
+        values[field] = value
+
+    expected_output = record.get("expected_output")
+    if expected_output is not None and not isinstance(expected_output, str):
+        raise ValueError("Invalid expected_output")
+    # CSV has no nulls, so empty optional fields count as missing
+    values["expected_output"] = expected_output or None
+
+    deadline = record.get("deadline")
+    values["deadline"] = None
+    if deadline:
+        try:
+            values["deadline"] = stored_datetime(datetime.fromisoformat(str(deadline).replace('Z', '+00:00')))
+        except ValueError:
+            raise ValueError("Invalid deadline")
+    return values
+
+async def analyze_batch(valid: List[dict]) -> Optional[list]:
+    """Score a batch, retrying with backoff while the analyzer is busy; None if it stays busy"""
+    delay = IMPORT_RETRY_DELAY
+    for attempt in range(IMPORT_BUSY_RETRIES + 1):
+        try:
+            return await analysis_executor.run(valid, True, method="analyze_many")
+        except AnalyzerBusyError:
+            if attempt < IMPORT_BUSY_RETRIES:
+                await asyncio.sleep(delay)
+                delay *= 2
+    return None
+
+@router.post("/import/requirements")
+async def import_requirements(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Import requirements from an NDJSON or CSV file
+
+    Rows are scored in batches and inserted one batch per transaction. Invalid rows are
+    reported by line number and skipped; the rest of the file is still imported. A batch
+    that finds the analyzer busy is retried with backoff; if it stays busy, that batch
+    and every row after it are reported as failed, keeping the batches already imported.
+    Each committed batch is announced to open dashboards as one change event.
+    """
+    if current_user.role != "pm":
+        raise HTTPException(
+            status_code=403,
+            detail="Only PMs can import requirements"
+        )
+
+    if format is None:
+        format = "csv" if (file.filename or "").lower().endswith(".csv") else "ndjson"
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid format, expected one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    records = read_records(file, format)
+    imported = 0
+    failed = 0
+    errors = []
+    busy = False
+
+    def fail(line: int, error: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_ERRORS:
+            errors.append({"line": line, "error": error})
+
+    while True:
+        # Parsing reads the spooled upload from disk, so it runs off the event loop
+        batch = await asyncio.to_thread(lambda: list(islice(records, IMPORT_BATCH_SIZE)))
+        if not batch:
+            break
+
+        valid = []
+        lines = []
+        for line, record, error in batch:
+            if error is None:
+                try:
+                    valid.append(import_values(record))
+                    lines.append(line)
+                    continue
+                except ValueError as exc:
+                    error = str(exc)
+            fail(line, error)
+        if not valid:
+            continue
+
+        # One vectorized analysis call per batch; feedback is stored in its coded form
+        scores = None if busy else await analyze_batch(valid)
+        if scores is None:
+            busy = True
+            for line in lines:
+                fail(line, "Not imported: analysis queue is full, please retry the remaining rows")
+            continue
+
+        rows = [
+            {
+                **values,
+                "creator_id": current_user.id,
+                "clarity_score": clarity_score,
+                "feasibility_score": feasibility_score,
+                "completeness_score": completeness_score,
+                "ai_feedback": ai_feedback
+            }
+            for values, (clarity_score, feasibility_score, completeness_score, ai_feedback)
+            in zip(valid, scores)
+        ]
+
+        # One executemany INSERT and commit per batch
+        async with SessionLocal() as session:
+            result = await session.execute(insert(Requirement).returning(Requirement.id), rows)
+            ids = result.scalars().all()
+            await session.commit()
+        imported += len(rows)
+        # One event per batch rather than per row; open lists reload once. The batch is new
+        # and unassigned, so it is seen like a created requirement, by no single follower
+        change_hub.publish("requirements.imported", max(ids), {"ids": sorted(ids)}, 0, current_user.id)
+
+    return {
+        "imported": imported,
+        "failed": failed,
+        "errors": errors,
+        "errors_truncated": failed > len(errors)
+    }
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from typing import Optional
+from ..database import get_read_db
+from ..models.models import User, Requirement
+from ..auth import get_current_active_user
+from ..notifications import change_hub
+from .requirements import visible_requirements
+
+router = APIRouter()
+
+@router.get("/events")
+async def stream_events(
+    requirement_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Stream changes to the requirements visible to the user as Server-Sent Events
+
+    With requirement_id, only changes to that requirement and its feedback are sent.
+    """
+    if requirement_id is not None:
+        result = await db.execute(
+            select(Requirement.id).filter(Requirement.id == requirement_id, visible_requirements(current_user))
+        )
+        if result.scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Requirement not found"
+            )
+    # The session would otherwise stay open, holding its connection and read snapshot,
+    # until the stream ends
+    await db.close()
+    
+    return StreamingResponse(
+        change_hub.stream(current_user.id, current_user.role, requirement_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/events/stats")
+async def get_event_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get subscriber, delivery and queue overflow counters of the change notifications"""
+    return change_hub.stats()
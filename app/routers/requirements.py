@@ -1,14 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Body, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Body, Form, Query, Request
+from fastapi.responses import StreamingResponse, FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import outerjoin
+from sqlalchemy import outerjoin, and_, or_, case, func, insert, delete
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timezone
 from pydantic import BaseModel
-from ..database import get_db
-from ..models.models import User, Requirement, Feedback
+import base64
+import json
+from ..database import get_db, get_read_db
+from ..models.models import User, Requirement, Feedback, RequirementFile
 from ..auth import get_current_active_user
-from ..ai_service import analyze_requirement
+from ..serialization import row_serializer, json_response
+from ..http_cache import entity_tag, is_not_modified, not_modified, validators
+from ..ai_service import (
+    analyze_requirement,
+    analyze_requirement_coded,
+    stream_requirement_analysis,
+    reanalyze_requirement,
+    remember_analysis_inputs,
+    analyzer,
+    analysis_cache,
+    analysis_executor,
+    llm_analyzer,
+    AnalyzerBusyError,
+    with_file_count
+)
+from ..uploads import upload_store
+from ..notifications import change_hub
 
 router = APIRouter()
 
@@ -29,6 +48,17 @@ class RequirementVerify(BaseModel):
     business_goal: str
     data_scope: str
     expected_output: Optional[str] = None
+    # Number of files that will be uploaded with the requirement
+    file_count: int = 0
+
+class RequirementVerifyIncremental(BaseModel):
+    analysis_token: str
+    title: Optional[str] = None
+    priority: Optional[str] = None
+    business_goal: Optional[str] = None
+    data_scope: Optional[str] = None
+    expected_output: Optional[str] = None
+    file_count: Optional[int] = None
 
 class RequirementUpdate(BaseModel):
     title: Optional[str] = None
@@ -39,6 +69,28 @@ class RequirementUpdate(BaseModel):
     deadline: Optional[datetime] = None
     assigned_to_id: Optional[int] = None
 
+def stored_datetime(value: Optional[datetime]) -> Optional[datetime]:
+    """A datetime as the database keeps it: naive UTC, like created_at"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def visible_requirements(user: User):
+    """Filter for the requirements a user can list"""
+    if user.role == "pm":
+        # PMs see their own requirements
+        return Requirement.creator_id == user.id
+    # Researchers see requirements assigned to them and unassigned ones
+    return (Requirement.assigned_to_id == user.id) | (Requirement.assigned_to_id == None)
+
+def requirement_response(values, assigned_email: Optional[str] = None) -> dict:
+    """Build the API representation of a requirement from a model or a dict of its columns"""
+    get = values.get if isinstance(values, dict) else lambda name: getattr(values, name)
+    names = tuple(REQUIREMENT_FIELDS)
+    return row_serializer(names)(
+        [get(name) for name in names[:-1]] + [assigned_email]
+    )
+
 @router.post("/requirements/")
 async def create_requirement(
     title: str = Form(...),
@@ -61,54 +113,61 @@ async def create_requirement(
     deadline_dt = None
     if deadline and deadline.strip():
         try:
-            deadline_dt = datetime.fromisoformat(deadline.replace('Z', '+00:00'))
+            deadline_dt = stored_datetime(datetime.fromisoformat(deadline.replace('Z', '+00:00')))
         except (ValueError, TypeError):
             # Handle invalid date format
             pass
         
-    # Process uploaded files (if needed)
-    file_info = []
-    if files:
-        for file in files:
-            # In a real app, you would save the file content to disk or cloud storage
-            # Here we just store the filename and size
-            file_info.append(f"{file.filename} ({len(await file.read()) / 1024:.1f} KB)")
-            # Reset file position after reading
-            await file.seek(0)
-    
-    # Append file information to data_scope if files were uploaded
-    if file_info:
-        data_scope = f"{data_scope} - Files: {', '.join(file_info)}"
+    # Attachments are streamed to content-addressed storage and recorded in their own
+    # table; the analyzer only needs to know how many there are
+    stored_files = await upload_store.save_all([file for file in files or [] if file.filename])
         
-    # Use AI service to analyze requirement
-    clarity_score, feasibility_score, completeness_score, ai_feedback = await analyze_requirement(
+    # Use AI service to analyze requirement; feedback is stored in its compact coded form
+    clarity_score, feasibility_score, completeness_score, ai_feedback = await analyze_requirement_coded(
         title,
         business_goal,
-        data_scope,
+        with_file_count(data_scope, len(stored_files)),
         expected_output,
         priority
     )
     
-    requirement = Requirement(
-        creator_id=current_user.id,
-        title=title,
-        priority=priority,
-        business_goal=business_goal,
-        data_scope=data_scope,
-        expected_output=expected_output,
-        deadline=deadline_dt,
-        clarity_score=clarity_score,
-        feasibility_score=feasibility_score,
-        completeness_score=completeness_score,
-        ai_feedback=ai_feedback
-    )
+    values = {
+        "creator_id": current_user.id,
+        "title": title,
+        "priority": priority,
+        "business_goal": business_goal,
+        "data_scope": data_scope,
+        "expected_output": expected_output,
+        "deadline": deadline_dt,
+        "created_at": datetime.utcnow(),
+        "clarity_score": clarity_score,
+        "feasibility_score": feasibility_score,
+        "completeness_score": completeness_score,
+        "ai_feedback": ai_feedback
+    }
     
+    # Inserted without building a model instance; the response comes from the same values
     async with db as session:
-        session.add(requirement)
+        result = await session.execute(insert(Requirement).values(values).returning(Requirement.id))
+        values["id"] = result.scalar_one()
+        if stored_files:
+            # One executemany INSERT for the file metadata
+            await session.execute(insert(RequirementFile), [
+                {
+                    "requirement_id": values["id"],
+                    "filename": stored_file.filename,
+                    "content_type": stored_file.content_type,
+                    "size": stored_file.size,
+                    "sha256": stored_file.sha256
+                }
+                for stored_file in stored_files
+            ])
         await session.commit()
-        await session.refresh(requirement)
         
-    return requirement
+    response = requirement_response(values)
+    # New requirements are unassigned, so every researcher's list may show them
+    change_hub.publish("requirement.created", values["id"], response, values["id"], current_user.id)
+    return json_response(response)
 
 @router.post("/verify-requirement/")
 async def verify_requirement(
@@ -122,9 +181,9 @@ async def verify_requirement(
             detail="Only PMs can verify requirements"
         )
     
-    # For verification, we don't actually process files, just 
-    # acknowledge their existence in the data_scope field
-    data_scope = req.data_scope
+    # For verification, we don't actually process files, just count them into the
+    # data scope the same way create does, so creating the requirement reuses this analysis
+    data_scope = with_file_count(req.data_scope, req.file_count)
     
     # Set default empty string for expected_output if None
     expected_output = req.expected_output if req.expected_output is not None else ""
@@ -138,57 +197,321 @@ async def verify_requirement(
         req.priority
     )
     
+    analysis_token = remember_analysis_inputs(
+        req.title,
+        req.business_goal,
+        req.data_scope,
+        expected_output,
+        req.priority,
+        req.file_count
+    )
+    
     return {
         "clarity_score": clarity_score,
         "feasibility_score": feasibility_score,
         "completeness_score": completeness_score,
-        "ai_feedback": ai_feedback
+        "ai_feedback": ai_feedback,
+        "analysis_token": analysis_token
     }
 
+@router.post("/verify-requirement/stream")
+async def verify_requirement_stream(
+    req: RequirementVerify,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Verify a requirement, streaming scores and then each feedback section as Server-Sent Events"""
+    if current_user.role != "pm":
+        raise HTTPException(
+            status_code=403,
+            detail="Only PMs can verify requirements"
+        )
+    
+    expected_output = req.expected_output if req.expected_output is not None else ""
+    
+    async def events():
+        try:
+            async for event, data in stream_requirement_analysis(
+                req.title,
+                req.business_goal,
+                with_file_count(req.data_scope, req.file_count),
+                expected_output,
+                req.priority
+            ):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except AnalyzerBusyError as exc:
+            # The response has already started, so report overload as an event instead of a 503
+            yield f"event: error\ndata: {json.dumps({'detail': str(exc)})}\n\n"
+            return
+        
+        analysis_token = remember_analysis_inputs(
+            req.title,
+            req.business_goal,
+            req.data_scope,
+            expected_output,
+            req.priority,
+            req.file_count
+        )
+        yield f"event: done\ndata: {json.dumps({'analysis_token': analysis_token})}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/verify-requirement/incremental")
+async def verify_requirement_incremental(
+    req: RequirementVerifyIncremental,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Re-verify a previously verified requirement, sending only the changed fields"""
+    if current_user.role != "pm":
+        raise HTTPException(
+            status_code=403,
+            detail="Only PMs can verify requirements"
+        )
+    
+    # Only the fields the client sent are changed; a cleared expected output arrives as null
+    changes = req.dict(exclude_unset=True, exclude={"analysis_token"})
+    if "expected_output" in changes:
+        changes["expected_output"] = changes["expected_output"] or ""
+    changes = {field: value for field, value in changes.items() if value is not None}
+    
+    result = await reanalyze_requirement(req.analysis_token, changes)
+    if result is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Analysis token is unknown or expired, please verify the full requirement"
+        )
+    
+    analysis_token, (clarity_score, feasibility_score, completeness_score, ai_feedback) = result
+    return {
+        "clarity_score": clarity_score,
+        "feasibility_score": feasibility_score,
+        "completeness_score": completeness_score,
+        "ai_feedback": ai_feedback,
+        "analysis_token": analysis_token
+    }
+
+@router.get("/analysis/cache-stats")
+async def get_analysis_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get hit/miss counters of the analysis result cache and the per-section memo"""
+    return {**analysis_cache.stats(), "sections": analyzer.section_stats()}
+
+@router.get("/analysis/executor-stats")
+async def get_analysis_executor_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get queue and throughput counters of the analysis executor and the LLM backend"""
+    return {
+        **analysis_executor.stats(),
+        "llm": llm_analyzer.stats() if llm_analyzer is not None else None
+    }
+
+# Columns a requirement list can return, in response order
+REQUIREMENT_FIELDS = {
+    "id": Requirement.id,
+    "creator_id": Requirement.creator_id,
+    "title": Requirement.title,
+    "priority": Requirement.priority,
+    "business_goal": Requirement.business_goal,
+    "data_scope": Requirement.data_scope,
+    "expected_output": Requirement.expected_output,
+    "deadline": Requirement.deadline,
+    "created_at": Requirement.created_at,
+    "clarity_score": Requirement.clarity_score,
+    "feasibility_score": Requirement.feasibility_score,
+    "completeness_score": Requirement.completeness_score,
+    "ai_feedback": Requirement.ai_feedback,
+    "assigned_to_id": Requirement.assigned_to_id,
+    "assigned_to": User.email
+}
+
+# Columns of a feedback, in response order
+FEEDBACK_FIELDS = {
+    "id": Feedback.id,
+    "requirement_id": Feedback.requirement_id,
+    "researcher_id": Feedback.researcher_id,
+    "content": Feedback.content,
+    "created_at": Feedback.created_at
+}
+
+# view=summary leaves out the large text columns, which GET /requirements/{id} returns
+SUMMARY_FIELDS = [
+    "id", "creator_id", "title", "priority", "deadline", "created_at",
+    "clarity_score", "feasibility_score", "completeness_score", "assigned_to_id", "assigned_to"
+]
+
+def requirement_fields(view: str, fields: Optional[str]) -> List[str]:
+    """Resolve the view and fields= options of a list request into column names"""
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in REQUIREMENT_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        # The id is always returned so rows can be linked to the detail endpoint
+        return [name for name in REQUIREMENT_FIELDS if name == "id" or name in names]
+    if view == "summary":
+        return SUMMARY_FIELDS
+    if view == "full":
+        return list(REQUIREMENT_FIELDS)
+    raise HTTPException(
+        status_code=400,
+        detail="Invalid view, expected 'full' or 'summary'"
+    )
+
+# Sort orders for the requirement list; every order ends with id so the keyset is unique
+PRIORITY_RANK = case(
+    (Requirement.priority == "High", 3),
+    (Requirement.priority == "Medium", 2),
+    (Requirement.priority == "Low", 1),
+    else_=0
+)
+REQUIREMENT_SORTS = {
+    "created_desc": [(Requirement.created_at, "desc"), (Requirement.id, "desc")],
+    "created_asc": [(Requirement.created_at, "asc"), (Requirement.id, "asc")],
+    "priority_high": [(PRIORITY_RANK, "desc"), (Requirement.created_at, "desc"), (Requirement.id, "desc")],
+    "priority_low": [(PRIORITY_RANK, "asc"), (Requirement.created_at, "desc"), (Requirement.id, "desc")]
+}
+
+def encode_cursor(values: list) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_keys: list) -> list:
+    """Decode a cursor back into sort key values, raising 400 if it doesn't fit the sort order"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(sort_keys):
+            raise ValueError("cursor does not match the sort order")
+        decoded = []
+        for (column, _), value in zip(sort_keys, values):
+            # created_at is an ISO timestamp; the id and the priority rank are integers
+            if column is Requirement.created_at and isinstance(value, str):
+                decoded.append(datetime.fromisoformat(value))
+            elif column is not Requirement.created_at and type(value) is int:
+                decoded.append(value)
+            else:
+                raise ValueError("cursor value does not match its sort key")
+        return decoded
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid cursor"
+        )
+
+def keyset_condition(sort_keys: list, values: list):
+    """Rows that come strictly after the given sort key values in the sort order"""
+    conditions = []
+    for i, (column, direction) in enumerate(sort_keys):
+        after = column < values[i] if direction == "desc" else column > values[i]
+        conditions.append(and_(*[sort_keys[j][0] == values[j] for j in range(i)], after))
+    return or_(*conditions)
+
 @router.get("/requirements/")
 async def get_requirements(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    sort: str = "created_desc",
+    priority: Optional[str] = None,
+    assigned_to_id: Optional[int] = None,
+    unassigned: bool = False,
+    min_clarity: Optional[float] = None,
+    max_clarity: Optional[float] = None,
+    min_feasibility: Optional[float] = None,
+    max_feasibility: Optional[float] = None,
+    min_completeness: Optional[float] = None,
+    max_completeness: Optional[float] = None,
+    deadline_from: Optional[datetime] = None,
+    deadline_to: Optional[datetime] = None,
+    include_total: bool = False,
+    view: str = "full",
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
+    """Get one page of requirements, newest first by default
+
+    Pass the returned next_cursor back as cursor to get the following page. view=summary
+    or a comma-separated fields= list limits the columns selected and returned. Send the
+    returned ETag as If-None-Match to get a 304 while nothing in the list has changed.
+    """
+    names = requirement_fields(view, fields)
+    sort_keys = REQUIREMENT_SORTS.get(sort)
+    if sort_keys is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort, expected one of: {', '.join(REQUIREMENT_SORTS)}"
+        )
+    
+    filters = [visible_requirements(current_user)]
+    if priority:
+        filters.append(Requirement.priority == priority)
+    if unassigned:
+        filters.append(Requirement.assigned_to_id == None)
+    elif assigned_to_id is not None:
+        filters.append(Requirement.assigned_to_id == assigned_to_id)
+    for column, low, high in (
+        (Requirement.clarity_score, min_clarity, max_clarity),
+        (Requirement.feasibility_score, min_feasibility, max_feasibility),
+        (Requirement.completeness_score, min_completeness, max_completeness)
+    ):
+        if low is not None:
+            filters.append(column >= low)
+        if high is not None:
+            filters.append(column <= high)
+    if deadline_from is not None:
+        filters.append(Requirement.deadline >= stored_datetime(deadline_from))
+    if deadline_to is not None:
+        filters.append(Requirement.deadline <= stored_datetime(deadline_to))
+    
+    # Only the requested columns are selected, so unused text columns are never read
+    query = select(
+        *[REQUIREMENT_FIELDS[name].label(name) for name in names],
+        *[column.label(f"sort_key_{i}") for i, (column, _) in enumerate(sort_keys)]
+    ).select_from(Requirement).where(*filters)
+    if "assigned_to" in names:
+        query = query.outerjoin(User, Requirement.assigned_to_id == User.id)
+    if cursor:
+        query = query.where(keyset_condition(sort_keys, decode_cursor(cursor, sort_keys)))
+    # Fetch one extra row to know whether there is a next page
+    query = query.order_by(*[
+        column.desc() if direction == "desc" else column.asc() for column, direction in sort_keys
+    ]).limit(limit + 1)
+    
     async with db as session:
-        if current_user.role == "pm":
-            # PMs see their own requirements
-            query = select(Requirement, User.email.label("assigned_email")).outerjoin(
-                User, Requirement.assigned_to_id == User.id
-            ).where(Requirement.creator_id == current_user.id)
-            result = await session.execute(query)
-        else:
-            # Researchers see requirements assigned to them and unassigned ones
-            query = select(Requirement, User.email.label("assigned_email")).outerjoin(
-                User, Requirement.assigned_to_id == User.id
-            ).where(
-                (Requirement.assigned_to_id == current_user.id) | 
-                (Requirement.assigned_to_id == None)
-            )
-            result = await session.execute(query)
-            
-        requirements_with_assignment = []
-        for req, assigned_email in result:
-            req_dict = {
-                "id": req.id,
-                "creator_id": req.creator_id,
-                "title": req.title,
-                "priority": req.priority,
-                "business_goal": req.business_goal,
-                "data_scope": req.data_scope,
-                "expected_output": req.expected_output,
-                "deadline": req.deadline,
-                "created_at": req.created_at,
-                "clarity_score": req.clarity_score,
-                "feasibility_score": req.feasibility_score,
-                "completeness_score": req.completeness_score,
-                "ai_feedback": req.ai_feedback,
-                "assigned_to_id": req.assigned_to_id,
-                "assigned_to": assigned_email
-            }
-            requirements_with_assignment.append(req_dict)
+        # Any insert, update or delete among the filtered requirements changes their
+        # newest updated_at or their count; both come from an index without reading rows
+        last_modified, count = (await session.execute(
+            select(func.max(Requirement.updated_at), func.count()).select_from(Requirement).where(*filters)
+        )).one()
+        etag = entity_tag("requirements", current_user.id, request.url.query, last_modified, count)
+        # No Last-Modified for collections: deleting a row other than the newest leaves
+        # max(updated_at) as it was, so only the ETag, which includes the count, can tell
+        if is_not_modified(request, etag, None):
+            return not_modified(etag, None)
+        
+        rows = (await session.execute(query)).all()
         
-    return requirements_with_assignment
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        # The sort keys are the columns after the returned ones
+        next_cursor = encode_cursor(list(rows[-1][len(names):]))
+    
+    # Rows map straight to items; the sort keys at the end of each row are left out
+    return json_response({
+        "items": row_serializer(tuple(names)).many(rows),
+        "next_cursor": next_cursor,
+        "total": count if include_total else None
+    }, headers=validators(etag, None))
 
 @router.post("/requirements/{requirement_id}/feedback")
 async def create_feedback(
@@ -204,34 +527,39 @@ async def create_feedback(
         )
         
     async with db as session:
-        # Check if requirement exists
+        # Check if requirement exists, loading who can see the change event
         result = await session.execute(
-            select(Requirement).filter(Requirement.id == requirement_id)
+            select(Requirement.creator_id, Requirement.assigned_to_id).filter(Requirement.id == requirement_id)
         )
-        requirement = result.scalar_one_or_none()
+        requirement = result.one_or_none()
         
-        if not requirement:
+        if requirement is None:
             raise HTTPException(
                 status_code=404,
                 detail="Requirement not found"
             )
             
-        feedback_obj = Feedback(
-            requirement_id=requirement_id,
-            researcher_id=current_user.id,
-            content=feedback.content
-        )
-        
-        session.add(feedback_obj)
+        values = {
+            "requirement_id": requirement_id,
+            "researcher_id": current_user.id,
+            "content": feedback.content,
+            "created_at": datetime.utcnow()
+        }
+        result = await session.execute(insert(Feedback).values(values).returning(Feedback.id))
+        values["id"] = result.scalar_one()
         await session.commit()
-        await session.refresh(feedback_obj)
         
-    return feedback_obj
+    response = row_serializer(tuple(FEEDBACK_FIELDS))([values[name] for name in FEEDBACK_FIELDS])
+    change_hub.publish(
+        "feedback.created", values["id"], response, requirement_id,
+        requirement.creator_id, (requirement.assigned_to_id,)
+    )
+    return json_response(response)
 
 @router.get("/researchers/")
 async def get_researchers(
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all researchers for assignment"""
     if current_user.role != "pm":
@@ -242,58 +570,48 @@ async def get_researchers(
         
     async with db as session:
         result = await session.execute(
-            select(User).filter(User.role == "researcher")
+            select(User.id, User.email).filter(User.role == "researcher")
         )
-        researchers = result.scalars().all()
         
-    return [{"id": user.id, "email": user.email} for user in researchers]
+    return json_response(row_serializer(("id", "email")).many(result))
 
 @router.get("/requirements/{requirement_id}")
 async def get_requirement(
+    request: Request,
     requirement_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a single requirement by ID"""
     
-    result = await db.execute(select(Requirement).filter(Requirement.id == requirement_id))
-    requirement = result.scalar_one_or_none()
+    # Select the response columns, with the assigned researcher's email, straight into a
+    # row; updated_at comes last, for the validators only
+    names = tuple(REQUIREMENT_FIELDS)
+    result = await db.execute(
+        select(*[REQUIREMENT_FIELDS[name].label(name) for name in names], Requirement.updated_at)
+        .outerjoin(User, Requirement.assigned_to_id == User.id)
+        .filter(Requirement.id == requirement_id)
+    )
+    row = result.one_or_none()
     
-    if not requirement:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Requirement not found"
         )
     
     # If user is a researcher, verify they can access this requirement
-    if current_user.role == "researcher" and requirement.assigned_to_id != current_user.id and requirement.assigned_to_id is not None:
+    if current_user.role == "researcher" and row.assigned_to_id != current_user.id and row.assigned_to_id is not None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to access this requirement"
         )
     
-    # Get the assigned researcher if exists
-    assigned_user = None
-    if requirement.assigned_to_id:
-        result = await db.execute(select(User).filter(User.id == requirement.assigned_to_id))
-        assigned_user = result.scalar_one_or_none()
-    
-    return {
-        "id": requirement.id,
-        "title": requirement.title,
-        "priority": requirement.priority,
-        "business_goal": requirement.business_goal,
-        "data_scope": requirement.data_scope,
-        "expected_output": requirement.expected_output,
-        "clarity_score": requirement.clarity_score,
-        "feasibility_score": requirement.feasibility_score,
-        "completeness_score": requirement.completeness_score,
-        "ai_feedback": requirement.ai_feedback,
-        "deadline": requirement.deadline,
-        "created_at": requirement.created_at,
-        "assigned_to_id": requirement.assigned_to_id,
-        "assigned_to": assigned_user.email if assigned_user else None
-    }
+    # A single row costs no more to load than to check, so only the encoding is saved
+    etag = entity_tag("requirement", row.id, row.updated_at)
+    if is_not_modified(request, etag, row.updated_at):
+        return not_modified(etag, row.updated_at)
+    return json_response(row_serializer(names)(row), headers=validators(etag, row.updated_at))
 
 # Legacy helper functions - keeping these for fallback
 def calculate_clarity_score(business_goal: str, data_scope: str) -> float:
@@ -360,41 +678,60 @@ async def update_requirement(
         )
         
     async with db as session:
-        # Check if requirement exists and belongs to the current user
+        # Check if requirement exists and belongs to the current user, loading the
+        # assignee's email for the response at the same time
         result = await session.execute(
-            select(Requirement).filter(
+            select(Requirement, User.email)
+            .outerjoin(User, Requirement.assigned_to_id == User.id)
+            .filter(
                 Requirement.id == requirement_id,
                 Requirement.creator_id == current_user.id
             )
         )
-        requirement = result.scalar_one_or_none()
+        row = result.one_or_none()
         
-        if not requirement:
+        if not row:
             raise HTTPException(
                 status_code=404,
                 detail="Requirement not found or you don't have permission to edit it"
             )
+        requirement, assigned_email = row
             
         # Update fields if provided
         update_dict = update_data.dict(exclude_unset=True)
-        for field, value in update_dict.items():
-            if field == 'assigned_to_id' and value is not None:
+        if "deadline" in update_dict:
+            # The response comes from this object, so it must hold what the database reads back
+            update_dict["deadline"] = stored_datetime(update_dict["deadline"])
+        if "assigned_to_id" in update_dict:
+            assigned_to_id = update_dict["assigned_to_id"]
+            assigned_email = None
+            if assigned_to_id is not None:
                 # Verify that the assigned user exists and is a researcher
-                user_result = await session.execute(
-                    select(User).filter(User.id == value, User.role == "researcher")
+                result = await session.execute(
+                    select(User.email).filter(User.id == assigned_to_id, User.role == "researcher")
                 )
-                user = user_result.scalar_one_or_none()
-                if not user:
+                assigned_email = result.scalar_one_or_none()
+                if assigned_email is None:
                     raise HTTPException(
                         status_code=400,
                         detail="Invalid user ID or user is not a researcher"
                     )
+        previous_assignee = requirement.assigned_to_id
+        for field, value in update_dict.items():
             setattr(requirement, field, value)
         
+        # Sessions don't expire on commit, so the updated object needs no refresh
         await session.commit()
-        await session.refresh(requirement)
         
-    return requirement
+    if update_dict:
+        changed = dict(update_dict)
+        if "assigned_to_id" in changed:
+            changed["assigned_to"] = assigned_email
+        change_hub.publish(
+            "requirement.updated", requirement.id, changed, requirement.id,
+            requirement.creator_id, (previous_assignee, requirement.assigned_to_id)
+        )
+    return json_response(requirement_response(requirement, assigned_email))
 
 @router.delete("/requirements/{requirement_id}")
 async def delete_requirement(
@@ -425,46 +762,116 @@ async def delete_requirement(
                 detail="Requirement not found or you don't have permission to delete it"
             )
             
-        # Delete the requirement
+        # Delete the requirement and its file metadata; the stored blobs may be shared
+        # with other requirements, so they stay on disk
+        await session.execute(delete(RequirementFile).where(RequirementFile.requirement_id == requirement.id))
         await session.delete(requirement)
         await session.commit()
         
+    change_hub.publish(
+        "requirement.deleted", requirement.id, {}, requirement.id,
+        requirement.creator_id, (requirement.assigned_to_id,)
+    )
     return {"id": requirement.id, "message": "Requirement deleted successfully"}
 
 @router.get("/requirements/{requirement_id}/feedbacks")
 async def get_requirement_feedbacks(
+    request: Request,
     requirement_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all feedbacks for a specific requirement"""
     
-    # Check if requirement exists
-    result = await db.execute(select(Requirement).filter(Requirement.id == requirement_id))
-    requirement = result.scalar_one_or_none()
+    # Validators first: the requirement outer-joined to its feedbacks and aggregated, so
+    # a requirement without feedbacks still returns a row and a missing one returns none
+    result = await db.execute(
+        select(func.max(Feedback.updated_at), func.count(Feedback.id))
+        .select_from(Requirement)
+        .outerjoin(Feedback, Feedback.requirement_id == Requirement.id)
+        .filter(Requirement.id == requirement_id)
+        .group_by(Requirement.id)
+    )
+    aggregate = result.one_or_none()
     
-    if not requirement:
+    if aggregate is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Requirement not found"
         )
+    last_modified, count = aggregate
+    etag = entity_tag("feedbacks", requirement_id, last_modified, count)
+    # Validated by ETag only, as for the requirement list
+    if is_not_modified(request, etag, None):
+        return not_modified(etag, None)
     
-    # Get all feedbacks for this requirement
     result = await db.execute(
-        select(Feedback)
+        select(Feedback.id, Feedback.content, Feedback.researcher_id, Feedback.created_at)
         .filter(Feedback.requirement_id == requirement_id)
         .order_by(Feedback.created_at.desc())
     )
     
-    feedbacks = result.scalars().all()
+    return json_response(
+        row_serializer(("id", "content", "researcher_id", "created_at")).many(result),
+        headers=validators(etag, None)
+    )
+
+@router.get("/requirements/{requirement_id}/files")
+async def get_requirement_files(
+    requirement_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """List the files attached to a requirement"""
+    
+    # One query, outer-joined like the feedbacks so a requirement without files is not a 404
+    names = ("id", "filename", "content_type", "size", "sha256", "created_at")
+    result = await db.execute(
+        select(*[getattr(RequirementFile, name) for name in names])
+        .select_from(Requirement)
+        .outerjoin(RequirementFile, RequirementFile.requirement_id == Requirement.id)
+        .filter(Requirement.id == requirement_id, visible_requirements(current_user))
+        .order_by(RequirementFile.id)
+    )
+    rows = result.all()
     
-    # Convert to response format
-    return [
-        {
-            "id": feedback.id,
-            "content": feedback.content,
-            "researcher_id": feedback.researcher_id,
-            "created_at": feedback.created_at
-        }
-        for feedback in feedbacks
-    ] 
\ No newline at end of file
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Requirement not found"
+        )
+    
+    serialize = row_serializer(names)
+    return json_response([serialize(row) for row in rows if row.id is not None])
+
+@router.get("/requirements/{requirement_id}/files/{file_id}")
+async def download_requirement_file(
+    requirement_id: int,
+    file_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Download a file attached to a requirement"""
+    result = await db.execute(
+        select(RequirementFile)
+        .join(Requirement, RequirementFile.requirement_id == Requirement.id)
+        .filter(
+            RequirementFile.id == file_id,
+            Requirement.id == requirement_id,
+            visible_requirements(current_user)
+        )
+    )
+    file = result.scalar_one_or_none()
+    
+    if not file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    # Served from disk in chunks, like it was stored
+    return FileResponse(
+        upload_store.path(file.sha256),
+        media_type=file.content_type or "application/octet-stream",
+        filename=file.filename
+    )
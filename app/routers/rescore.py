@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+import datetime
+from ..database import get_db, get_read_db
+from ..models.models import User, RescoreJob
+from ..auth import get_current_active_user
+from ..rescore import rescore_runner, create_rescore_job, can_manage_rescore
+
+router = APIRouter()
+
+@router.post("/rescore-jobs/")
+async def start_rescore_job(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Start a background job that re-scores every stored requirement"""
+    if not can_manage_rescore(current_user):
+        raise HTTPException(
+            status_code=403,
+            detail="Only re-scoring administrators can start re-scoring jobs"
+        )
+    
+    job = await create_rescore_job(current_user.id)
+    if job is None:
+        async with db as session:
+            result = await session.execute(
+                select(RescoreJob.id).filter(RescoreJob.status == "running")
+            )
+            running_id = result.scalars().first()
+        raise HTTPException(
+            status_code=409,
+            detail=f"Re-scoring job {running_id} is already running"
+        )
+    rescore_runner.start(job.id)
+    return rescore_runner.progress(job)
+
+@router.get("/rescore-jobs/")
+async def get_rescore_jobs(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get the most recent re-scoring jobs"""
+    async with db as session:
+        result = await session.execute(
+            select(RescoreJob).order_by(RescoreJob.id.desc()).limit(20)
+        )
+        jobs = result.scalars().all()
+        
+    return [rescore_runner.progress(job) for job in jobs]
+
+@router.get("/rescore-jobs/{job_id}")
+async def get_rescore_job(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get progress and throughput of a re-scoring job"""
+    job = await db.get(RescoreJob, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Re-scoring job not found"
+        )
+    return rescore_runner.progress(job)
+
+@router.post("/rescore-jobs/{job_id}/cancel")
+async def cancel_rescore_job(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Cancel a running re-scoring job; chunks already written are kept"""
+    if not can_manage_rescore(current_user):
+        raise HTTPException(
+            status_code=403,
+            detail="Only re-scoring administrators can cancel re-scoring jobs"
+        )
+        
+    async with db as session:
+        job = await session.get(RescoreJob, job_id)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Re-scoring job not found"
+            )
+        if job.status == "running":
+            job.status = "cancelled"
+            job.finished_at = datetime.datetime.utcnow()
+            job.updated_at = job.finished_at
+            await session.commit()
+        rescore_runner.cancel(job_id)
+        
+    return rescore_runner.progress(job)
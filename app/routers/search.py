@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_read_db
+from ..models.models import User
+from ..auth import get_current_active_user
+from ..search import search
+
+router = APIRouter()
+
+@router.get("/search")
+async def search_requirements(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Search the requirements (and their researcher feedback) visible to the user"""
+    async with db as session:
+        results = await search(session, current_user, q, limit + 1, offset)
+        
+    # One extra result is fetched to tell whether another page exists
+    return {
+        "items": results[:limit],
+        "next_offset": offset + limit if len(results) > limit else None
+    }
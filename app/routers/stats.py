@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_read_db
+from ..models.models import User
+from ..auth import get_current_active_user
+from ..serialization import json_response
+from ..stats import read_stats
+
+router = APIRouter()
+
+@router.get("/stats")
+async def get_stats(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get counts by priority and status, average scores and overdue deadlines of the user's requirements"""
+    async with db as session:
+        stats = await read_stats(session, current_user)
+    return json_response(stats)
@@ -0,0 +1,186 @@
+"""
+Full-text search over requirements and researcher feedback.
+
+Requirement titles, business goals and data scopes, and feedback content, are indexed
+in SQLite FTS5 tables kept up to date by triggers (see migrations 3 and 9). The text
+is indexed unstemmed, with prefix indexes, so the partly typed last word of an
+as-you-type query matches the words that start with it. Rebuild the index of an
+existing database, for example after restoring a backup, with:
+
+    python -m app.search rebuild
+
+and compare the index against a LIKE scan on a synthetic database with:
+
+    python -m app.search benchmark [rows]
+"""
+import asyncio
+import html
+import random
+import re
+import sys
+import time
+from typing import List, Optional
+from sqlalchemy import create_engine, text
+from .database import engine
+
+# Snippet delimiters; snippets are HTML-escaped before they become <mark> tags
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+# Column weights for ranking requirement matches: title, business goal, data scope
+REQUIREMENT_WEIGHTS = (10.0, 4.0, 1.0)
+
+SEARCH_SQL = """
+SELECT 'requirement' AS kind, r.id AS requirement_id, NULL AS feedback_id, r.title AS title,
+       snippet(requirements_fts, -1, :start, :end, '…', 16) AS snippet,
+       bm25(requirements_fts, {weights}) AS rank
+FROM requirements_fts
+JOIN requirements r ON r.id = requirements_fts.rowid
+WHERE requirements_fts MATCH :query AND {access}
+UNION ALL
+SELECT 'feedback' AS kind, r.id AS requirement_id, f.id AS feedback_id, r.title AS title,
+       snippet(feedbacks_fts, 0, :start, :end, '…', 16) AS snippet,
+       bm25(feedbacks_fts) AS rank
+FROM feedbacks_fts
+JOIN feedbacks f ON f.id = feedbacks_fts.rowid
+JOIN requirements r ON r.id = f.requirement_id
+WHERE feedbacks_fts MATCH :query AND {access}
+ORDER BY rank, requirement_id, feedback_id
+LIMIT :limit OFFSET :offset
+"""
+
+# Which requirements a user may see, as in the requirement list
+PM_ACCESS = "r.creator_id = :user_id"
+RESEARCHER_ACCESS = "(r.assigned_to_id = :user_id OR r.assigned_to_id IS NULL)"
+
+def match_expression(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query matching all of its words
+
+    Words are quoted so FTS5 operators in user input are searched as text, and the last
+    word matches as a prefix so partially typed words still find results.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+def highlight(snippet: str) -> str:
+    """HTML-escape a snippet and mark the matched words"""
+    return html.escape(snippet or "").replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>")
+
+async def search(session, user, query: str, limit: int = 20, offset: int = 0) -> List[dict]:
+    """Ranked requirement and feedback matches visible to the user, best first"""
+    expression = match_expression(query)
+    if expression is None:
+        return []
+
+    access = PM_ACCESS if user.role == "pm" else RESEARCHER_ACCESS
+    statement = text(SEARCH_SQL.format(
+        weights=", ".join(str(weight) for weight in REQUIREMENT_WEIGHTS),
+        access=access
+    ))
+    result = await session.execute(statement, {
+        "query": expression,
+        "user_id": user.id,
+        "start": HIGHLIGHT_START,
+        "end": HIGHLIGHT_END,
+        "limit": limit,
+        "offset": offset
+    })
+    return [
+        {
+            "kind": row.kind,
+            "requirement_id": row.requirement_id,
+            "feedback_id": row.feedback_id,
+            "title": row.title,
+            "snippet": highlight(row.snippet),
+            "rank": row.rank
+        }
+        for row in result
+    ]
+
+def rebuild_search_index(conn) -> None:
+    """Re-index every requirement and feedback from the content tables"""
+    conn.exec_driver_sql("INSERT INTO requirements_fts (requirements_fts) VALUES ('rebuild')")
+    conn.exec_driver_sql("INSERT INTO feedbacks_fts (feedbacks_fts) VALUES ('rebuild')")
+    conn.exec_driver_sql("INSERT INTO requirements_fts (requirements_fts) VALUES ('optimize')")
+    conn.exec_driver_sql("INSERT INTO feedbacks_fts (feedbacks_fts) VALUES ('optimize')")
+
+BENCHMARK_WORDS = (
+    "revenue churn retention conversion dashboard forecast segment cohort pricing funnel "
+    "customer region quarter monthly growth engagement campaign marketing product usage "
+    "analysis model survey report latency inventory supplier logistics margin subscription"
+).split()
+
+def benchmark(rows: int = 100000, queries: int = 50) -> None:
+    """Time FTS5 searches against LIKE scans over a synthetic in-memory database"""
+    from .migrations import run_migrations
+
+    rng = random.Random(0)
+    bench_engine = create_engine("sqlite://")
+    with bench_engine.begin() as conn:
+        run_migrations(conn)
+
+        # Mostly common words with a long tail of rarer ones, like real text
+        rare_words = [f"{word}{i}" for i in range(200) for word in BENCHMARK_WORDS[:25]]
+
+        def random_word():
+            return rng.choice(BENCHMARK_WORDS) if rng.random() < 0.8 else rng.choice(rare_words)
+
+        def sentence(length):
+            return " ".join(random_word() for _ in range(length))
+
+        started = time.perf_counter()
+        conn.exec_driver_sql(
+            "INSERT INTO requirements (creator_id, title, priority, business_goal, data_scope, created_at) "
+            "VALUES (1, ?, 'Medium', ?, ?, CURRENT_TIMESTAMP)",
+            [(sentence(5), sentence(40), sentence(15)) for _ in range(rows)]
+        )
+        print(f"Inserted and indexed {rows} requirements in {time.perf_counter() - started:.1f}s")
+
+        terms = [f"{rng.choice(BENCHMARK_WORDS)} {rng.choice(rare_words)}" for _ in range(queries)]
+
+        started = time.perf_counter()
+        for term in terms:
+            conn.execute(
+                text(
+                    "SELECT rowid FROM requirements_fts WHERE requirements_fts MATCH :query "
+                    "ORDER BY bm25(requirements_fts) LIMIT 20"
+                ),
+                {"query": match_expression(term)}
+            ).all()
+        fts_ms = (time.perf_counter() - started) * 1000 / queries
+
+        started = time.perf_counter()
+        for term in terms:
+            conditions = " AND ".join(
+                f"(title LIKE :w{i} OR business_goal LIKE :w{i} OR data_scope LIKE :w{i})"
+                for i in range(len(term.split()))
+            )
+            # Without an index every row is read; ranking needs all matches anyway
+            conn.execute(
+                text(f"SELECT id FROM requirements WHERE {conditions}"),
+                {f"w{i}": f"%{word}%" for i, word in enumerate(term.split())}
+            ).all()
+        like_ms = (time.perf_counter() - started) * 1000 / queries
+
+    print(f"FTS5 ranked search: {fts_ms:.2f} ms/query")
+    print(f"LIKE scan (all matches, unranked): {like_ms:.2f} ms/query")
+
+async def main(argv: List[str]) -> int:
+    command = argv[0] if argv else None
+    if command == "rebuild":
+        async with engine.begin() as conn:
+            await conn.run_sync(rebuild_search_index)
+        print("Search index rebuilt")
+        return 0
+    if command == "benchmark":
+        benchmark(int(argv[1]) if len(argv) > 1 else 100000)
+        return 0
+    print("Usage: python -m app.search rebuild | benchmark [rows]")
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
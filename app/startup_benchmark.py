@@ -0,0 +1,54 @@
+"""
+Startup benchmark: time from launching the server process to its first response.
+
+    python -m app.startup_benchmark [runs]
+
+Each run starts `uvicorn app.main:app` on a free port with the current environment and
+polls GET / until it answers. Run it against an existing database to measure a warm
+boot, or point DATABASE_URL at a new file to include schema creation.
+"""
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def time_to_first_request(timeout: float = 60.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            while time.perf_counter() - started < timeout:
+                try:
+                    if client.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+        raise TimeoutError("Server did not answer in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main(argv) -> int:
+    runs = int(argv[0]) if argv else 5
+    timings = [time_to_first_request() for _ in range(runs)]
+    print(
+        f"Time to first request over {runs} runs: "
+        f"median {statistics.median(timings) * 1000:.0f} ms, "
+        f"min {min(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
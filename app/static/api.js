@@ -0,0 +1,104 @@
+// Helpers shared by the page scripts: cached JSON requests and the change stream.
+
+function authHeaders() {
+    return { 'Authorization': `Bearer ${localStorage.getItem('token')}` };
+}
+
+// Last response and ETag of each GET, so unchanged data is revalidated with
+// If-None-Match and answered with a 304 instead of being downloaded again
+const cachedResponses = new Map();
+async function fetchJson(url) {
+    const cached = cachedResponses.get(url);
+    const headers = authHeaders();
+    if (cached) {
+        headers['If-None-Match'] = cached.etag;
+    }
+    // no-store keeps the browser cache out of the way, so the 304 reaches us
+    const response = await fetch(url, { headers, cache: 'no-store' });
+    if (response.status === 304 && cached) {
+        return { ok: true, data: cached.data };
+    }
+    if (!response.ok) {
+        return { ok: false, data: null };
+    }
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (etag) {
+        cachedResponses.set(url, { etag, data });
+    }
+    return { ok: true, data };
+}
+
+// Follows /api/events, calling onChange with each change event the user can see.
+// The stream is read with fetch so the token goes in the Authorization header;
+// it reconnects after a drop, and onReady runs on every (re)connection. A stream
+// following one requirement ends with onRemoved once it is deleted or no longer visible
+let changesConnected = false;
+async function subscribeToChanges(url, onChange, onReady, onRemoved) {
+    let removed = false;
+    while (!removed) {
+        try {
+            const response = await fetch(url, {
+                headers: authHeaders(),
+                cache: 'no-store'
+            });
+            if (response.status >= 400 && response.status < 500) {
+                // Not allowed to follow these changes; pages reload after their own actions
+                return;
+            }
+            if (!response.ok) {
+                throw new Error(`Event stream returned ${response.status}`);
+            }
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+
+            const handleEvent = (rawEvent) => {
+                let event = 'message';
+                let data = '';
+                for (const line of rawEvent.split('\n')) {
+                    if (line.startsWith('event: ')) {
+                        event = line.slice(7);
+                    } else if (line.startsWith('data: ')) {
+                        data += line.slice(6);
+                    }
+                }
+                if (!data) {
+                    // Keepalive comment
+                    return;
+                }
+                if (event === 'change') {
+                    onChange(JSON.parse(data));
+                } else if (event === 'ready' || event === 'resync') {
+                    // Connected, or fell behind and lost events: catch up once
+                    changesConnected = true;
+                    onReady();
+                } else if (event === 'removed') {
+                    removed = true;
+                    if (onRemoved) {
+                        onRemoved(JSON.parse(data));
+                    }
+                }
+            };
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) {
+                    break;
+                }
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+                    handleEvent(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                }
+            }
+        } catch (error) {
+            console.error('Change stream error:', error);
+        }
+        changesConnected = false;
+        if (!removed) {
+            await new Promise(resolve => setTimeout(resolve, 5000));
+        }
+    }
+}
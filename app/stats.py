@@ -0,0 +1,182 @@
+"""
+Dashboard statistics per PM and per researcher.
+
+The requirement_stats table holds running totals of the requirements each PM created
+and each researcher is assigned (user_id 0 holds the unassigned pool): counts by
+priority and assignment, and score sums for the averages. SQLite triggers (see
+migration 7) adjust the totals inside the transaction of every insert, delete and
+relevant update, whichever code path makes it, so reading them is a primary key lookup
+rather than a scan of the requirements table. The triggers are SQLite only, so
+migration 7 refuses to run against other databases rather than leave the totals
+unmaintained. Overdue counts depend on the clock, so they are counted from the
+(user, deadline) indexes instead, reading only the overdue entries.
+
+Rebuild the totals from the requirements table, reporting the rows that had drifted
+(for example after restoring a backup or editing the database by hand), with:
+
+    python -m app.stats reconcile
+"""
+import asyncio
+import datetime
+import sys
+from typing import Dict, List, Tuple
+from sqlalchemy import case, func, or_, select
+from .database import engine
+from .models.models import Requirement, RequirementStats
+
+# Summed score columns, whose averages the API returns
+SCORES = ("clarity", "feasibility", "completeness")
+
+# Columns that change a requirement's contribution to the totals
+COUNTED_COLUMNS = (
+    "creator_id", "assigned_to_id", "priority", "clarity_score", "feasibility_score", "completeness_score"
+)
+
+def _contribution(row: str, sign: int) -> str:
+    """The VALUES of one requirement's contribution, added (sign 1) or removed (sign -1)"""
+    return ", ".join([
+        f"{sign}",
+        f"{sign} * ({row}.priority = 'High')",
+        f"{sign} * ({row}.priority = 'Medium')",
+        f"{sign} * ({row}.priority = 'Low')",
+        f"{sign} * ({row}.assigned_to_id IS NOT NULL)",
+        *(f"{sign} * coalesce({row}.{score}_score, 0)" for score in SCORES)
+    ])
+
+def _upsert(scope: str, user: str, row: str, sign: int) -> str:
+    return (
+        "INSERT INTO requirement_stats (scope, user_id, total, high, medium, low, assigned, "
+        "clarity_sum, feasibility_sum, completeness_sum) "
+        f"VALUES ('{scope}', coalesce({row}.{user}, 0), {_contribution(row, sign)}) "
+        "ON CONFLICT (scope, user_id) DO UPDATE SET "
+        "total = total + excluded.total, high = high + excluded.high, "
+        "medium = medium + excluded.medium, low = low + excluded.low, "
+        "assigned = assigned + excluded.assigned, "
+        "clarity_sum = clarity_sum + excluded.clarity_sum, "
+        "feasibility_sum = feasibility_sum + excluded.feasibility_sum, "
+        "completeness_sum = completeness_sum + excluded.completeness_sum;"
+    )
+
+def _apply(row: str, sign: int) -> str:
+    return _upsert("creator", "creator_id", row, sign) + " " + _upsert("assignee", "assigned_to_id", row, sign)
+
+def create_stats_triggers(conn) -> None:
+    """Keep requirement_stats in step with every write to requirements"""
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS requirement_stats_insert AFTER INSERT ON requirements BEGIN "
+        f"{_apply('new', 1)} END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS requirement_stats_delete AFTER DELETE ON requirements BEGIN "
+        f"{_apply('old', -1)} END"
+    )
+    # Edits of the text fields and deadline leave the totals alone
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS requirement_stats_update "
+        f"AFTER UPDATE OF {', '.join(COUNTED_COLUMNS)} ON requirements BEGIN "
+        f"{_apply('old', -1)} {_apply('new', 1)} END"
+    )
+
+def _aggregate(user_column):
+    """The totals of a scope computed from the requirements table"""
+    return (
+        select(
+            func.coalesce(user_column, 0),
+            func.count(),
+            func.count(case((Requirement.priority == "High", 1))),
+            func.count(case((Requirement.priority == "Medium", 1))),
+            func.count(case((Requirement.priority == "Low", 1))),
+            func.count(Requirement.assigned_to_id),
+            *(func.total(getattr(Requirement, f"{score}_score")) for score in SCORES)
+        )
+        .group_by(func.coalesce(user_column, 0))
+    )
+
+STAT_COLUMNS = ("total", "high", "medium", "low", "assigned", "clarity_sum", "feasibility_sum", "completeness_sum")
+
+def reconcile_stats(conn) -> int:
+    """Rebuild requirement_stats from the requirements table, returning how many rows differed"""
+    current: Dict[Tuple[str, int], tuple] = {
+        (row[0], row[1]): tuple(row[2:])
+        for row in conn.execute(select(
+            RequirementStats.scope, RequirementStats.user_id,
+            *(getattr(RequirementStats, name) for name in STAT_COLUMNS)
+        ))
+    }
+    rebuilt: Dict[Tuple[str, int], tuple] = {}
+    for scope, user_column in (("creator", Requirement.creator_id), ("assignee", Requirement.assigned_to_id)):
+        for row in conn.execute(_aggregate(user_column)):
+            rebuilt[(scope, row[0])] = tuple(row[1:])
+
+    def same(a: tuple, b: tuple) -> bool:
+        # Score sums may differ in the last bits after many incremental updates
+        return all(abs((x or 0) - (y or 0)) < 1e-6 for x, y in zip(a, b))
+
+    empty = (0,) * len(STAT_COLUMNS)
+    differing = sum(
+        1 for key in current.keys() | rebuilt.keys()
+        if not same(current.get(key, empty), rebuilt.get(key, empty))
+    )
+
+    conn.execute(RequirementStats.__table__.delete())
+    if rebuilt:
+        conn.execute(RequirementStats.__table__.insert(), [
+            {"scope": scope, "user_id": user_id, **dict(zip(STAT_COLUMNS, values))}
+            for (scope, user_id), values in rebuilt.items()
+        ])
+    return differing
+
+def _summary(row) -> dict:
+    values = {name: getattr(row, name) if row is not None else 0 for name in STAT_COLUMNS}
+    total = values["total"]
+    return {
+        "total": total,
+        "by_priority": {"High": values["high"], "Medium": values["medium"], "Low": values["low"]},
+        "by_status": {"assigned": values["assigned"], "unassigned": total - values["assigned"]},
+        "average_scores": {
+            score: round(values[f"{score}_sum"] / total, 4) if total else None
+            for score in SCORES
+        }
+    }
+
+async def read_stats(session, user) -> dict:
+    """The totals of the requirements a user works with, from the summary table"""
+    now = datetime.datetime.utcnow()
+    if user.role == "pm":
+        scope, user_ids = "creator", [user.id]
+        visible = Requirement.creator_id == user.id
+    else:
+        scope, user_ids = "assignee", [user.id, 0]
+        visible = or_(Requirement.assigned_to_id == user.id, Requirement.assigned_to_id == None)
+
+    result = await session.execute(
+        select(RequirementStats).filter(RequirementStats.scope == scope, RequirementStats.user_id.in_(user_ids))
+    )
+    rows = {row.user_id: row for row in result.scalars()}
+
+    # Only the overdue entries of the user's (user, deadline) index are read
+    overdue = await session.scalar(
+        select(func.count()).select_from(Requirement).filter(visible, Requirement.deadline < now)
+    )
+
+    if user.role == "pm":
+        stats = _summary(rows.get(user.id))
+    else:
+        stats = {
+            "assigned": _summary(rows.get(user.id)),
+            "unassigned_pool": _summary(rows.get(0))
+        }
+    stats["overdue"] = overdue
+    return stats
+
+async def main(argv: List[str]) -> int:
+    if argv and argv[0] == "reconcile":
+        async with engine.begin() as conn:
+            differing = await conn.run_sync(reconcile_stats)
+        print(f"Requirement stats rebuilt ({differing} rows corrected)")
+        return 0
+    print("Usage: python -m app.stats reconcile")
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
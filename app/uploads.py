@@ -0,0 +1,114 @@
+"""
+Content-addressed storage for requirement attachments.
+
+Uploads are copied to disk in fixed-size chunks and hashed on the way, so a file is
+never held in memory whole. Each file is stored once under its SHA-256 digest:
+
+    UPLOAD_DIR/objects/<first two hex digits>/<sha256>
+
+so uploading the same content again, by anyone, adds a metadata row but no new blob.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional
+from fastapi import HTTPException, UploadFile
+
+# Upload settings, overridable through environment variables
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_MAX_FILE_SIZE = int(os.getenv("UPLOAD_MAX_FILE_SIZE", str(100 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_SIZE = int(os.getenv("UPLOAD_MAX_REQUEST_SIZE", str(500 * 1024 * 1024)))
+
+class UploadTooLargeError(Exception):
+    """Raised with the whole size of the rejected file"""
+
+    def __init__(self, size: int):
+        super().__init__(size)
+        self.size = size
+
+@dataclass
+class StoredFile:
+    filename: str
+    content_type: Optional[str]
+    size: int
+    sha256: str
+
+class UploadStore:
+    """Streams uploads into content-addressed blobs under a root directory"""
+
+    def __init__(self, root: str, chunk_size: int, max_file_size: int, max_request_size: int):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.max_file_size = max_file_size
+        self.max_request_size = max_request_size
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, "objects", sha256[:2], sha256)
+
+    def _copy(self, source, limit: int) -> tuple:
+        """Copy a file object to a temporary blob, returning (temp path, size, sha256)"""
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = source.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > limit:
+                        # The upload was already received, so its end gives the whole size
+                        raise UploadTooLargeError(source.seek(0, os.SEEK_END))
+                    digest.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path, size, digest.hexdigest()
+
+    def _commit(self, tmp_path: str, sha256: str) -> None:
+        """Move a temporary blob to its content address, unless that content is already stored"""
+        path = self.path(sha256)
+        if os.path.exists(path):
+            os.unlink(tmp_path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+
+    async def save(self, upload: UploadFile, limit: Optional[int] = None) -> StoredFile:
+        """Store one upload, raising UploadTooLargeError past the per-file limit or `limit` bytes"""
+        limit = self.max_file_size if limit is None else min(limit, self.max_file_size)
+        # The whole copy runs in one worker thread, as the spooled upload is a blocking file
+        await upload.seek(0)
+        tmp_path, size, sha256 = await asyncio.to_thread(self._copy, upload.file, limit)
+        await asyncio.to_thread(self._commit, tmp_path, sha256)
+        return StoredFile(upload.filename or "", upload.content_type, size, sha256)
+
+    async def save_all(self, uploads: List[UploadFile]) -> List[StoredFile]:
+        """Store the files of one request, responding 413 when a size limit is exceeded
+
+        Blobs already stored for a rejected request are left in place; another request
+        may have matched them in the meantime.
+        """
+        stored: List[StoredFile] = []
+        remaining = self.max_request_size
+        for upload in uploads:
+            try:
+                stored_file = await self.save(upload, remaining)
+            except UploadTooLargeError as error:
+                if error.size > self.max_file_size:
+                    detail = f"{upload.filename} exceeds the limit of {self.max_file_size} bytes per file"
+                else:
+                    detail = f"Uploads exceed the limit of {self.max_request_size} bytes per request"
+                raise HTTPException(status_code=413, detail=detail)
+            stored.append(stored_file)
+            remaining -= stored_file.size
+        return stored
+
+upload_store = UploadStore(UPLOAD_DIR, UPLOAD_CHUNK_SIZE, UPLOAD_MAX_FILE_SIZE, UPLOAD_MAX_REQUEST_SIZE)
@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+# The app reads its settings at import, so they are set before anything imports it
+_tmp = tempfile.mkdtemp(prefix="clarifai-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmp}/test.db"
+os.environ["UPLOAD_DIR"] = os.path.join(_tmp, "uploads")
+os.environ["QUERY_STATS_HEADER"] = "1"
+os.environ["RESCORE_ADMIN_EMAILS"] = "pm@test.com"
+os.environ["RESCORE_RETRY_DELAY"] = "0.01"
+
+import httpx
+import pytest
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+async def app():
+    from app.main import app as application
+    await application.router.startup()
+    try:
+        yield application
+    finally:
+        await application.router.shutdown()
+
+@pytest.fixture
+async def client(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+async def login(client, email: str) -> dict:
+    """Authorization headers for one of the seeded test accounts"""
+    response = await client.post("/api/token", data={"username": email, "password": "password123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+async def pm_headers(client):
+    return await login(client, "pm@test.com")
+
+@pytest.fixture
+async def researcher_headers(client):
+    return await login(client, "researcher@test.com")
@@ -0,0 +1,52 @@
+import pytest
+from app import ai_service
+from app.ai_service import LLMRequirementAnalyzer, analysis_cache, analyze_requirement_coded
+
+pytestmark = pytest.mark.anyio
+
+async def test_verify_then_create_reuses_the_analysis(client, pm_headers):
+    # The dashboard's payloads: verify sends the file names and count as JSON, create
+    # sends the same names as the data scope along with the files themselves
+    fields = {
+        "title": "Quarterly churn drivers",
+        "priority": "High",
+        "business_goal": "Find the drivers of churn in the premium segment to protect revenue",
+        "expected_output": "Actionable Insights"
+    }
+    verify = await client.post(
+        "/api/verify-requirement/",
+        json={**fields, "data_scope": "usage.csv, plans.csv", "file_count": 2},
+        headers=pm_headers
+    )
+    assert verify.status_code == 200
+
+    hits = analysis_cache.hits
+    create = await client.post(
+        "/api/requirements/",
+        data={**fields, "data_scope": "usage.csv, plans.csv"},
+        files=[("files", ("usage.csv", b"a,b\n1,2\n")), ("files", ("plans.csv", b"c\n3\n"))],
+        headers=pm_headers
+    )
+    assert create.status_code == 200
+    assert analysis_cache.hits == hits + 1
+    for score in ("clarity_score", "feasibility_score", "completeness_score"):
+        assert create.json()[score] == verify.json()[score]
+
+class FailingCompletions:
+    async def create(self, **kwargs):
+        raise TimeoutError("model timed out")
+
+class FailingClient:
+    class chat:
+        completions = FailingCompletions()
+
+async def test_fallback_results_are_not_cached(monkeypatch):
+    async def fallback(*args):
+        return (0.5, 0.5, 0.5, "fallback")
+
+    llm = LLMRequirementAnalyzer(FailingClient(), model="test", fallback=fallback, batch_window=0)
+    monkeypatch.setattr(ai_service, "llm_analyzer", llm)
+    args = ("Fallback title", "Fallback goal", "scope", "", "Medium")
+
+    assert await analyze_requirement_coded(*args) == (0.5, 0.5, 0.5, "fallback")
+    assert analysis_cache.get(ai_service.requirement_key(*args)) is None
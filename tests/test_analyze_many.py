@@ -0,0 +1,41 @@
+import random
+from app.ai_service import RequirementAnalyzer, with_file_count
+
+FIELDS = ("title", "business_goal", "data_scope", "expected_output", "priority")
+
+def requirements(count: int):
+    rng = random.Random(1)
+    words = (
+        "churn revenue retention conversion rate premium segment regression analysis forecast "
+        "kpi users q3 reduce improve the of why which cohort ab test background"
+    ).split()
+    for _ in range(count):
+        goal = " ".join(rng.choice(words) for _ in range(rng.randint(0, 120)))
+        yield (
+            " ".join(rng.choice(words) for _ in range(rng.randint(0, 14))),
+            goal.replace(" background ", ".\n\nBackground: "),
+            with_file_count(rng.choice(["", "usage.csv", "Files: 0 files"]), rng.randint(0, 3)),
+            rng.choice(["", "Actionable Insights", "Dashboard", "Predictive Model", "Custom thing"]),
+            rng.choice(["High", "Medium", "Low"])
+        )
+
+def test_batch_matches_one_at_a_time():
+    analyzer = RequirementAnalyzer(deterministic=True)
+    rows = list(requirements(400))
+    batch = analyzer.analyze_many([dict(zip(FIELDS, row)) for row in rows], with_feedback=True)
+    assert batch == [analyzer.analyze_coded(*row) for row in rows]
+
+def test_batch_builds_feedback_only_where_asked():
+    analyzer = RequirementAnalyzer(deterministic=True)
+    rows = list(requirements(50))
+    flags = [i % 3 == 0 for i in range(len(rows))]
+    batch = analyzer.analyze_many([dict(zip(FIELDS, row)) for row in rows], with_feedback=flags)
+    for row, flag, result in zip(rows, flags, batch):
+        single = analyzer.analyze_coded(*row)
+        assert result == (single if flag else single[:3] + (None,))
+
+def test_batch_treats_missing_fields_as_empty():
+    analyzer = RequirementAnalyzer(deterministic=True)
+    batch = analyzer.analyze_many([{"title": "Churn drivers", "business_goal": "Reduce churn"}], with_feedback=True)
+    assert batch == [analyzer.analyze_coded("Churn drivers", "Reduce churn", "", "", "Medium")]
+    assert analyzer.analyze_many([]) == []
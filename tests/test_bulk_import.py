@@ -0,0 +1,109 @@
+import orjson
+import pytest
+from app.ai_service import AnalyzerBusyError, analysis_executor
+from app.auth import decode_access_token
+from app.notifications import change_hub
+from app.routers import bulk
+
+pytestmark = pytest.mark.anyio
+
+HEADER = "title,priority,business_goal,data_scope\n"
+
+def csv_rows(*titles):
+    return "".join(f"{title},Medium,Import goal,x\n" for title in titles)
+
+def user_id(headers) -> int:
+    return decode_access_token(headers["Authorization"].split()[1])["uid"]
+
+async def subscribe(*args, **kwargs):
+    """Start a change stream, returning it with its subscriber"""
+    before = set(change_hub._subscribers)
+    events = change_hub.stream(*args, **kwargs)
+    assert (await events.__anext__()).startswith(b"event: ready")
+    (subscriber,) = change_hub._subscribers - before
+    return events, subscriber
+
+def queued_changes(subscriber) -> list:
+    changes = []
+    while not subscriber.queue.empty():
+        changes.append(orjson.loads(subscriber.queue.get_nowait().split(b"data: ", 1)[1]))
+    return changes
+
+async def test_malformed_csv_row_is_reported_and_skipped(client, pm_headers):
+    oversized = "y" * 200000
+    content = HEADER + csv_rows("First") + f"Broken,Medium,{oversized},x\n" + csv_rows("Last")
+    response = await client.post(
+        "/api/import/requirements",
+        files={"file": ("requirements.csv", content.encode())},
+        headers=pm_headers
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert report["errors"][0]["line"] == 3
+    assert report["errors"][0]["error"].startswith("Invalid CSV")
+
+async def test_busy_analyzer_fails_the_remaining_rows(client, pm_headers, monkeypatch):
+    monkeypatch.setattr(bulk, "IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(bulk, "IMPORT_BUSY_RETRIES", 2)
+    monkeypatch.setattr(bulk, "IMPORT_RETRY_DELAY", 0)
+    run = analysis_executor.run
+    calls = 0
+
+    async def busy_after_first_batch(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            raise AnalyzerBusyError("Analysis queue is full, please retry shortly")
+        return await run(*args, **kwargs)
+
+    monkeypatch.setattr(analysis_executor, "run", busy_after_first_batch)
+    events, subscriber = await subscribe(user_id(pm_headers), "pm")
+    content = HEADER + csv_rows("One", "Two", "Three", "Four", "Five")
+    response = await client.post(
+        "/api/import/requirements",
+        files={"file": ("requirements.csv", content.encode())},
+        headers=pm_headers
+    )
+    # Only the committed batch is announced
+    assert [len(change["changed"]["ids"]) for change in queued_changes(subscriber)] == [2]
+    await events.aclose()
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["failed"]) == (2, 3)
+    assert [error["line"] for error in report["errors"]] == [4, 5, 6]
+    # The first busy batch is retried, the rows after it are not sent again
+    assert calls == 1 + 3
+
+async def test_each_imported_batch_is_published_once(client, pm_headers, researcher_headers, monkeypatch):
+    monkeypatch.setattr(bulk, "IMPORT_BATCH_SIZE", 2)
+    streams = {
+        "pm": await subscribe(user_id(pm_headers), "pm"),
+        "researcher": await subscribe(user_id(researcher_headers), "researcher"),
+        "other pm": await subscribe(-1, "pm"),
+        "detail": await subscribe(user_id(pm_headers), "pm", requirement_id=1)
+    }
+    try:
+        content = HEADER + csv_rows("Batch one", "Batch two", "Batch three", "Batch four", "Batch five")
+        response = await client.post(
+            "/api/import/requirements",
+            files={"file": ("requirements.csv", content.encode())},
+            headers=pm_headers
+        )
+        assert response.json()["imported"] == 5
+        changes = {name: queued_changes(subscriber) for name, (_, subscriber) in streams.items()}
+    finally:
+        for events, _ in streams.values():
+            await events.aclose()
+
+    assert [change["kind"] for change in changes["pm"]] == ["requirements.imported"] * 3
+    assert [len(change["changed"]["ids"]) for change in changes["pm"]] == [2, 2, 1]
+    assert all(change["id"] == change["changed"]["ids"][-1] for change in changes["pm"])
+    # Imported requirements are unassigned, so researchers see them too
+    assert changes["researcher"] == changes["pm"]
+    assert changes["other pm"] == changes["detail"] == []
+
+    ids = [requirement_id for change in changes["pm"] for requirement_id in change["changed"]["ids"]]
+    listed = (await client.get("/api/requirements/", params={"fields": "title", "limit": 5}, headers=pm_headers)).json()
+    assert sorted(item["id"] for item in listed["items"]) == ids
+    assert {item["title"] for item in listed["items"]} == {"Batch one", "Batch two", "Batch three", "Batch four", "Batch five"}
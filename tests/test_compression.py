@@ -0,0 +1,70 @@
+import pytest
+from app.compression import COMPRESSION_MIN_SIZE, ENCODERS, choose_encoding, compression_stats
+
+pytestmark = pytest.mark.anyio
+
+@pytest.mark.parametrize("accept_encoding,expected", [
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("deflate", None),
+    ("", None),
+    ("*", next(iter(ENCODERS))),
+    ("*, gzip;q=0", next((coding for coding in ENCODERS if coding != "gzip"), None)),
+    ("gzip;q=bad", None)
+])
+def test_encoding_negotiation(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+@pytest.fixture
+async def large_list(client, pm_headers):
+    created = await client.post(
+        "/api/requirements/",
+        data={
+            "title": "Compressed title", "priority": "High", "data_scope": "x",
+            "business_goal": "Reduce churn in the premium segment and find its drivers. " * 40
+        },
+        headers=pm_headers
+    )
+    yield "/api/requirements/?priority=High"
+    await client.delete(f"/api/requirements/{created.json()['id']}", headers=pm_headers)
+
+async def test_large_json_is_compressed_when_accepted(client, pm_headers, large_list):
+    before = compression_stats.stats()["encodings"].get("gzip", {"responses": 0})["responses"]
+    plain = await client.get(large_list, headers={**pm_headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert len(plain.content) >= COMPRESSION_MIN_SIZE
+
+    compressed = await client.get(large_list, headers={**pm_headers, "Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    # httpx decodes the body; the length on the wire is that of the gzip stream
+    assert int(compressed.headers["content-length"]) < len(plain.content)
+    assert compressed.content == plain.content
+    assert compression_stats.stats()["encodings"]["gzip"]["responses"] == before + 1
+
+async def test_small_bodies_are_sent_as_they_are(client, pm_headers):
+    response = await client.get("/api/auth/cache-stats", headers={**pm_headers, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert len(response.content) < COMPRESSION_MIN_SIZE
+    assert "content-encoding" not in response.headers
+    # The representation still depends on Accept-Encoding once it grows
+    assert response.headers["vary"] == "Accept-Encoding"
+
+async def test_compressed_responses_revalidate_with_their_weak_etag(client, pm_headers, large_list):
+    plain = await client.get(large_list, headers={**pm_headers, "Accept-Encoding": "identity"})
+    compressed = await client.get(large_list, headers={**pm_headers, "Accept-Encoding": "gzip"})
+    strong = plain.headers["etag"]
+    assert not strong.startswith("W/")
+    assert compressed.headers["etag"] == "W/" + strong
+
+    for etag in (compressed.headers["etag"], strong):
+        for accept_encoding in ("gzip", "identity"):
+            response = await client.get(
+                large_list, headers={**pm_headers, "Accept-Encoding": accept_encoding, "If-None-Match": etag}
+            )
+            assert response.status_code == 304
+            assert response.content == b""
+            assert "content-encoding" not in response.headers
@@ -0,0 +1,58 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def create(client, headers, title):
+    response = await client.post(
+        "/api/requirements/",
+        data={"title": title, "priority": "Low", "business_goal": "Revalidate lists", "data_scope": "x"},
+        headers=headers
+    )
+    return response.json()["id"]
+
+async def test_requirement_list_revalidates_by_etag_across_a_delete(client, pm_headers):
+    older = await create(client, pm_headers, "Older conditional")
+    await create(client, pm_headers, "Newer conditional")
+
+    first = await client.get("/api/requirements/", headers=pm_headers)
+    etag = first.headers["etag"]
+    assert "last-modified" not in first.headers
+    unchanged = await client.get("/api/requirements/", headers={**pm_headers, "If-None-Match": etag})
+    assert unchanged.status_code == 304
+
+    # Deleting a row that isn't the newest leaves max(updated_at) as it was
+    await client.delete(f"/api/requirements/{older}", headers=pm_headers)
+    changed = await client.get("/api/requirements/", headers={**pm_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert older not in [item["id"] for item in changed.json()["items"]]
+
+    # If-Modified-Since alone is never enough for a collection
+    since = await client.get(
+        "/api/requirements/", headers={**pm_headers, "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}
+    )
+    assert since.status_code == 200
+
+async def test_single_requirement_honours_both_validators(client, pm_headers):
+    requirement_id = await create(client, pm_headers, "Single conditional")
+    url = f"/api/requirements/{requirement_id}"
+    first = await client.get(url, headers=pm_headers)
+
+    by_etag = await client.get(url, headers={**pm_headers, "If-None-Match": first.headers["etag"]})
+    assert by_etag.status_code == 304
+    by_date = await client.get(url, headers={**pm_headers, "If-Modified-Since": first.headers["last-modified"]})
+    assert by_date.status_code == 304
+
+    await client.put(url, json={"priority": "High"}, headers=pm_headers)
+    after_update = await client.get(url, headers={**pm_headers, "If-None-Match": first.headers["etag"]})
+    assert after_update.status_code == 200
+
+async def test_feedback_list_is_validated_by_etag_only(client, pm_headers, researcher_headers):
+    requirement_id = await create(client, pm_headers, "Feedback conditional")
+    url = f"/api/requirements/{requirement_id}/feedbacks"
+    await client.post(f"/api/requirements/{requirement_id}/feedback", json={"content": "First"}, headers=researcher_headers)
+
+    first = await client.get(url, headers=pm_headers)
+    assert "last-modified" not in first.headers
+    assert (await client.get(url, headers={**pm_headers, "If-None-Match": first.headers["etag"]})).status_code == 304
+    since = await client.get(url, headers={**pm_headers, "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert since.status_code == 200
@@ -0,0 +1,21 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def test_create_and_read_return_the_same_deadline(client, pm_headers):
+    created = await client.post(
+        "/api/requirements/",
+        data={
+            "title": "Deadline title", "priority": "Medium", "business_goal": "Meet the deadline",
+            "data_scope": "x", "deadline": "2030-03-01T18:30:00+02:00"
+        },
+        headers=pm_headers
+    )
+    assert created.status_code == 200
+    detail = f"/api/requirements/{created.json()['id']}"
+    read = await client.get(detail, headers=pm_headers)
+    assert created.json()["deadline"] == read.json()["deadline"] == "2030-03-01T16:30:00"
+
+    updated = await client.put(detail, json={"deadline": "2030-04-01T09:00:00Z"}, headers=pm_headers)
+    read = await client.get(detail, headers=pm_headers)
+    assert updated.json()["deadline"] == read.json()["deadline"] == "2030-04-01T09:00:00"
@@ -0,0 +1,44 @@
+import pytest
+from app.notifications import ChangeHub
+
+pytestmark = pytest.mark.anyio
+
+async def test_requirement_subscription_ends_when_access_is_lost():
+    hub = ChangeHub(queue_size=10)
+    events = hub.stream(user_id=2, role="researcher", requirement_id=7)
+    assert (await events.__anext__()).startswith(b"event: ready")
+
+    hub.publish("requirement.updated", 7, {"priority": "Low"}, 7, creator_id=1, assignees=(None, 2))
+    assert b'"priority":"Low"' in await events.__anext__()
+
+    # Reassigned to another researcher: the subscriber is told and its stream ends
+    hub.publish("requirement.updated", 7, {"assigned_to_id": 3}, 7, creator_id=1, assignees=(2, 3))
+    assert await events.__anext__() == b'event: removed\ndata: {"id":7}\n\n'
+    with pytest.raises(StopAsyncIteration):
+        await events.__anext__()
+    assert hub.stats()["subscribers"] == 0
+
+async def test_requirement_subscription_ends_when_deleted():
+    hub = ChangeHub(queue_size=10)
+    pm_detail = hub.stream(user_id=1, role="pm", requirement_id=7)
+    pm_list = hub.stream(user_id=1, role="pm")
+    await pm_detail.__anext__()
+    await pm_list.__anext__()
+
+    hub.publish("requirement.deleted", 7, {}, 7, creator_id=1, assignees=(None,))
+    assert (await pm_detail.__anext__()).startswith(b"event: removed")
+    with pytest.raises(StopAsyncIteration):
+        await pm_detail.__anext__()
+    assert b'"kind":"requirement.deleted"' in await pm_list.__anext__()
+    await pm_list.aclose()
+
+async def test_other_requirements_are_not_delivered():
+    hub = ChangeHub(queue_size=10)
+    events = hub.stream(user_id=2, role="researcher", requirement_id=7)
+    await events.__anext__()
+
+    hub.publish("requirement.updated", 8, {"assigned_to_id": 3}, 8, creator_id=1, assignees=(2, 3))
+    hub.publish("feedback.created", 5, {"content": "Done"}, 7, creator_id=1, assignees=(2,))
+    assert b'"requirement_id":7' in await events.__anext__()
+    assert hub.stats()["removed"] == 0
+    await events.aclose()
@@ -0,0 +1,94 @@
+import random
+import pytest
+from app.ai_service import RequirementAnalyzer, with_file_count
+from app.feedback_messages import encode_feedback, render_feedback
+
+# The feedback sentences and layout the analyzer produced before feedback was stored coded
+LEGACY_SENTENCES = {
+    "C": "Requirement analysis results are based primarily on title descriptiveness and business goal clarity. Supporting Files, Expected Output, and Deadline are optional fields and do not affect the Clarity Score.",
+    "O1": "\n\n📊 Overall assessment: Your requirement definition is very comprehensive, and researchers can start working immediately.",
+    "O2": "\n\n📊 Overall assessment: Your requirement is generally reasonable, but there are some areas that could be further optimized.",
+    "O3": "\n\n📊 Overall assessment: Your requirement definition needs significant improvement before researchers can understand and begin working on it.",
+    "T1": "Title is too short. Consider providing a more descriptive title to help researchers better understand the requirement content.",
+    "T2": "Title is quite long. Consider making it more concise to highlight the key points.",
+    "T3": "Title is not specific enough. Try using more descriptive words to clearly express the core objective of the requirement.",
+    "G1": "Business goal description is too brief. Consider elaborating on the business context, specific objectives, and expected business value.",
+    "G2": "Business goal lacks specific business metrics. Consider clearly defining the key performance indicators (KPIs) that need to be improved or tracked.",
+    "G3": "Structure of the business goal could be improved. Consider breaking it down into sections describing business context, specific problems, and solution expectations.",
+    "D1": "You've uploaded {0} supporting file(s). This will help researchers better understand your requirements.",
+    "D2": "You've indicated file uploads, but no files were detected. This is optional and won't affect your clarity score.",
+    "D3": "No supporting files were uploaded. This is optional and won't affect your clarity score.",
+    "E1": "No expected output has been specified. While this is optional for requirement verification, specifying an expected output could provide researchers with clearer guidance.",
+    "E2": "The selected expected output is not among standard options. Consider selecting one of the standard options for better clarity.",
+    "E3": "Note: The selected expected output and priority combination is uncommon. You may want to reconsider either, but this won't affect your requirement's clarity score.",
+    "Z1": "\n\n✅ Your requirement definition is already good. Only minor adjustments are needed to further improve clarity.",
+    "Z2": "\n\n⚠️ Adjusting your requirement based on the above feedback can significantly improve researchers' understanding and implementation efficiency."
+}
+LEGACY_HEADINGS = {
+    "T": "\n\n📝 Title feedback:\n• ",
+    "G": "\n\n🎯 Business goal feedback:\n• ",
+    "D": "\n\n📁 Data scope feedback:\n• ",
+    "E": "\n\n📈 Expected output feedback:\n• "
+}
+
+def legacy_text(coded: str) -> str:
+    """Assemble feedback text the way the analyzer did before, from a coded value"""
+    sentences = {section: [] for section in "COTGDEZ"}
+    for item in coded.split(":", 1)[1].split(";"):
+        code, _, params = item.partition("=")
+        sentences[code[0]].append(LEGACY_SENTENCES[code].format(*params.split(",")))
+    text = "".join(sentences["C"] + sentences["O"])
+    for section, heading in LEGACY_HEADINGS.items():
+        if sentences[section]:
+            text += heading + "\n• ".join(sentences[section])
+    return text + "".join(sentences["Z"])
+
+def requirements(count: int = 500):
+    rng = random.Random(0)
+    words = (
+        "churn revenue retention conversion rate premium segment regression analysis forecast "
+        "kpi users q3 reduce improve the of why which cohort ab test background problem"
+    ).split()
+    for _ in range(count):
+        goal = " ".join(rng.choice(words) for _ in range(rng.randint(0, 120)))
+        yield (
+            " ".join(rng.choice(words) for _ in range(rng.randint(0, 14))),
+            goal.replace(" background ", ".\n\nBackground: "),
+            with_file_count(rng.choice(["", "usage.csv", "Files: 0 files"]), rng.randint(0, 3)),
+            rng.choice(["", "Actionable Insights", "Dashboard", "Predictive Model", "Custom thing"]),
+            rng.choice(["High", "Medium", "Low"])
+        )
+
+def test_coded_feedback_renders_the_legacy_text():
+    analyzer = RequirementAnalyzer(deterministic=True)
+    seen = set()
+    for args in requirements():
+        *_, coded = analyzer.analyze_coded(*args)
+        assert render_feedback(coded) == legacy_text(coded)
+        assert analyzer.analyze(*args)[3] == legacy_text(coded)
+        seen.update(item.partition("=")[0] for item in coded.split(":", 1)[1].split(";"))
+    # The overall praise is rare; T2 and E1 cannot be reached with the current scores
+    assert seen >= set(LEGACY_SENTENCES) - {"O1", "T2", "E1"}
+
+def test_every_message_renders_its_legacy_sentence():
+    for code in LEGACY_SENTENCES:
+        item = code + "=4" if code == "D1" else code
+        codes = {"C": "C", "O": "O2", code[0]: item, "Z": "Z2"}
+        coded = encode_feedback([codes[section] for section in "COTGDEZ" if section in codes])
+        assert render_feedback(coded) == legacy_text(coded)
+
+def test_pinned_analyzer_text():
+    analyzer = RequirementAnalyzer(deterministic=True)
+    feedback = analyzer.analyze("Churn", "Reduce churn", "usage.csv", "Custom thing", "High")[3]
+    assert feedback == (
+        LEGACY_SENTENCES["C"] + LEGACY_SENTENCES["O3"]
+        + "\n\n📝 Title feedback:\n• " + LEGACY_SENTENCES["T3"]
+        + "\n\n🎯 Business goal feedback:\n• " + LEGACY_SENTENCES["G1"] + "\n• " + LEGACY_SENTENCES["G2"]
+        + "\n\n📁 Data scope feedback:\n• " + LEGACY_SENTENCES["D3"]
+        + "\n\n📈 Expected output feedback:\n• " + LEGACY_SENTENCES["E2"]
+        + LEGACY_SENTENCES["Z2"]
+    )
+
+@pytest.mark.parametrize("value", ["", "Model feedback, stored as text", "@fb0:C;O1"])
+def test_uncoded_feedback_is_returned_unchanged(value):
+    assert render_feedback(value) == value
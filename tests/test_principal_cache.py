@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy.future import select
+from app.auth import get_password_hash
+from app.database import SessionLocal
+from app.models.models import User
+from conftest import login
+
+pytestmark = pytest.mark.anyio
+
+async def registered(client, email: str, role: str) -> dict:
+    await client.post("/api/register", params={"email": email, "password": "password123", "role": role})
+    return await login(client, email)
+
+async def test_role_change_is_visible_on_the_next_request(app, client):
+    headers = await registered(client, "promoted@test.com", "researcher")
+    assert "assigned" in (await client.get("/api/stats", headers=headers)).json()
+
+    async with SessionLocal() as session:
+        user = (await session.execute(select(User).filter(User.email == "promoted@test.com"))).scalar_one()
+        user.role = "pm"
+        await session.flush()
+        # A request between the flush and the commit still reads, and caches, the old role
+        assert "assigned" in (await client.get("/api/stats", headers=headers)).json()
+        await session.commit()
+
+    assert "assigned" not in (await client.get("/api/stats", headers=headers)).json()
+
+async def test_rolled_back_change_leaves_the_cached_user(app, client):
+    headers = await registered(client, "kept@test.com", "researcher")
+    assert (await client.get("/api/stats", headers=headers)).status_code == 200
+
+    async with SessionLocal() as session:
+        user = (await session.execute(select(User).filter(User.email == "kept@test.com"))).scalar_one()
+        user.is_active = False
+        await session.flush()
+        await session.rollback()
+
+    assert (await client.get("/api/stats", headers=headers)).status_code == 200
+
+async def test_password_change_and_deactivation_are_visible_on_the_next_request(app, client):
+    headers = await registered(client, "changed@test.com", "researcher")
+    assert (await client.get("/api/stats", headers=headers)).status_code == 200
+
+    async with SessionLocal() as session:
+        user = (await session.execute(select(User).filter(User.email == "changed@test.com"))).scalar_one()
+        user.hashed_password = get_password_hash("new-password")
+        user.is_active = False
+        await session.commit()
+
+    old = await client.post("/api/token", data={"username": "changed@test.com", "password": "password123"})
+    assert old.status_code == 401
+    new = await client.post("/api/token", data={"username": "changed@test.com", "password": "new-password"})
+    assert new.status_code == 200
+    response = await client.get("/api/stats", headers=headers)
+    assert response.status_code == 400 and response.json()["detail"] == "Inactive user"
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from app.query_stats import QUERY_BUDGETS
+
+pytestmark = pytest.mark.anyio
+
+def query_count(response) -> int:
+    assert response.is_success, response.text
+    return int(response.headers["x-query-count"])
+
+async def stream_query_count(app, path: str, headers: dict) -> int:
+    """Query count of a streaming response, read from its start without waiting for the end"""
+    started = asyncio.get_running_loop().create_future()
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "server": ("test", 80), "client": ("127.0.0.1", 1234),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    }
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start" and not started.done():
+            started.set_result(message)
+
+    task = asyncio.create_task(app(scope, receive, send))
+    try:
+        start = await asyncio.wait_for(started, 5)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    assert start["status"] == 200
+    return int(dict(start["headers"])[b"x-query-count"])
+
+async def test_budgeted_endpoints_stay_within_budget(app, client, pm_headers, researcher_headers):
+    counts = {}
+
+    response = await client.post("/api/token", data={"username": "pm@test.com", "password": "password123"})
+    counts[("POST", "/api/token")] = query_count(response)
+
+    response = await client.post(
+        "/api/requirements/",
+        data={"title": "Budget title", "priority": "High", "business_goal": "Stay in budget", "data_scope": "a.csv"},
+        files=[("files", ("a.csv", b"a,b\n1,2\n"))],
+        headers=pm_headers
+    )
+    counts[("POST", "/api/requirements/")] = query_count(response)
+    requirement_id = response.json()["id"]
+    detail = f"/api/requirements/{requirement_id}"
+
+    response = await client.get("/api/researchers/", headers=pm_headers)
+    counts[("GET", "/api/researchers/")] = query_count(response)
+    researcher_id = response.json()[0]["id"]
+
+    response = await client.put(detail, json={"assigned_to_id": researcher_id, "priority": "Low"}, headers=pm_headers)
+    counts[("PUT", "/api/requirements/{requirement_id}")] = query_count(response)
+
+    response = await client.get("/api/requirements/", headers=researcher_headers)
+    counts[("GET", "/api/requirements/")] = query_count(response)
+
+    response = await client.get(detail, headers=researcher_headers)
+    counts[("GET", "/api/requirements/{requirement_id}")] = query_count(response)
+
+    response = await client.post(f"{detail}/feedback", json={"content": "On it"}, headers=researcher_headers)
+    counts[("POST", "/api/requirements/{requirement_id}/feedback")] = query_count(response)
+
+    response = await client.get(f"{detail}/feedbacks", headers=pm_headers)
+    counts[("GET", "/api/requirements/{requirement_id}/feedbacks")] = query_count(response)
+
+    response = await client.get(f"{detail}/files", headers=pm_headers)
+    counts[("GET", "/api/requirements/{requirement_id}/files")] = query_count(response)
+    file_id = response.json()[0]["id"]
+
+    response = await client.get(f"{detail}/files/{file_id}", headers=pm_headers)
+    counts[("GET", "/api/requirements/{requirement_id}/files/{file_id}")] = query_count(response)
+
+    response = await client.get("/api/stats", headers=researcher_headers)
+    counts[("GET", "/api/stats")] = query_count(response)
+
+    counts[("GET", "/api/events")] = await stream_query_count(app, "/api/events", pm_headers)
+
+    response = await client.delete(detail, headers=pm_headers)
+    counts[("DELETE", "/api/requirements/{requirement_id}")] = query_count(response)
+
+    # Every budget is exercised, so a new budget needs a request here too
+    assert counts.keys() == QUERY_BUDGETS.keys()
+    over = {key: (count, QUERY_BUDGETS[key]) for key, count in counts.items() if count > QUERY_BUDGETS[key]}
+    assert not over
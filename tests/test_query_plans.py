@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import create_engine
+from app.migrations import FULL_SCAN, hot_queries, run_migrations
+
+# Indexes added by the migrations for specific hot queries
+EXPECTED_INDEXES = {
+    "pm requirement list": "ix_requirements_creator_created",
+    "pm requirement list validators": "ix_requirements_creator_updated",
+    "requirement feedbacks": "ix_feedbacks_requirement_created",
+    "requirement feedbacks validators": "ix_feedbacks_requirement_updated",
+    "researchers": "ix_users_role",
+    "requirement files": "ix_requirement_files_requirement",
+    "pm overdue count": "ix_requirements_creator_deadline",
+    "researcher overdue count": "ix_requirements_assignee_deadline",
+}
+
+@pytest.fixture(scope="module")
+def migrated(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans')}/plans.db")
+    with engine.begin() as conn:
+        run_migrations(conn)
+    yield engine
+    engine.dispose()
+
+@pytest.mark.parametrize("name,statement", hot_queries(), ids=[name for name, _ in hot_queries()])
+def test_hot_query_uses_an_index(migrated, name, statement):
+    with migrated.connect() as conn:
+        compiled = statement.compile(conn, compile_kwargs={"literal_binds": True})
+        plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")]
+
+    assert not [step for step in plan if FULL_SCAN.match(step)], plan
+    assert any(step.startswith("SEARCH") for step in plan), plan
+    if name in EXPECTED_INDEXES:
+        assert any(EXPECTED_INDEXES[name] in step for step in plan), plan
@@ -0,0 +1,37 @@
+import asyncio
+import pytest
+from app import auth
+from app.routers import auth as auth_router
+
+pytestmark = pytest.mark.anyio
+
+async def test_registration_does_not_hold_the_writer_while_hashing(client, pm_headers, monkeypatch):
+    hashing = asyncio.Event()
+    release = asyncio.Event()
+    hash_password = auth.password_hasher.hash
+
+    async def slow_hash(password):
+        hashing.set()
+        await release.wait()
+        return await hash_password(password)
+
+    monkeypatch.setattr(auth_router.password_hasher, "hash", slow_hash)
+    registration = asyncio.create_task(client.post(
+        "/api/register", params={"email": "slow@example.com", "password": "pw", "role": "researcher"}
+    ))
+    await asyncio.wait_for(hashing.wait(), 5)
+
+    # The app has one writer connection; a write must not wait for the hash
+    write = await asyncio.wait_for(client.post(
+        "/api/requirements/",
+        data={"title": "Written meanwhile", "priority": "Low", "business_goal": "Write", "data_scope": "x"},
+        headers=pm_headers
+    ), 5)
+    assert write.status_code == 200
+
+    release.set()
+    assert (await registration).status_code == 200
+    duplicate = await client.post(
+        "/api/register", params={"email": "slow@example.com", "password": "pw", "role": "researcher"}
+    )
+    assert duplicate.status_code == 400
@@ -0,0 +1,71 @@
+import pytest
+from app.routers.requirements import REQUIREMENT_FIELDS, SUMMARY_FIELDS
+from conftest import login
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def own_requirements(client, researcher_headers):
+    await client.post("/api/register", params={"email": "fields@test.com", "password": "password123", "role": "pm"})
+    headers = await login(client, "fields@test.com")
+    researcher = (await client.get("/api/researchers/", headers=headers)).json()[0]
+    for title, priority in (("Fields first", "Low"), ("Fields second", "High")):
+        created = await client.post(
+            "/api/requirements/",
+            data={"title": title, "priority": priority, "business_goal": "Reduce churn", "data_scope": "x"},
+            headers=headers
+        )
+        assert created.status_code == 200
+    await client.put(
+        f"/api/requirements/{created.json()['id']}", json={"assigned_to_id": researcher["id"]}, headers=headers
+    )
+    yield headers, researcher
+    for item in (await client.get("/api/requirements/", params={"fields": "id"}, headers=headers)).json()["items"]:
+        await client.delete(f"/api/requirements/{item['id']}", headers=headers)
+
+async def test_fields_select_only_the_named_columns(client, own_requirements):
+    headers, researcher = own_requirements
+    response = await client.get(
+        "/api/requirements/", params={"fields": "priority, title,assigned_to"}, headers=headers
+    )
+    assert response.status_code == 200
+    items = response.json()["items"]
+    # The id is always included, and columns come in the full view's order
+    assert [list(item) for item in items] == [["id", "title", "priority", "assigned_to"]] * 2
+    assert [(item["title"], item["assigned_to"]) for item in items] == [
+        ("Fields second", researcher["email"]), ("Fields first", None)
+    ]
+
+async def test_views_return_their_columns(client, own_requirements):
+    headers, _ = own_requirements
+    summary = (await client.get("/api/requirements/", params={"view": "summary"}, headers=headers)).json()
+    assert [list(item) for item in summary["items"]] == [SUMMARY_FIELDS] * 2
+
+    full = (await client.get("/api/requirements/", headers=headers)).json()
+    assert [list(item) for item in full["items"]] == [list(REQUIREMENT_FIELDS)] * 2
+    # Stored feedback codes are rendered, as on the detail endpoint
+    detail = (await client.get(f"/api/requirements/{full['items'][0]['id']}", headers=headers)).json()
+    assert full["items"][0]["ai_feedback"] == detail["ai_feedback"]
+    assert not detail["ai_feedback"].startswith("@fb1:")
+
+async def test_fields_page_on_sort_keys_they_leave_out(client, own_requirements):
+    headers, _ = own_requirements
+    params = {"fields": "title", "sort": "priority_high", "limit": 1}
+    first = (await client.get("/api/requirements/", params=params, headers=headers)).json()
+    second = (await client.get(
+        "/api/requirements/", params={**params, "cursor": first["next_cursor"]}, headers=headers
+    )).json()
+    assert [item["title"] for item in first["items"] + second["items"]] == ["Fields second", "Fields first"]
+    assert second["next_cursor"] is None
+
+@pytest.mark.parametrize("params,detail", [
+    ({"fields": "title,bogus"}, "Unknown fields: bogus"),
+    ({"fields": "secret, password"}, "Unknown fields: secret, password"),
+    ({"fields": "hashed_password"}, "Unknown fields: hashed_password"),
+    ({"view": "compact"}, "Invalid view, expected 'full' or 'summary'")
+])
+async def test_unknown_fields_and_views_are_rejected(client, own_requirements, params, detail):
+    headers, _ = own_requirements
+    response = await client.get("/api/requirements/", params=params, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
@@ -0,0 +1,77 @@
+import base64
+import json
+import pytest
+from conftest import login
+
+pytestmark = pytest.mark.anyio
+
+PRIORITIES = ("High", "Low", "Medium", "High", "Medium", "Low", "High")
+RANK = {"High": 3, "Medium": 2, "Low": 1}
+
+@pytest.fixture(scope="module")
+async def own_pm(app):
+    """A PM of its own, so the list holds only this module's requirements"""
+    import httpx
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        await client.post("/api/register", params={"email": "pager@test.com", "password": "password123", "role": "pm"})
+        headers = await login(client, "pager@test.com")
+        for i, priority in enumerate(PRIORITIES):
+            await client.post(
+                "/api/requirements/",
+                data={"title": f"Paged {i}", "priority": priority, "business_goal": "Page", "data_scope": "x"},
+                headers=headers
+            )
+    return headers
+
+def cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+async def test_list_response_shape(client, own_pm):
+    response = await client.get("/api/requirements/", params={"include_total": "true"}, headers=own_pm)
+    body = response.json()
+    assert set(body) == {"items", "next_cursor", "total"}
+    assert body["total"] == len(PRIORITIES) == len(body["items"])
+    assert body["next_cursor"] is None
+    assert (await client.get("/api/requirements/", headers=own_pm)).json()["total"] is None
+
+@pytest.mark.parametrize("sort", ["created_desc", "created_asc", "priority_high", "priority_low"])
+async def test_paging_visits_every_row_once_in_order(client, own_pm, sort):
+    seen = []
+    next_cursor = None
+    while True:
+        params = {"sort": sort, "limit": 2, **({"cursor": next_cursor} if next_cursor else {})}
+        body = (await client.get("/api/requirements/", params=params, headers=own_pm)).json()
+        seen.extend(body["items"])
+        next_cursor = body["next_cursor"]
+        if next_cursor is None:
+            break
+
+    ids = [item["id"] for item in seen]
+    assert len(ids) == len(set(ids)) == len(PRIORITIES)
+    newest_first = sorted(seen, key=lambda item: (item["created_at"], item["id"]), reverse=True)
+    expected = {
+        "created_desc": newest_first,
+        "created_asc": newest_first[::-1],
+        "priority_high": sorted(newest_first, key=lambda item: -RANK[item["priority"]]),
+        "priority_low": sorted(newest_first, key=lambda item: RANK[item["priority"]])
+    }[sort]
+    assert ids == [item["id"] for item in expected]
+
+@pytest.mark.parametrize("sort,value", [
+    ("created_desc", "not base64 !"),
+    ("created_desc", cursor({"a": 1})),
+    ("created_desc", cursor(["2020-01-01T00:00:00"])),
+    ("created_desc", cursor(["2020-01-01T00:00:00", 1, 2])),
+    ("created_desc", cursor(["yesterday", 1])),
+    ("created_desc", cursor([20200101, 1])),
+    ("created_desc", cursor(["2020-01-01T00:00:00", "1"])),
+    ("created_desc", cursor(["2020-01-01T00:00:00", True])),
+    ("priority_high", cursor([{"a": 1}, "2020-01-01", 3])),
+    ("priority_high", cursor([[3], "2020-01-01", 3])),
+    ("priority_high", cursor([3.5, "2020-01-01", 3])),
+    ("priority_low", cursor([None, "2020-01-01", 3])),
+])
+async def test_malformed_cursors_are_rejected(client, own_pm, sort, value):
+    response = await client.get("/api/requirements/", params={"sort": sort, "cursor": value}, headers=own_pm)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
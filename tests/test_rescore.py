@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from sqlalchemy import update
+from app import rescore
+from app.ai_service import AnalyzerBusyError, analysis_executor
+from app.database import SessionLocal
+from app.models.models import RescoreJob
+from app.rescore import create_rescore_job
+
+pytestmark = pytest.mark.anyio
+
+async def wait_for_job(client, headers, job_id):
+    for _ in range(200):
+        job = (await client.get(f"/api/rescore-jobs/{job_id}", headers=headers)).json()
+        if not job["running"]:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError("re-scoring job did not finish")
+
+async def test_busy_analyzer_is_retried_not_failed(client, pm_headers, monkeypatch):
+    await client.post(
+        "/api/requirements/",
+        data={"title": "Rescore me", "priority": "Low", "business_goal": "Grow revenue", "data_scope": "x"},
+        headers=pm_headers
+    )
+    run = analysis_executor.run
+    busy = {"left": 2}
+
+    async def sometimes_busy(*args, **kwargs):
+        if busy["left"]:
+            busy["left"] -= 1
+            raise AnalyzerBusyError("Analysis queue is full, please retry shortly")
+        return await run(*args, **kwargs)
+
+    monkeypatch.setattr(analysis_executor, "run", sometimes_busy)
+    response = await client.post("/api/rescore-jobs/", headers=pm_headers)
+    assert response.status_code == 200
+
+    job = await wait_for_job(client, pm_headers, response.json()["id"])
+    assert job["status"] == "completed"
+    assert job["busy_retries"] == 2
+    assert job["processed"] == job["total"]
+
+async def test_only_admins_manage_the_job(client, pm_headers, monkeypatch):
+    monkeypatch.setattr(rescore, "RESCORE_ADMIN_EMAILS", set())
+    assert (await client.post("/api/rescore-jobs/", headers=pm_headers)).status_code == 403
+    assert (await client.post("/api/rescore-jobs/1/cancel", headers=pm_headers)).status_code == 403
+
+async def test_one_running_job_at_a_time():
+    first, second = await asyncio.gather(create_rescore_job(1), create_rescore_job(1))
+    try:
+        assert (first is None) != (second is None)
+    finally:
+        async with SessionLocal() as session:
+            await session.execute(
+                update(RescoreJob).where(RescoreJob.status == "running").values(status="cancelled")
+            )
+            await session.commit()
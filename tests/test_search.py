@@ -0,0 +1,52 @@
+import pytest
+from app.search import highlight, match_expression, HIGHLIGHT_END, HIGHLIGHT_START
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def churn_requirement(client, pm_headers):
+    created = await client.post(
+        "/api/requirements/",
+        data={
+            "title": "Churn analysis <b>premium</b>",
+            "priority": "High",
+            "business_goal": "Forecasting retention & conversion by segmentation",
+            "data_scope": "x"
+        },
+        headers=pm_headers
+    )
+    yield created.json()["id"]
+    await client.delete(f"/api/requirements/{created.json()['id']}", headers=pm_headers)
+
+async def search_ids(client, headers, query):
+    response = await client.get("/api/search", params={"q": query}, headers=headers)
+    assert response.status_code == 200
+    return [item["requirement_id"] for item in response.json()["items"]]
+
+@pytest.mark.parametrize("query", [
+    "churn analy", "analy", "analys", "retenti", "forecasti", "segmentati", "conversi", "an"
+])
+async def test_partly_typed_last_word_matches(client, pm_headers, churn_requirement, query):
+    assert churn_requirement in await search_ids(client, pm_headers, query)
+
+async def test_only_the_last_word_is_a_prefix(client, pm_headers, churn_requirement):
+    assert churn_requirement not in await search_ids(client, pm_headers, "chur analysis")
+
+@pytest.mark.parametrize("query", ['churn" OR "x', "churn AND (", "NEAR(churn", "churn*^-:", '"'])
+async def test_operator_characters_are_searched_as_text(client, pm_headers, churn_requirement, query):
+    # Never an FTS5 syntax error; quotes and operators are dropped or quoted
+    await search_ids(client, pm_headers, query)
+
+def test_match_expression_quotes_words():
+    assert match_expression('churn" OR "x') == '"churn" "OR" "x"*'
+    assert match_expression("  ") is None
+
+async def test_snippets_are_escaped(client, pm_headers, churn_requirement):
+    response = await client.get("/api/search", params={"q": "premium"}, headers=pm_headers)
+    snippet = next(
+        item["snippet"] for item in response.json()["items"] if item["requirement_id"] == churn_requirement
+    )
+    assert "&lt;b&gt;<mark>premium</mark>&lt;/b&gt;" in snippet
+
+def test_highlight_escapes_before_marking():
+    assert highlight(f"a <i>{HIGHLIGHT_START}x&y{HIGHLIGHT_END}") == "a &lt;i&gt;<mark>x&amp;y</mark>"
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import create_engine
+from app import migrations
+from app.database import engine
+from app.stats import reconcile_stats
+
+pytestmark = pytest.mark.anyio
+
+async def test_stats_follow_every_write_path(client, pm_headers):
+    created = await client.post(
+        "/api/requirements/",
+        data={"title": "Stats title", "priority": "High", "business_goal": "Track stats", "data_scope": "x"},
+        headers=pm_headers
+    )
+    requirement_id = created.json()["id"]
+    researchers = (await client.get("/api/researchers/", headers=pm_headers)).json()
+    await client.put(
+        f"/api/requirements/{requirement_id}",
+        json={"priority": "Low", "assigned_to_id": researchers[0]["id"]},
+        headers=pm_headers
+    )
+    await client.delete(f"/api/requirements/{requirement_id}", headers=pm_headers)
+
+    async with engine.begin() as conn:
+        assert await conn.run_sync(reconcile_stats) == 0
+
+def test_stats_migration_refuses_other_databases(monkeypatch, tmp_path):
+    monkeypatch.setattr(migrations, "IS_SQLITE", False)
+    with create_engine(f"sqlite:///{tmp_path}/other.db").begin() as conn:
+        with pytest.raises(RuntimeError, match="SQLite triggers"):
+            migrations._add_requirement_stats(conn)
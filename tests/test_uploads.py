@@ -0,0 +1,71 @@
+import hashlib
+import os
+import pytest
+from app.uploads import upload_store
+
+pytestmark = pytest.mark.anyio
+
+def blobs() -> set:
+    objects = os.path.join(upload_store.root, "objects")
+    return {name for _, _, names in os.walk(objects) for name in names}
+
+def temporary_files() -> list:
+    tmp_dir = os.path.join(upload_store.root, "tmp")
+    return os.listdir(tmp_dir) if os.path.isdir(tmp_dir) else []
+
+async def create(client, headers, files):
+    return await client.post(
+        "/api/requirements/",
+        data={"title": "Upload title", "priority": "Low", "business_goal": "Attach data", "data_scope": "x"},
+        files=[("files", file) for file in files],
+        headers=headers
+    )
+
+@pytest.fixture
+def small_limits(monkeypatch):
+    monkeypatch.setattr(upload_store, "chunk_size", 4)
+    monkeypatch.setattr(upload_store, "max_file_size", 10)
+    monkeypatch.setattr(upload_store, "max_request_size", 15)
+
+async def test_same_content_is_stored_once(client, pm_headers):
+    content = b"id,churned\n1,0\n2,1\n"
+    before = blobs()
+    first = await create(client, pm_headers, [("first.csv", content)])
+    second = await create(client, pm_headers, [("second.csv", content, "text/csv")])
+    assert first.status_code == second.status_code == 200
+
+    assert blobs() - before == {hashlib.sha256(content).hexdigest()}
+    for response, filename in ((first, "first.csv"), (second, "second.csv")):
+        detail = f"/api/requirements/{response.json()['id']}/files"
+        files = (await client.get(detail, headers=pm_headers)).json()
+        assert [(file["filename"], file["size"]) for file in files] == [(filename, len(content))]
+        download = await client.get(f"{detail}/{files[0]['id']}", headers=pm_headers)
+        assert download.content == content
+
+async def test_file_over_the_file_limit_is_rejected(client, pm_headers, small_limits):
+    response = await create(client, pm_headers, [("big.csv", b"x" * 11)])
+    assert response.status_code == 413
+    assert response.json()["detail"] == "big.csv exceeds the limit of 10 bytes per file"
+
+async def test_files_over_the_request_limit_are_rejected(client, pm_headers, small_limits):
+    response = await create(client, pm_headers, [("a.csv", b"a" * 8), ("b.csv", b"b" * 8)])
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Uploads exceed the limit of 15 bytes per request"
+
+async def test_oversized_file_reports_the_file_limit_past_the_request_limit(client, pm_headers, small_limits):
+    # Only 7 bytes of the request remain, but this file is over the file limit by itself
+    response = await create(client, pm_headers, [("a.csv", b"c" * 8), ("big.csv", b"d" * 12)])
+    assert response.status_code == 413
+    assert response.json()["detail"] == "big.csv exceeds the limit of 10 bytes per file"
+
+async def test_failed_upload_leaves_no_partial_files(client, pm_headers, small_limits):
+    before = blobs()
+    listed = (await client.get("/api/requirements/", headers=pm_headers)).json()["total"]
+    response = await create(client, pm_headers, [("a.csv", b"e" * 8), ("b.csv", b"f" * 9)])
+    assert response.status_code == 413
+
+    assert temporary_files() == []
+    # The rejected file never reaches the store; the accepted one may be shared with others
+    assert blobs() - before <= {hashlib.sha256(b"e" * 8).hexdigest()}
+    assert hashlib.sha256(b"f" * 9).hexdigest() not in blobs()
+    assert (await client.get("/api/requirements/", headers=pm_headers)).json()["total"] == listed
@@ -0,0 +1,77 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from app import ai_service
+from app.ai_service import LLMRequirementAnalyzer, analysis_cache, stream_requirement_analysis
+
+pytestmark = pytest.mark.anyio
+
+SCORES = {"clarity_score": 0.9, "feasibility_score": 0.8, "completeness_score": 0.7}
+
+def chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+class StreamingCompletions:
+    """Streams the given pieces once released, optionally failing after them"""
+
+    def __init__(self, pieces, fail=False):
+        self.pieces = pieces
+        self.fail = fail
+        self.release = asyncio.Event()
+
+    async def create(self, **kwargs):
+        assert kwargs["stream"] is True
+        return self._chunks()
+
+    async def _chunks(self):
+        await self.release.wait()
+        for piece in self.pieces:
+            yield chunk(piece)
+        if self.fail:
+            raise ConnectionError("stream dropped")
+
+def streaming_analyzer(monkeypatch, completions):
+    async def fallback(*args):
+        raise AssertionError("streams fall back in stream_requirement_analysis")
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    llm = LLMRequirementAnalyzer(client, model="test", fallback=fallback, batch_window=0)
+    monkeypatch.setattr(ai_service, "llm_analyzer", llm)
+    return llm
+
+async def test_heuristic_scores_arrive_before_the_model_answers(app, monkeypatch):
+    completions = StreamingCompletions([
+        "Clarify the ", "segment definition. ", "Add a deadline.\nSCO", "RES: " + json.dumps(SCORES)
+    ])
+    streaming_analyzer(monkeypatch, completions)
+    args = ("Streamed title", "Find churn drivers in the premium segment", "usage.csv", "", "High")
+    events = stream_requirement_analysis(*args)
+
+    event, data = await asyncio.wait_for(events.__anext__(), 5)
+    assert event == "scores" and data["provisional"] is True
+    assert not completions.release.is_set()
+
+    completions.release.set()
+    rest = [item async for item in events]
+    feedback = [data["text"] for event, data in rest if event == "feedback"]
+    assert len(feedback) > 1
+    assert "SCORES" not in "".join(feedback)
+    assert rest[-1] == ("scores", SCORES)
+
+    cached = analysis_cache.get(ai_service.requirement_key(*args))
+    assert cached == (0.9, 0.8, 0.7, "Clarify the segment definition. Add a deadline.")
+
+async def test_failed_stream_restarts_with_the_heuristic_result(app, monkeypatch):
+    completions = StreamingCompletions(["Partial feedback that "], fail=True)
+    completions.release.set()
+    llm = streaming_analyzer(monkeypatch, completions)
+    args = ("Dropped stream", "Find churn drivers in the premium segment", "usage.csv", "", "High")
+
+    events = [item async for item in stream_requirement_analysis(*args)]
+    kinds = [event for event, data in events]
+    assert kinds[:3] == ["scores", "feedback", "restart"]
+    assert kinds[3] == "scores" and "provisional" not in events[3][1]
+    assert "feedback" in kinds[4:]
+    assert llm.fallbacks == 1
+    assert analysis_cache.get(ai_service.requirement_key(*args)) is None